@@ -1 +1,4 @@
 from proteinproductionsim.controller.dna_sim_controller import DNASimController
+from proteinproductionsim.controller.multi_sample_controller import MultiSampleController
+from proteinproductionsim.controller.batch_sim_controller import BatchSimController
+from proteinproductionsim.controller.sweep_controller import SweepController
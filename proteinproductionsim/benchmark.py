@@ -0,0 +1,278 @@
+"""
+============
+benchmark.py
+============
+
+This file contains the benchmark suite of the simulation.
+
+The suite times DNASimController.start over a matrix of scenarios and RNAP loading rates, and the main kernels of the
+step: the supercoiling, the ribosome stepping, the construction of the loading lists and the recorders. All the runs
+use fixed seeds, so the same work is timed every time. The results are stored as JSON, and can be compared against a
+saved baseline to flag the regressions.
+
+The import of the modules loaded by every worker process and command line run is timed in a fresh interpreter, and the
+suite fails if one of them loads a plotting module.
+
+Usage:
+    python -m proteinproductionsim.benchmark --output results.json [--baseline baseline.json] [--quick]
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from .controller.dna_sim_controller import DNASimController, RecordConfig
+from .datacontainer.data_recorder import RNAPPositionRecorder, SingleValueRecorder, FiveThreeRecorder, \
+    SupercoilingRecorder
+from .datacontainer.ribo_container import RIBOContainer
+from .helper.loading_list import LoadingList
+from .helper.result_cache import get_code_version
+from .datacontainer.setting import Setting
+
+# REASON: each scenario changes the cost of the step in a different way, they are all crossed with the loading rates.
+SCENARIOS = {
+    "supercoiling": {},
+    "no supercoiling": {"include_supercoiling": False},
+    "bursty promoter": {"include_busty_promoter": True},
+    "two pause": {"pause_profile": "TwopauseAbs"},
+    "rnap fall off": {"if_rnap_fall_off_from_supercoiling": True},
+}
+RNAP_LOADING_RATES = [0.1, 0.5, 1.0]
+SEED = 20230101
+# REASON: the modules imported by the workers of the pools and by the command line runs, which must stay headless.
+HEADLESS_MODULES = ["proteinproductionsim.controller.dna_sim_controller",
+                    "proteinproductionsim.controller.multi_sample_controller",
+                    "proteinproductionsim.cli", "proteinproductionsim.service"]
+PLOTTING_MODULES = ["matplotlib"]
+_IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "loaded": [name for name in {forbidden} if name in sys.modules]}}))
+"""
+
+
+def time_function(function, repeat: int = 3) -> dict:
+    """
+    This method calls function repeat times and returns the best and the mean wall time in seconds.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return {"seconds": min(times), "mean": sum(times) / len(times), "repeat": repeat}
+
+
+def _run_controller(rnap_loading_rate, record_config=None, **kwargs):
+    if record_config is None:
+        record_config = RecordConfig(show_progress_bar=False)
+    controller = DNASimController(rnap_loading_rate, record_config, seed=SEED, **kwargs)
+    controller.start()
+    return controller
+
+
+def _run_controller_until(rnap_loading_rate, time_index, **kwargs):
+    # REASON: the kernels are timed on the state of a real run, which is stepped by hand up to time_index.
+    controller = DNASimController(rnap_loading_rate, RecordConfig(show_progress_bar=False, record_supercoiling=True),
+                                  seed=SEED, **kwargs)
+    controller.init()
+    for i in range(time_index):
+        controller.env.step(time_index=i)
+    controller.time_index = time_index
+    return controller
+
+
+def benchmark_scenarios(rnap_loading_rates=None, repeat: int = 1) -> dict:
+    """
+    This method times full DNASimController runs for every scenario and loading rate.
+    """
+    results = {}
+    for rnap_loading_rate in rnap_loading_rates or RNAP_LOADING_RATES:
+        for name, kwargs in SCENARIOS.items():
+            results[f"start/{name}/rate={rnap_loading_rate}"] = time_function(
+                lambda: _run_controller(rnap_loading_rate, **kwargs), repeat)
+    return results
+
+
+def benchmark_kernels(rnap_loading_rates=None, repeat: int = 3, calls: int = 200) -> dict:
+    """
+    This method times the main kernels of the step, each called calls times.
+    """
+    results = {}
+    setting = Setting()
+    middle = setting.scaling(150)
+    for rnap_loading_rate in rnap_loading_rates or RNAP_LOADING_RATES:
+        controller = _run_controller_until(rnap_loading_rate, middle)
+        dna = controller.env.dna
+
+        def supercoiling():
+            for _ in range(calls):
+                dna.supercoiling()
+        results[f"supercoiling/rate={rnap_loading_rate}"] = time_function(supercoiling, repeat)
+
+        def recorders():
+            recorder_list = [RNAPPositionRecorder(controller, dna, controller.total_time),
+                             SingleValueRecorder(controller, controller.get_protein_amount, controller.total_time,
+                                                 name_x="Time", name_y="Protein Amount", unit_x="s", unit_y=""),
+                             FiveThreeRecorder(controller, dna, controller.total_time),
+                             SupercoilingRecorder(controller, dna, controller.total_time)]
+            for i in range(calls):
+                for recorder in recorder_list:
+                    recorder.log(i)
+        results[f"recorders/rate={rnap_loading_rate}"] = time_function(recorders, repeat)
+
+    # STEP: the ribosome stepping, on mRNAs with a growing amount of ribosomes
+    for amount in [1, 10, 100]:
+        def ribosome_step():
+            container = RIBOContainer(None, setting=setting)
+            for _ in range(amount):
+                container.load_one()
+            # REASON: the ribosomes are spread with some of them close enough to block each other.
+            container.ribo_list[:amount] = np.arange(amount)[::-1] * 1.5 * setting.ribo_size
+            for i in range(calls):
+                container.step(i, setting.length)
+        results[f"ribosome step/ribosomes={amount}"] = time_function(ribosome_step, repeat)
+
+    # STEP: the construction of the loading lists, the ribosome ones are built for every RNAP
+    rng = np.random.default_rng(SEED)
+    results["loading list/ribosome"] = time_function(
+        lambda: [LoadingList(None, setting.scaling(setting.scaling(60)), setting.ribo_loading_probability,
+                             if_stochastic=True, rng=rng) for _ in range(calls)], repeat)
+    results["loading list/rnap"] = time_function(
+        lambda: [LoadingList(None, setting.total_time_index, 0.5*setting.dt, if_stochastic=True, rng=rng)
+                 for _ in range(calls)], repeat)
+    return results
+
+
+def time_import(module: str) -> dict:
+    """
+    This method imports module in a fresh interpreter and returns the import time in seconds and the plotting modules
+    it loaded.
+    """
+    script = _IMPORT_SCRIPT.format(module=module, forbidden=PLOTTING_MODULES)
+    output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+
+def benchmark_imports(modules=None, repeat: int = 5) -> dict:
+    """
+    This method times the cold import of each headless module.
+
+    Returns
+    -------
+    dict
+        for each module, the best and the mean import time, and the plotting modules it "loaded"
+    """
+    results = {}
+    for module in modules or HEADLESS_MODULES:
+        runs = [time_import(module) for _ in range(repeat)]
+        times = [run["seconds"] for run in runs]
+        results[f"import/{module}"] = {"seconds": min(times), "mean": sum(times) / len(times), "repeat": repeat,
+                                       "loaded": sorted(set().union(*(run["loaded"] for run in runs)))}
+    return results
+
+
+def find_headless_violations(results: dict) -> list[str]:
+    """
+    This method returns the messages of the headless modules which loaded a plotting module.
+    """
+    return [f"{name} loads {result['loaded']}" for name, result in results.items()
+            if name.startswith("import/") and result.get("loaded")]
+
+
+def run_benchmarks(quick: bool = False) -> dict:
+    """
+    This method runs the whole suite.
+
+    Parameters
+    ----------
+    quick : bool, optional
+        if True, only the loading rate 0.5 is used (default is False)
+
+    Returns
+    -------
+    dict
+        the "metadata" of the machine and the code, and the "results" keyed by benchmark name
+    """
+    rnap_loading_rates = [0.5] if quick else RNAP_LOADING_RATES
+    results = {}
+    results.update(benchmark_imports())
+    results.update(benchmark_kernels(rnap_loading_rates))
+    results.update(benchmark_scenarios(rnap_loading_rates))
+    metadata = {"date": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+                "numpy": np.__version__, "machine": platform.platform(), "code version": get_code_version(),
+                "seed": SEED}
+    return {"metadata": metadata, "results": results}
+
+
+def compare_to_baseline(current: dict, baseline: dict, tolerance: float = 0.2) -> list[dict]:
+    """
+    This method compares the results to a baseline.
+
+    Parameters
+    ----------
+    current : dict
+        the output of run_benchmarks
+    baseline : dict
+        a saved output of run_benchmarks
+    tolerance : float, optional
+        the relative slowdown above which a benchmark is flagged as a regression (default is 0.2)
+
+    Returns
+    -------
+    list[dict]
+        one row for each benchmark in both, with the keys "name", "baseline", "current", "ratio" and "regression"
+    """
+    rows = []
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+        base_seconds = baseline["results"][name]["seconds"]
+        ratio = result["seconds"] / base_seconds if base_seconds > 0 else float("inf")
+        rows.append({"name": name, "baseline": base_seconds, "current": result["seconds"], "ratio": ratio,
+                     "regression": ratio > 1 + tolerance})
+    return rows
+
+
+def format_comparison(rows: list[dict]) -> str:
+    lines = [f"{'benchmark':<44}{'baseline [s]':>14}{'current [s]':>14}{'ratio':>8}"]
+    for row in rows:
+        flag = "  REGRESSION" if row["regression"] else ""
+        lines.append(f"{row['name']:<44}{row['baseline']:>14.4f}{row['current']:>14.4f}{row['ratio']:>8.2f}{flag}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the benchmark suite of proteinproductionsim.")
+    parser.add_argument("--output", default="benchmark_results.json", help="the JSON file to store the results")
+    parser.add_argument("--baseline", default=None, help="a saved JSON result to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="the relative slowdown flagged as regression")
+    parser.add_argument("--quick", action="store_true", help="only use the loading rate 0.5")
+    args = parser.parse_args(argv)
+
+    current = run_benchmarks(quick=args.quick)
+    with open(args.output, "w") as file:
+        json.dump(current, file, indent=2)
+    violations = find_headless_violations(current["results"])
+    for violation in violations:
+        print(f"HEADLESS VIOLATION: {violation}")
+    if args.baseline is None:
+        for name, result in current["results"].items():
+            print(f"{name:<44}{result['seconds']:>14.4f}")
+        return 1 if violations else 0
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    rows = compare_to_baseline(current, baseline, args.tolerance)
+    print(format_comparison(rows))
+    return 1 if violations or any(row["regression"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
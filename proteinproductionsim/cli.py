@@ -0,0 +1,288 @@
+"""
+======
+cli.py
+======
+
+This file contains the command line interface of the package, installed as the proteinproductionsim console script.
+
+A run is described by a spec file, in JSON or in TOML:
+
+    rnap_loading_rate = 0.5     # the loading rate, unless it is swept
+    sample_amount = 16          # the number of samples of each configuration (default is 1)
+    seed = 1                    # the root seed, see SweepController (default is a fresh one, stored in the output)
+    workers = 8                 # the number of worker processes (default is all the cores)
+    output = "result.npz"       # the output file (default is the spec file with the .npz suffix)
+    cache_directory = "..."     # the ResultCache of the samples (default is ~/.cache/proteinproductionsim)
+    storage_path = "..."        # the directory the recorders stream to, see get_storage_directory(), needed for the
+                                # trajectory recorders
+
+    [record]                    # the RecordConfig flags, e.g. record_five_three = true
+    [setting]                   # the parameters in which the Setting differs from the default one, e.g. length
+    [kwargs]                    # the DNAStrand keyword arguments, e.g. pause_profile = "TwopauseAbs"
+    [grid]                      # optional, the values of each swept parameter, of any of the three kinds above
+
+A spec without grid is a single ensemble. Every configuration is run through the SweepController, so the samples
+already in the cache are not run again.
+
+The output is a compressed .npz file, which only needs numpy to be read, see load_result(). The series of each
+configuration are stored as "<config index>/<name>" arrays of shape (sample_amount, time steps), the integral series as
+the smallest integer type that holds them. The spec, with the seed used, and the configurations are stored as JSON.
+
+Usage:
+    proteinproductionsim run SPEC [--workers 8] [--output result.npz]
+    proteinproductionsim worker QUEUE_DIRECTORY
+    proteinproductionsim serve --socket /tmp/proteinproductionsim.sock
+"""
+import argparse
+import inspect
+import json
+import os
+import sys
+
+import numpy as np
+
+from .controller.dna_sim_controller import DNASimController, RecordConfig
+from .controller.multi_sample_controller import collect_recorder_data, get_sample_storage_path
+from .controller.sweep_controller import SweepController, expand_grid
+from .datacontainer.setting import Setting
+from .entity.dna_strand import DNAStrand
+from .helper.result_cache import ResultCache
+
+try:
+    import tomllib
+except ImportError:
+    # REASON: tomllib is only in the standard library from Python 3.11, the JSON specs work without it.
+    tomllib = None
+
+SPEC_KEYS = ("rnap_loading_rate", "sample_amount", "seed", "workers", "chunk_size", "output", "cache_directory",
+             "storage_path", "record", "setting", "kwargs", "grid")
+# REASON: show_progress_bar and storage_path are set for each sample by run_spec_sample.
+RECORD_FLAGS = tuple(name for name in inspect.signature(RecordConfig).parameters
+                     if name not in ("controller", "show_progress_bar", "storage_path"))
+# REASON: the environment, the random generator and the setting are given by the controller, and the supercoiling
+#         values are stored if they are recorded.
+STRAND_KWARGS = tuple(name for name in inspect.signature(DNAStrand).parameters
+                      if name not in ("environment", "rnap_loading_rate", "rng", "setting",
+                                      "if_storing_supercoiling_value"))
+CONTROLLER_KWARGS = ("if_skipping_idle_time",)
+TRAJECTORY_FLAGS = ("record_rnap_position", "record_supercoiling")
+
+
+def load_spec(path: str) -> dict:
+    """
+    This method reads a spec file, as TOML if its suffix is .toml and as JSON otherwise.
+    """
+    if path.endswith(".toml"):
+        if tomllib is None:
+            raise ValueError(f"reading {path} needs Python 3.11 or later, use a JSON spec instead.")
+        with open(path, "rb") as file:
+            return tomllib.load(file)
+    with open(path) as file:
+        return json.load(file)
+
+
+def split_config(config: dict) -> tuple[dict, dict, dict, dict]:
+    """
+    This method sorts the parameters of a configuration by what they are passed to.
+
+    Parameters
+    ----------
+    config : dict
+        the parameters of one configuration, including the rnap_loading_rate
+
+    Returns
+    -------
+    tuple[dict, dict, dict, dict]
+        the RecordConfig flags, the Setting changes, the DNASimController keyword arguments and the DNAStrand keyword
+        arguments, the last one with the rnap_loading_rate
+    """
+    record, setting, controller, strand = {}, {}, {}, {}
+    for name, value in config.items():
+        if name in RECORD_FLAGS:
+            record[name] = value
+        elif name in Setting._parameters:
+            setting[name] = value
+        elif name in CONTROLLER_KWARGS:
+            controller[name] = value
+        elif name in STRAND_KWARGS or name == "rnap_loading_rate":
+            strand[name] = value
+        else:
+            raise ValueError(f"unknown parameter {name}, expected a RecordConfig flag, a Setting parameter or a "
+                             f"DNAStrand keyword argument.")
+    return record, setting, controller, strand
+
+
+def run_spec_sample(seed, **config) -> dict[str, np.ndarray]:
+    """
+    This method runs one sample of a configuration of a spec. This is the run_function of the command line runs.
+
+    Parameters
+    ----------
+    seed : SeedSequence
+        the seed of the sample
+    config
+        the parameters of the configuration, see split_config(), and the storage_path of the spec
+
+    Returns
+    -------
+    dict[str, numpy array]
+        the recorder outputs, see collect_recorder_data()
+    """
+    storage_path = get_storage_directory(config)
+    record, setting, controller_kwargs, strand_kwargs = split_config(
+        {name: value for name, value in config.items() if name != "storage_path"})
+    if storage_path is not None:
+        storage_path = get_sample_storage_path(storage_path, seed)
+    record_config = RecordConfig(show_progress_bar=False, storage_path=storage_path, **record)
+    controller = DNASimController(strand_kwargs.pop("rnap_loading_rate"), record_config, seed=seed,
+                                  setting=Setting(**setting), **controller_kwargs, **strand_kwargs)
+    controller.start()
+    return collect_recorder_data(controller)
+
+
+def build_controller(spec: dict, workers: int = None, show_progress_bar: bool = True) -> SweepController:
+    """
+    This method checks a spec and returns the SweepController which runs it.
+
+    Parameters
+    ----------
+    spec : dict
+        the spec, see the description of this file
+    workers : int, optional
+        the number of worker processes, overriding the one of the spec
+    show_progress_bar : bool, optional
+        if the progress bar is printed (default is True)
+
+    Returns
+    -------
+    SweepController
+    """
+    unknown = [name for name in spec if name not in SPEC_KEYS]
+    if unknown:
+        raise ValueError(f"unknown spec keys {unknown}, expected some of {list(SPEC_KEYS)}.")
+    fixed = {}
+    for section in ("record", "setting", "kwargs"):
+        fixed.update(spec.get(section, {}))
+    if "rnap_loading_rate" in spec:
+        fixed["rnap_loading_rate"] = spec["rnap_loading_rate"]
+    grid = spec.get("grid", {})
+
+    # STEP: check every configuration before any sample is run
+    for config in expand_grid(grid, **fixed):
+        if "rnap_loading_rate" not in config:
+            raise ValueError("the spec has no rnap_loading_rate, neither fixed nor in the grid.")
+        record, _, _, _ = split_config(config)
+        if "storage_path" not in spec and any(record.get(flag, False) for flag in TRAJECTORY_FLAGS):
+            raise ValueError(f"recording {[flag for flag in TRAJECTORY_FLAGS if record.get(flag, False)]} needs a "
+                             f"storage_path.")
+    if "storage_path" in spec:
+        fixed["storage_path"] = spec["storage_path"]
+
+    return SweepController(grid, sample_amount=spec.get("sample_amount", 1), seed=spec.get("seed"),
+                           cache_directory=spec.get("cache_directory"),
+                           n_workers=workers if workers is not None else spec.get("workers"),
+                           chunk_size=spec.get("chunk_size", 1), run_function=run_spec_sample,
+                           show_progress_bar=show_progress_bar, **fixed)
+
+
+def get_storage_directory(config: dict) -> str:
+    """
+    This method returns the directory the samples of a configuration stream their recorders to, None if the spec has
+    no storage_path. The directory is named by the ResultCache key of the configuration.
+    """
+    if config.get("storage_path") is None:
+        return None
+    return os.path.join(config["storage_path"], ResultCache.get_key(**config)[:16])
+
+
+def _compact(value: np.ndarray) -> np.ndarray:
+    # REASON: the counts are recorded as floats or as 64-bit integers, they are stored as the smallest integer type
+    #         which holds them.
+    if value.dtype.kind == "f" and not (value.size and np.all(np.isfinite(value)) and np.all(value == np.round(value))):
+        return value
+    if value.dtype.kind not in "fiu" or not value.size:
+        return value
+    return value.astype(np.promote_types(np.min_scalar_type(int(value.min())), np.min_scalar_type(int(value.max()))))
+
+
+def write_result(path: str, spec: dict, configs: list[dict], data: list[dict[str, np.ndarray]]):
+    """
+    This method writes the ensembles of a run to a compressed .npz file.
+    """
+    arrays = {"spec": np.array(json.dumps(spec, sort_keys=True)), "configs": np.array(json.dumps(configs))}
+    for config_index, ensemble in enumerate(data):
+        for name, value in ensemble.items():
+            arrays[f"{config_index}/{name}"] = _compact(np.asarray(value))
+    # REASON: the file is written aside and then renamed, so an output file is always complete.
+    temporary_path = path + ".tmp"
+    with open(temporary_path, "wb") as file:
+        np.savez_compressed(file, **arrays)
+    os.replace(temporary_path, path)
+
+
+def load_result(path: str) -> tuple[dict, list[dict], list[dict[str, np.ndarray]]]:
+    """
+    This method reads an output file written by write_result().
+
+    Returns
+    -------
+    tuple[dict, list[dict], list[dict[str, numpy array]]]
+        the spec, the configurations and the ensemble arrays of each configuration
+    """
+    with np.load(path) as file:
+        spec = json.loads(str(file["spec"]))
+        configs = json.loads(str(file["configs"]))
+        data = [{} for _ in configs]
+        for key in file.files:
+            if "/" in key:
+                config_index, name = key.split("/", 1)
+                data[int(config_index)][name] = file[key]
+    return spec, configs, data
+
+
+def run_spec(spec: dict, output: str, workers: int = None, show_progress_bar: bool = True) -> SweepController:
+    """
+    This method runs a spec and writes its output file.
+    """
+    controller = build_controller(spec, workers, show_progress_bar)
+    controller.start()
+    # REASON: the seed is recorded, so a run with a fresh seed can be reproduced from its output.
+    spec = {**spec, "seed": controller.seed}
+    write_result(output, spec, controller.configs, controller.data)
+    return controller
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="proteinproductionsim", description="Run proteinproductionsim simulations.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run a JSON or TOML spec")
+    run_parser.add_argument("spec", help="the spec file")
+    run_parser.add_argument("--workers", type=int, default=None, help="the number of worker processes")
+    run_parser.add_argument("--output", default=None, help="the output .npz file")
+    run_parser.add_argument("--quiet", action="store_true", help="do not print the progress bar")
+    worker_parser = commands.add_parser("worker", help="run the jobs of a job queue, see job_queue_controller")
+    worker_parser.add_argument("arguments", nargs=argparse.REMAINDER)
+    serve_parser = commands.add_parser("serve", help="run the simulation service, see service")
+    serve_parser.add_argument("arguments", nargs=argparse.REMAINDER)
+    args = parser.parse_args(argv)
+
+    match args.command:
+        case "run":
+            spec = load_spec(args.spec)
+            output = args.output if args.output is not None else spec.get("output")
+            if output is None:
+                output = os.path.splitext(args.spec)[0] + ".npz"
+            controller = run_spec(spec, output, args.workers, not args.quiet)
+            print(f"{len(controller.configs)} configurations, {controller.computed} samples computed, written to "
+                  f"{output}")
+            return 0
+        case "worker":
+            from .controller.job_queue_controller import main as worker_main
+            return worker_main(args.arguments)
+        case "serve":
+            from .service import main as serve_main
+            return serve_main(args.arguments)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
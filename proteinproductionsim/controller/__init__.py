@@ -1 +1,2 @@
 
+from proteinproductionsim.controller.multi_gene_controller import MultiGeneController
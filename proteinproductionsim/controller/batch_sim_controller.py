@@ -0,0 +1,137 @@
+"""
+=======================
+batch_sim_controller.py
+=======================
+
+This file defines the controller which simulates many independent replicates of the same configuration in lockstep.
+Every time step is applied once across the whole batch, so the interpreter overhead is shared by all the replicates.
+"""
+import numpy as np
+
+from proteinproductionsim.interface import Controller
+from ..environment.batch_sim_environment import BatchSimEnvironment
+from ..controller.dna_sim_controller import RecordConfig
+from ..helper.general import print_progress_bar
+from ..helper.random_generator import spawn_seed_sequences
+from ..datacontainer.setting import Setting
+
+# the parts of a RecordConfig the batch cannot record
+_UNSUPPORTED_RECORDS = ("record_rnap_position", "record_supercoiling", "storage_path")
+
+
+class BatchSimController(Controller):
+    """
+    This is the controller for the lockstep batch simulation. It can be used in place of running batch_size
+    DNASimController one by one.
+
+    If progress_function is given, it is called with this controller every progress_interval steps and at the end of
+    the run, as the DNASimController does. The progress bar of the record_config is printed at most 100 times.
+
+    Parameters
+    ----------
+    rnap_loading_rate : float
+        the loading rate of RNAPs
+    batch_size : int
+        the number of replicates
+    record_config : RecordConfig, optional
+        the recording setting, only the protein amount and the five and three series are supported, a ValueError is
+        raised if the RNAP position, the supercoiling or a storage_path is asked for.
+    seed : int or SeedSequence, optional
+        the root seed, the i-th replicate draws from the i-th child spawned from it, as the i-th sample of the
+        MultiSampleController does. None means a fresh seed from the operating system.
+    setting : Setting, optional
+        the setting of the run, shared by all the replicates, a default Setting is used if not given
+    progress_function : callable, optional
+        called with this controller during the run
+    progress_interval : int, optional
+        the number of steps between two calls of progress_function, 0 calls it only at the end (default is 0)
+    kwargs
+        the keyword arguments passed to the DNAStrandBatch
+
+    Attributes
+    ----------
+    data : dict[str, numpy array]
+        the recorded series of shape (batch_size, total time steps), named as the MultiSampleController does
+    """
+    def __init__(self, rnap_loading_rate: float, batch_size: int, record_config: RecordConfig = None, seed=None,
+                 setting: Setting = None, progress_function=None, progress_interval: int = 0, **kwargs):
+        super().__init__()
+        # Setup
+        self.time_index = 0
+        self.batch_size = batch_size
+        self.rng = [np.random.default_rng(seed_sequence) for seed_sequence in spawn_seed_sequences(seed, batch_size)]
+        self.setting = setting if setting is not None else Setting()
+        self.env = BatchSimEnvironment(controller=self, rnap_loading_rate=rnap_loading_rate, batch_size=batch_size,
+                                       rng=self.rng, setting=self.setting, **kwargs)
+        self.total_time = self.setting.total_time_index
+        self.dt = self.setting.dt
+        self.stage_per_collection = self.setting.stage_per_collection
+
+        # Data Recording Setup
+        if record_config is None:
+            record_config = RecordConfig(record_five_three=True, show_progress_bar=False)
+        # REASON: the batch only records the protein amount and the five and three series, so a RecordConfig asking
+        #         for more would silently give an incomplete result.
+        unsupported = [name for name in _UNSUPPORTED_RECORDS if getattr(record_config, name)]
+        if unsupported:
+            raise ValueError(f"BatchSimController does not support {', '.join(unsupported)} in the record_config.")
+        self.record_config = record_config
+        self.progress_function = progress_function
+        self.progress_interval = progress_interval
+        self.data = {}
+        pass
+
+    def start(self):
+        self.init()
+        # REASON: printing the bar costs as much as a step of a small batch, so it is printed every percent only.
+        bar_interval = max(self.total_time // 100, 1)
+        next_progress = self.time_index + self.progress_interval
+        for i in range(self.total_time):
+            self.env.step(time_index=self.time_index)
+            self._log()
+            self.time_index += 1
+            if self.record_config.show_progress_bar and (self.time_index % bar_interval == 0 or
+                                                         self.time_index == self.total_time):
+                print_progress_bar(self.time_index, self.total_time)
+            if self.progress_function is not None and 0 < self.progress_interval and next_progress <= self.time_index:
+                self.progress_function(self)
+                next_progress = self.time_index + self.progress_interval
+        if self.progress_function is not None:
+            self.progress_function(self)
+        pass
+
+    def init(self):
+        shape = (self.batch_size, self.total_time)
+        if self.record_config.record_protein_amount:
+            self.data["protein amount"] = np.zeros(shape)
+        if self.record_config.record_five_three:
+            self.data["five"] = np.zeros(shape, dtype=int)
+            self.data["three"] = np.zeros(shape, dtype=int)
+        self.env.init()
+        pass
+
+    def call_back(self, option, data):
+        pass
+
+    def _log(self):
+        if "protein amount" in self.data:
+            self.data["protein amount"][:, self.time_index] = self.env.total_prot
+        if "five" in self.data:
+            five, three = self.env.dna.get_five_three()
+            self.data["five"][:, self.time_index] = five
+            self.data["three"][:, self.time_index] = three
+        pass
+
+    def get_data(self, name):
+        if name in self.data:
+            return self.data[name]
+        return None
+
+    def get_protein_amount(self):
+        return self.env.total_prot
+
+    def get_five_three(self):
+        if self.record_config.record_five_three:
+            return [self.data["five"], self.data["three"]]
+        else:
+            return None
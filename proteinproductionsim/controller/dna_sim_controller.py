@@ -5,23 +5,32 @@ dna_sim_controller.py
 
 This file defines the main controller for the simulation.
 """
+import os
+import pickle
+
+import numpy as np
 
 from proteinproductionsim.interface import Controller, DataContainer
 from ..environment.dna_sim_environment import DNASimEnvironment
-from ..variables import stage_per_collection, dt, total_time, scaling, t_on
 from ..datacontainer.data_recorder import RNAPPositionRecorder, SingleValueRecorder, FiveThreeRecorder, \
     SupercoilingRecorder
+from ..helper.phase_timer import PhaseTimer
+from ..datacontainer.setting import Setting
 
 
 class RecordConfig:
     """
     This class is used to pass and store data recording setting to the simulator.
+
+    If storage_path is given, every recorder streams its data to a sub-directory of it in chunks of chunk_size rows,
+    so the memory used by the recorders does not grow with the length of the run.
     """
     def __init__(self, controller=None, record_rnap_position: bool = False, record_rnap_amount: bool = False,
                  record_rnap_state: bool = True, record_processing_time: bool = True,
                  record_protein_amount: bool = True, record_protein_production: bool = True,
                  record_finish_time: bool = True, record_five_three: bool = False, record_supercoiling: bool = False,
-                 log_data: bool = True, show_progress_bar: bool = True):
+                 log_data: bool = True, show_progress_bar: bool = True, storage_path: str = None,
+                 chunk_size: int = 4096):
         self.parent = controller
         self.record_rnap_position = record_rnap_position
         self.record_rnap_amount = record_rnap_amount
@@ -34,6 +43,8 @@ class RecordConfig:
         self.log_data = log_data
         self.show_progress_bar = show_progress_bar
         self.record_supercoiling = record_supercoiling
+        self.storage_path = storage_path
+        self.chunk_size = chunk_size
 
 
 class RunConfig:
@@ -52,17 +63,48 @@ class RunConfig:
 class DNASimController(Controller):
     """
     This is the central controller for the DNA simulation.
+
+    The controller owns the random generator of the simulation, which is created from seed. seed can be an int, a
+    SeedSequence, a Generator or None for a fresh seed from the operating system.
+
+    If checkpoint_path is given, the state of the simulation, i.e. the environment, the recorders and the random
+    generator, is written to it every checkpoint_interval steps. start(resume=True) continues from that checkpoint and
+    gives the same results as an uninterrupted run.
+
+    If if_timing_phases is True, the phases of every step are timed, see get_timing_summary().
+
+    If progress_function is given, it is called with this controller every progress_interval steps and at the end of
+    the run, e.g. to report the progress and the data recorded so far while start() is running.
+
+    The physical and numerical parameters of the run are given by setting, a default Setting is used if it is not
+    given. The same Setting is read by the strand, its RNAPs and ribosomes, and the recorders.
     """
-    def __init__(self, rnap_loading_rate: float, record_config: RecordConfig = RecordConfig(), **kwargs):
+    def __init__(self, rnap_loading_rate: float, record_config: RecordConfig = RecordConfig(),
+                 if_skipping_idle_time: bool = False, seed=None, checkpoint_path: str = None,
+                 checkpoint_interval: int = 0, if_timing_phases: bool = False, setting: Setting = None,
+                 progress_function=None, progress_interval: int = 0, **kwargs):
         super().__init__()
         # Setup
         self.time_index = 0
+        self.rng = np.random.default_rng(seed)
+        self.setting = setting if setting is not None else Setting()
         self.env = DNASimEnvironment(controller=self, rnap_loading_rate=rnap_loading_rate,
-                                     if_storing_supercoiling_value=record_config.record_supercoiling,
-                                     **kwargs)
-        self.total_time = scaling(total_time)
-        self.dt = dt
-        self.stage_per_collection = stage_per_collection
+                                     if_storing_supercoiling_value=record_config.record_supercoiling, rng=self.rng,
+                                     setting=self.setting, **kwargs)
+        self.total_time = self.setting.total_time_index
+        self.dt = self.setting.dt
+        self.stage_per_collection = self.setting.stage_per_collection
+        # REASON: if True, the stretches where no RNAP is on the DNA are jumped over up to the next scheduled event.
+        self.if_skipping_idle_time = if_skipping_idle_time
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        self.progress_function = progress_function
+        self.progress_interval = progress_interval
+        # REASON: the timer instruments the instances of the environment, so nothing is timed if it is disabled.
+        self.timer = None
+        if if_timing_phases:
+            self.timer = PhaseTimer()
+            self.env.dna.enable_timer(self.timer)
 
         # Data Recording Setup
         self.record_config = record_config
@@ -71,27 +113,63 @@ class DNASimController(Controller):
         self.data_recorder = {}
         pass
 
-    def start(self):
-        self.init()
-        for i in range(self.total_time):
+    def start(self, resume: bool = False):
+        if resume and self.checkpoint_path is not None and os.path.exists(self.checkpoint_path):
+            self.load_checkpoint(self.checkpoint_path)
+            # REASON: the run goes on from the checkpoint, so the data streamed after it is dropped only now.
+            for key in self.data_recorder:
+                self.data_recorder[key].restore()
+        else:
+            self.init()
+        next_checkpoint = self.time_index + self.checkpoint_interval
+        next_progress = self.time_index + self.progress_interval
+        while self.time_index < self.total_time:
             self.env.step(time_index=self.time_index)
             self._log()
             self.time_index += 1
+            if self.if_skipping_idle_time:
+                self._skip_idle_time()
+            if self.checkpoint_path is not None and 0 < self.checkpoint_interval and next_checkpoint <= self.time_index:
+                self.save_checkpoint(self.checkpoint_path)
+                next_checkpoint = self.time_index + self.checkpoint_interval
+            if self.progress_function is not None and 0 < self.progress_interval and next_progress <= self.time_index:
+                self.progress_function(self)
+                next_progress = self.time_index + self.progress_interval
 
+        for key in self.data_recorder:
+            self.data_recorder[key].close()
+        if self.progress_function is not None:
+            self.progress_function(self)
         pass
 
+    def _skip_idle_time(self):
+        # REASON: the step just done was idle if the next event is still ahead. all the idle steps until the next
+        #         event leave the environment unchanged, so we only back-fill the recorders for them.
+        next_event = min(self.env.get_next_event_time(self.time_index - 1), self.total_time)
+        if next_event <= self.time_index:
+            return
+        for key in self.data_recorder:
+            self.data_recorder[key].back_fill(self.time_index, next_event)
+        self.time_index = next_event
+
     def init(self):
         # adding all the data recorder according to the config
+        chunk_size = self.record_config.chunk_size
         if self.record_config.record_rnap_position:
-            self.data_recorder["position"] = RNAPPositionRecorder(self, self.env.dna, self.total_time)
+            self.data_recorder["position"] = RNAPPositionRecorder(self, self.env.dna, self.total_time, chunk_size,
+                                                                  self._get_storage_path("position"))
         if self.record_config.record_protein_amount:
             self.data_recorder["protein amount"] = SingleValueRecorder(self, self.get_protein_amount, self.total_time,
                                                                        name_x="Time", name_y="Protein Amount",
-                                                                       unit_x="s", unit_y="")
+                                                                       unit_x="s", unit_y="", chunk_size=chunk_size,
+                                                                       path=self._get_storage_path("protein_amount"))
         if self.record_config.record_five_three:
-            self.data_recorder["five and three"] = FiveThreeRecorder(self, self.env.dna, self.total_time)
+            self.data_recorder["five and three"] = FiveThreeRecorder(self, self.env.dna, self.total_time, chunk_size,
+                                                                     self._get_storage_path("five_three"))
         if self.record_config.record_supercoiling:
-            self.data_recorder["supercoiling"] = SupercoilingRecorder(self, self.env.dna, self.total_time)
+            self.data_recorder["supercoiling"] = SupercoilingRecorder(self, self.env.dna, self.total_time,
+                                                                      chunk_size=chunk_size,
+                                                                      path=self._get_storage_path("supercoiling"))
 
         self.env.init()
         pass
@@ -99,6 +177,47 @@ class DNASimController(Controller):
     def call_back(self, option, data):
         pass
 
+    def save_checkpoint(self, path: str):
+        """
+        This method writes the state of the simulation to path.
+
+        The environment, the recorders and the random generator are pickled together, so the references between them
+        are kept. The references to this controller are pickled by name and are bound again by load_checkpoint().
+
+        Parameters
+        ----------
+        path : str
+            the path of the checkpoint file
+        """
+        state = {"time_index": self.time_index, "env": self.env, "data_recorder": self.data_recorder, "rng": self.rng,
+                 "timer": self.timer}
+        # REASON: the checkpoint is written aside and then renamed, so the process can die at any time without
+        #         corrupting the last checkpoint.
+        temporary_path = path + ".tmp"
+        with open(temporary_path, "wb") as file:
+            _ControllerPickler(file, self).dump(state)
+        os.replace(temporary_path, path)
+
+    def load_checkpoint(self, path: str):
+        """
+        This method restores the state of the simulation from a checkpoint written by save_checkpoint().
+
+        The files of the recorders are left untouched, the data streamed after the checkpoint is only dropped when
+        start() resumes the run.
+        """
+        with open(path, "rb") as file:
+            state = _ControllerUnpickler(file, self).load()
+        self.time_index = state["time_index"]
+        self.env = state["env"]
+        self.data_recorder = state["data_recorder"]
+        self.rng = state["rng"]
+        self.timer = state["timer"]
+
+    def _get_storage_path(self, name):
+        if self.record_config.storage_path is None:
+            return None
+        return os.path.join(self.record_config.storage_path, name)
+
     def _log(self):
         for key in self.data_recorder:
             self.data_recorder[key].log(self.time_index)
@@ -109,11 +228,48 @@ class DNASimController(Controller):
             return self.data_recorder[name]
         return None
 
+    def get_timing_summary(self):
+        """
+        This method returns the per-phase timing of the run as a text table, None if the phases are not timed.
+        """
+        if self.timer is None:
+            return None
+        return self.timer.format_summary()
+
     def get_protein_amount(self):
         return self.env.total_prot
 
+    def get_rnap_summary(self):
+        """
+        This method returns the summary statistics of the finished RNAPs, see RNAPSummary.get().
+        """
+        return self.env.dna.get_rnap_summary()
+
     def get_five_three(self):
         if self.record_config.record_five_three:
             return self.data_recorder["five and three"].get_five_six()
         else:
             return None
+
+
+class _ControllerPickler(pickle.Pickler):
+    # REASON: the controller itself is not part of the checkpoint, only referred to.
+    def __init__(self, file, controller):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.controller = controller
+
+    def persistent_id(self, obj):
+        if obj is self.controller:
+            return "controller"
+        return None
+
+
+class _ControllerUnpickler(pickle.Unpickler):
+    def __init__(self, file, controller):
+        super().__init__(file)
+        self.controller = controller
+
+    def persistent_load(self, pid):
+        if pid == "controller":
+            return self.controller
+        raise pickle.UnpicklingError(f"unknown persistent id {pid}")
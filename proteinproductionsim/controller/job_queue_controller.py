@@ -0,0 +1,278 @@
+"""
+=======================
+job_queue_controller.py
+=======================
+
+This file defines the controller for sweeps and ensembles sharded across several nodes which share a file system.
+
+The controller writes the work as a JobQueue directory. The samples of every configuration are split into shards of
+shard_size consecutive samples, and each shard is one job. The i-th sample of every configuration is seeded with the
+i-th child SeedSequence spawned from the root seed, as in the SweepController, so the results do not depend on which
+worker runs which job, or on how many times a job is run after a crash.
+
+Workers are started on any node with
+
+    python -m proteinproductionsim.controller.job_queue_controller QUEUE_DIRECTORY
+
+or with run_worker(), and merge() combines the shards into the ensemble of each configuration. start() runs the whole
+queue on this machine with several worker processes standing in for the nodes.
+"""
+import argparse
+import importlib
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+from numpy.random import SeedSequence
+
+from ..interface import Controller
+from ..controller.multi_sample_controller import run_single_sample
+from ..controller.sweep_controller import expand_grid
+from ..datacontainer.ensemble_statistics import EnsembleStatistics
+from ..helper.general import print_progress_bar
+from ..helper.job_queue import JobQueue, get_default_worker_id
+from ..helper.random_generator import spawn_seed_sequences
+from ..helper.result_cache import get_code_version
+
+
+def get_function_name(function) -> str:
+    return f"{function.__module__}:{function.__qualname__}"
+
+
+def load_function(name: str):
+    """
+    This method imports the function of the given "module:qualified name".
+    """
+    module_name, qualified_name = name.split(":")
+    function = importlib.import_module(module_name)
+    for attribute in qualified_name.split("."):
+        function = getattr(function, attribute)
+    return function
+
+
+def _refresh_lease(queue: JobQueue, job_id: str, worker_id: str, stop: threading.Event):
+    # REASON: a sample may run for longer than the lease timeout, so the claim is refreshed on a clock and not only
+    #         between the samples, else the job would be requeued and run twice.
+    while not stop.wait(queue.lease_timeout / 4):
+        queue.heartbeat(job_id, worker_id)
+
+
+def run_worker(directory: str, worker_id: str = None, max_jobs: int = None, lease_timeout: float = 600) -> int:
+    """
+    This method runs the jobs of a queue until none is left to claim.
+
+    Parameters
+    ----------
+    directory : str
+        the queue directory
+    worker_id : str, optional
+        the id of the worker, a worker restarted with the same id first finishes the jobs it claimed before
+        (default is the host name and the process id)
+    max_jobs : int, optional
+        the maximum number of jobs to run, None means no limit
+    lease_timeout : float, optional
+        the seconds after which the claim of another worker is considered abandoned (default is 600)
+
+    Returns
+    -------
+    int
+        the number of jobs finished by this worker
+    """
+    queue = JobQueue(directory, lease_timeout)
+    spec = queue.get_spec()
+    if spec["code_version"] != get_code_version():
+        raise ValueError(f"the queue {directory} was created with another version of the code.")
+    run_function = load_function(spec["run_function"])
+    seeds = spawn_seed_sequences(spec["seed"], spec["sample_amount"])
+    worker_id = worker_id if worker_id is not None else get_default_worker_id()
+    finished = 0
+    while max_jobs is None or finished < max_jobs:
+        claimed = queue.claim(worker_id)
+        if claimed is None:
+            break
+        job_id, job = claimed
+        # REASON: the worker may have crashed after writing the shard but before marking the job as done.
+        if queue.has_shard(job_id):
+            queue.complete(job_id, worker_id)
+            finished += 1
+            continue
+        config = spec["configs"][job["config_index"]]
+        samples = []
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=_refresh_lease, args=(queue, job_id, worker_id, stop), daemon=True)
+        heartbeat.start()
+        try:
+            for sample_index in job["sample_index"]:
+                samples.append(run_function(seeds[sample_index], **config))
+        finally:
+            stop.set()
+            heartbeat.join()
+        result = {name: np.stack([np.asarray(sample[name]) for sample in samples]) for name in samples[0]}
+        result["sample_index"] = np.array(job["sample_index"], dtype=int)
+        queue.complete(job_id, worker_id, result)
+        finished += 1
+    return finished
+
+
+class JobQueueController(Controller):
+    """
+    This is the controller for the sweeps and ensembles run through a job queue.
+
+    Parameters
+    ----------
+    directory : str
+        the queue directory, on a file system shared by all the nodes
+    grid : dict[str, list], optional
+        the values of each swept keyword argument, see expand_grid(). an empty grid is a single ensemble.
+    sample_amount : int, optional
+        the number of samples of each configuration (default is 1)
+    seed : int, optional
+        the root seed, None means the one recorded in the existing queue, or a fresh one for a new queue
+    shard_size : int, optional
+        the number of samples of one job (default is 1)
+    n_workers : int, optional
+        the number of local worker processes of start(), None means all the cores
+    run_function : callable, optional
+        the function which runs one sample, called as run_function(seed, **config). It must be importable by its
+        module and name on every node. (default is run_single_sample)
+    lease_timeout : float, optional
+        the seconds after which a claim which is not refreshed is considered abandoned (default is 600)
+    show_progress_bar : bool, optional
+        if the progress bar is printed by start() (default is True)
+    fixed_kwargs
+        the JSON-serializable keyword arguments shared by all the configurations
+
+    Attributes
+    ----------
+    configs : list[dict]
+        the configurations of the queue
+    data : list[dict[str, numpy array]]
+        the ensemble arrays of each configuration, of shape (sample_amount, ...), filled by merge()
+    """
+    def __init__(self, directory: str, grid: dict[str, list] = None, sample_amount: int = 1, seed: int = None,
+                 shard_size: int = 1, n_workers: int = None, run_function=run_single_sample,
+                 lease_timeout: float = 600, show_progress_bar: bool = True, **fixed_kwargs):
+        super().__init__()
+        self.directory = directory
+        self.grid = grid if grid is not None else {}
+        self.sample_amount = sample_amount
+        self.seed = seed
+        self.shard_size = shard_size
+        self.n_workers = n_workers
+        self.run_function = run_function
+        self.lease_timeout = lease_timeout
+        self.show_progress_bar = show_progress_bar
+        self.fixed_kwargs = fixed_kwargs
+        self.queue = JobQueue(directory, lease_timeout)
+        self.configs = []
+        self.data = []
+
+    def init(self):
+        """
+        This method writes the queue, if it does not exist yet.
+        """
+        self.configs = expand_grid(self.grid, **self.fixed_kwargs)
+        if self.seed is None:
+            self.seed = self.queue.get_spec()["seed"] if self.queue.if_created() else SeedSequence().entropy
+        jobs = {}
+        for config_index in range(len(self.configs)):
+            for shard_index, start in enumerate(range(0, self.sample_amount, self.shard_size)):
+                stop = min(start + self.shard_size, self.sample_amount)
+                jobs[f"{config_index:06d}-{shard_index:06d}"] = {"config_index": config_index,
+                                                                 "sample_index": list(range(start, stop))}
+        spec = {"configs": self.configs, "sample_amount": self.sample_amount, "seed": self.seed,
+                "shard_size": self.shard_size, "run_function": get_function_name(self.run_function),
+                "code_version": get_code_version()}
+        self.queue.create(spec, jobs)
+        self.data = []
+
+    def start(self):
+        """
+        This method runs the queue with n_workers local processes and merges the shards.
+        """
+        self.init()
+        n_workers = self.n_workers if self.n_workers is not None else os.cpu_count()
+        workers = [multiprocessing.Process(target=run_worker, args=(self.directory, None, None, self.lease_timeout))
+                   for _ in range(n_workers)]
+        for worker in workers:
+            worker.start()
+        total = len(self.configs) * -(-self.sample_amount // self.shard_size)
+        while any(worker.is_alive() for worker in workers):
+            if self.show_progress_bar:
+                print_progress_bar(self.queue.get_status()["done"], total)
+            time.sleep(0.5)
+        for worker in workers:
+            worker.join()
+        return self.merge()
+
+    def call_back(self, option, data):
+        pass
+
+    def merge(self, if_aggregating: bool = False, bin_size: int = 1, relative_accuracy: float = 0.02) -> list:
+        """
+        This method combines the shards into the ensemble of each configuration.
+
+        Parameters
+        ----------
+        if_aggregating : bool, optional
+            if the samples are folded into an EnsembleStatistics for each configuration instead of being stacked
+            (default is False)
+        bin_size, relative_accuracy : optional
+            the parameters of the EnsembleStatistics
+
+        Returns
+        -------
+        list[dict[str, numpy array]] or list[EnsembleStatistics]
+            the ensemble of each configuration, in the order of configs
+        """
+        if not self.queue.if_finished():
+            raise RuntimeError(f"the queue {self.directory} is not finished: {self.queue.get_status()}.")
+        spec = self.queue.get_spec()
+        self.configs = spec["configs"]
+        if if_aggregating:
+            ensembles = [EnsembleStatistics(self, bin_size, relative_accuracy) for _ in self.configs]
+        else:
+            ensembles = [{} for _ in self.configs]
+        # REASON: the shards are merged in order of their job ids, so the result does not depend on the workers.
+        for job_id in self.queue.get_done():
+            config_index = int(job_id.split("-")[0])
+            shard = self.queue.load_shard(job_id)
+            sample_index = shard.pop("sample_index")
+            ensemble = ensembles[config_index]
+            if if_aggregating:
+                for i in range(sample_index.size):
+                    ensemble.log({name: value[i] for name, value in shard.items()})
+                continue
+            for name, value in shard.items():
+                if name not in ensemble:
+                    ensemble[name] = np.zeros((spec["sample_amount"],) + value.shape[1:], dtype=value.dtype)
+                ensemble[name][sample_index] = value
+        if not if_aggregating:
+            self.data = ensembles
+        return ensembles
+
+    def get_data(self, **config):
+        """
+        This method returns the merged ensemble arrays of the configurations matching the given keyword arguments.
+        """
+        return [(c, d) for c, d in zip(self.configs, self.data) if all(c.get(k) == v for k, v in config.items())]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the jobs of a proteinproductionsim job queue.")
+    parser.add_argument("directory", help="the queue directory")
+    parser.add_argument("--worker-id", default=None, help="the id of this worker, to resume its claimed jobs")
+    parser.add_argument("--max-jobs", type=int, default=None, help="the maximum number of jobs to run")
+    parser.add_argument("--lease-timeout", type=float, default=600,
+                        help="the seconds after which a claim which is not refreshed is considered abandoned")
+    args = parser.parse_args(argv)
+    finished = run_worker(args.directory, args.worker_id, args.max_jobs, args.lease_timeout)
+    print(f"{finished} jobs finished")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""
+========================
+multi_gene_controller.py
+========================
+
+This file defines the controller which simulates a panel of genes, e.g. the genes of an operon, in one simulation loop.
+Each gene is one row of a DNAStrandBatch with its own loading rate, pause profile and Setting, so every time step is
+applied once across all the genes instead of running one DNASimController for each of them.
+"""
+import numpy as np
+
+from ..controller.batch_sim_controller import BatchSimController
+from ..controller.dna_sim_controller import RecordConfig
+from ..datacontainer.setting import Setting
+
+
+class MultiGeneController(BatchSimController):
+    """
+    This is the controller for the multi-gene simulation.
+
+    Parameters
+    ----------
+    genes : list[dict]
+        each gene is a dict of its "rnap_loading_rate", and optionally of its "name", its "pause_profile" and the
+        parameters of the Setting in which it differs from setting, e.g. {"name": "lacZ", "rnap_loading_rate": 0.2,
+        "length": 3072, "k_ribo_loading": 0.1}. The time and the physical constants of the RNAPs and ribosomes, see
+        DNAStrandBatch._shared_parameters, cannot be changed for a gene.
+    record_config : RecordConfig, optional
+        the recording setting, only the protein amount and the five and three series are supported, see
+        BatchSimController.
+    seed : int or SeedSequence, optional
+        the root seed, the i-th gene draws from the i-th child spawned from it, so it follows the same sample path as a
+        DNASimController seeded with that child. None means a fresh seed from the operating system.
+    setting : Setting, optional
+        the setting shared by the genes, a default Setting is used if not given
+    kwargs
+        the keyword arguments passed to the DNAStrandBatch, pause_profile is the default of the genes
+
+    Attributes
+    ----------
+    gene_name : list[str]
+        the name of each gene, "gene i" if not given
+    data : dict[str, numpy array]
+        the recorded series of shape (number of genes, total time steps)
+    """
+    def __init__(self, genes: list[dict], record_config: RecordConfig = None, seed=None, setting: Setting = None,
+                 **kwargs):
+        setting = setting if setting is not None else Setting()
+        default_pause_profile = kwargs.pop("pause_profile", "flat")
+        genes = [dict(gene) for gene in genes]
+        self.gene_name = [gene.pop("name", f"gene {i}") for i, gene in enumerate(genes)]
+        rnap_loading_rate = np.array([gene.pop("rnap_loading_rate") for gene in genes], dtype=float)
+        pause_profile = [gene.pop("pause_profile", default_pause_profile) for gene in genes]
+        gene_setting = [setting.replace(**gene) if gene else setting for gene in genes]
+        super().__init__(rnap_loading_rate, len(genes), record_config, seed, setting, pause_profile=pause_profile,
+                         gene_setting=gene_setting, **kwargs)
+
+    def _gene_index(self, gene) -> int:
+        return self.gene_name.index(gene) if isinstance(gene, str) else gene
+
+    def get_gene_data(self, name, gene):
+        """
+        This method returns the series name of the gene, given by its name or index.
+        """
+        if name in self.data:
+            return self.data[name][self._gene_index(gene)]
+        return None
+
+    def get_total_data(self, name):
+        """
+        This method returns the series name summed over all the genes, e.g. the total protein amount of the panel.
+        """
+        if name in self.data:
+            return self.data[name].sum(axis=0)
+        return None
+
+    def get_total_protein_amount(self):
+        return int(self.env.total_prot.sum())
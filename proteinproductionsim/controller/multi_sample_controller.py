@@ -1,21 +1,332 @@
+"""
+==========================
+multi_sample_controller.py
+==========================
+
+This file defines the controller for large sample simulation. The samples are independent DNASimController runs, which
+are fanned out across a process pool. The recorder outputs of each run are collected into ensemble arrays, of which the
+first axis is the sample index.
+
+With if_aggregating, the recorder outputs are not stacked, but folded into an EnsembleStatistics. Each worker aggregates
+the chunk of samples it is sent and returns the statistics of the chunk, which are merged in the chunk order. The memory
+of the ensemble is then proportional to the number of time bins only.
+
+With if_sharing_memory, the ensemble arrays are allocated in shared memory before the pool starts, and each worker
+writes its samples into their rows directly, so the results are not pickled and copied back to this process. This
+needs the names, shapes and types of the results beforehand, which are given by the layout_function.
+"""
+import copy
+import multiprocessing
+import os
+from functools import partial
+
+import numpy as np
+from numpy.random import SeedSequence
+
 from ..interface import Controller
-from ..controller.dna_sim_controller import DNASimController
+from ..controller.dna_sim_controller import DNASimController, RecordConfig
+from ..datacontainer.ensemble_statistics import EnsembleStatistics
+from ..datacontainer.setting import Setting
+from ..helper.general import print_progress_bar
+from ..helper.random_generator import spawn_seed_sequences
+from ..helper.shared_array import SharedArray, get_attached_array
+
+
+def collect_recorder_data(controller: DNASimController) -> dict[str, np.ndarray]:
+    """
+    This method collects the recorder outputs of a finished DNASimController that can be stacked into ensemble arrays.
+
+    Parameters
+    ----------
+    controller : DNASimController
+        the finished controller
+
+    Returns
+    -------
+    dict[str, numpy array]
+        the protein amount series, and the five and three series if they are recorded.
+    """
+    data = {}
+    protein_amount = controller.get_data("protein amount")
+    if protein_amount is not None:
+        data["protein amount"] = np.asarray(protein_amount.get())
+    five_three = controller.get_five_three()
+    if five_three is not None:
+        data["five"], data["three"] = five_three
+    return data
+
+
+def get_sample_storage_path(storage_path: str, seed) -> str:
+    """
+    This method returns the directory the recorders of the sample of the given seed stream to, inside storage_path, so
+    the samples of an ensemble never write to the same files.
+
+    Parameters
+    ----------
+    storage_path : str
+        the storage_path of the RecordConfig of the ensemble
+    seed : int or SeedSequence
+        the seed of the sample, a SeedSequence spawned from the root seed is named by its sample index
+
+    Returns
+    -------
+    str
+    """
+    match seed:
+        case SeedSequence() if seed.spawn_key:
+            # REASON: the seeds are spawned from the root seed, the last entry of the spawn key is the sample index.
+            return os.path.join(storage_path, f"sample_{seed.spawn_key[-1]:06d}")
+        case SeedSequence():
+            return os.path.join(storage_path, f"seed_{seed.entropy}")
+        case int() | np.integer():
+            return os.path.join(storage_path, f"seed_{seed}")
+        case _:
+            raise ValueError(f"a sample with a storage_path needs an int or a SeedSequence seed to name its directory, "
+                             f"not {seed!r}.")
+
+
+def run_single_sample(seed, rnap_loading_rate: float, record_config: RecordConfig = None,
+                      **kwargs) -> dict[str, np.ndarray]:
+    """
+    This method runs one DNASimController with the given seed and returns its recorder outputs. This is the default
+    run_function of the MultiSampleController.
+
+    Parameters
+    ----------
+    seed : int, SeedSequence or None
+        the seed of the sample, None means a fresh seed from the operating system
+    rnap_loading_rate : float
+        the loading rate of RNAPs
+    record_config : RecordConfig, optional
+        the recording setting, the protein amount and the five and three series are recorded by default. With a
+        storage_path, the sample streams to its own sub-directory of it, see get_sample_storage_path().
+    kwargs
+        the keyword arguments passed to the DNAStrand
+
+    Returns
+    -------
+    dict[str, numpy array]
+    """
+    if record_config is None:
+        record_config = RecordConfig(record_five_three=True, show_progress_bar=False)
+    elif record_config.storage_path is not None:
+        record_config = copy.copy(record_config)
+        record_config.storage_path = get_sample_storage_path(record_config.storage_path, seed)
+    controller = DNASimController(rnap_loading_rate, record_config, seed=seed, **kwargs)
+    controller.start()
+    return collect_recorder_data(controller)
+
+
+def get_sample_layout(rnap_loading_rate: float = None, record_config: RecordConfig = None, setting: Setting = None,
+                      **kwargs) -> dict[str, tuple[tuple, np.dtype]]:
+    """
+    This method returns the names, shapes and types of the outputs of run_single_sample with the same arguments,
+    without running it. This is the default layout_function of the MultiSampleController.
+
+    Returns
+    -------
+    dict[str, tuple[tuple, numpy dtype]]
+        the shape and the type of each output
+    """
+    if record_config is None:
+        record_config = RecordConfig(record_five_three=True, show_progress_bar=False)
+    total_time = (setting if setting is not None else Setting()).total_time_index
+    layout = {}
+    if record_config.record_protein_amount:
+        layout["protein amount"] = ((total_time,), np.dtype(float))
+    if record_config.record_five_three:
+        layout["five"] = layout["three"] = ((total_time,), np.dtype(int))
+    return layout
+
+
+def _run_sample_task(run_function, run_kwargs, task):
+    index, seed = task
+    return index, run_function(seed, **run_kwargs)
+
+
+def _run_shared_task(run_function, run_kwargs, specs, task):
+    index, seed = task
+    result = run_function(seed, **run_kwargs)
+    if set(result) != set(specs):
+        raise ValueError(f"the sample returned {sorted(result)}, the layout expects {sorted(specs)}.")
+    for name, spec in specs.items():
+        value = np.asarray(result[name])
+        if value.shape != spec[1][1:]:
+            raise ValueError(f"the sample returned {name} of shape {value.shape}, the layout expects {spec[1][1:]}.")
+        get_attached_array(spec)[index] = value
+    return index
+
+
+def _run_aggregate_task(run_function, run_kwargs, bin_size, relative_accuracy, chunk):
+    statistics = EnsembleStatistics(None, bin_size, relative_accuracy)
+    for seed in chunk:
+        statistics.log(run_function(seed, **run_kwargs))
+    return statistics
 
 
 class MultiSampleController(Controller):
     """
     This is the controller for large sample simulation. This will directly control other single-sample controller.
+
+    Parameters
+    ----------
+    run_function : callable, optional
+        the function which runs one sample, called as run_function(seed, **run_kwargs). It must return a dict of
+        numpy arrays of the same shapes for every sample, and it must be picklable, i.e. defined at module level.
+        (default is run_single_sample)
+    sample_amount : int, optional
+        the number of samples (default is 1)
+    n_workers : int, optional
+        the number of worker processes, None means all the cores. 1 runs the samples in this process.
+    chunk_size : int, optional
+        the number of samples sent to a worker at once (default is 1), with if_aggregating also the number of samples
+        aggregated by a worker before its statistics are returned
+    seed : int or SeedSequence, optional
+        the root seed, the i-th sample is seeded with the i-th child SeedSequence spawned from it, so the results do
+        not depend on the number of workers. None means a fresh root seed from the operating system.
+    show_progress_bar : bool, optional
+        if the progress bar is printed (default is True)
+    if_aggregating : bool, optional
+        if the samples are folded into statistics instead of being stacked into data (default is False)
+    bin_size : int, optional
+        the number of time steps in one time bin of the statistics (default is 1)
+    relative_accuracy : float, optional
+        the maximum relative error of the quantiles of the statistics (default is 0.02)
+    if_sharing_memory : bool, optional
+        if the workers write the samples into the ensemble arrays in shared memory instead of sending them back
+        (default is False)
+    layout_function : callable, optional
+        the function which returns the shape and the type of each output of the run_function, called as
+        layout_function(**run_kwargs), see get_sample_layout(). None means get_sample_layout for run_single_sample,
+        and else the first sample is run in this process to find them.
+    run_kwargs
+        the keyword arguments passed to the run_function, e.g. rnap_loading_rate and the DNAStrand keyword arguments.
+
+    Attributes
+    ----------
+    seeds : list[SeedSequence]
+        the seed of each sample
+    data : dict[str, numpy array]
+        the ensemble arrays, of shape (sample_amount, ...), empty with if_aggregating. With if_sharing_memory, they are
+        views of the shared memory, which is released with the last of them.
+    statistics : EnsembleStatistics
+        the statistics of the samples, None without if_aggregating
     """
-    def __init__(self, run_function, ):
+    def __init__(self, run_function=run_single_sample, sample_amount: int = 1, n_workers: int = None,
+                 chunk_size: int = 1, seed: int = None, show_progress_bar: bool = True, if_aggregating: bool = False,
+                 bin_size: int = 1, relative_accuracy: float = 0.02, if_sharing_memory: bool = False,
+                 layout_function=None, **run_kwargs):
         super().__init__()
-
-        pass
+        self.run_function = run_function
+        self.sample_amount = sample_amount
+        self.n_workers = n_workers
+        self.chunk_size = chunk_size
+        self.seed = seed
+        self.show_progress_bar = show_progress_bar
+        self.if_aggregating = if_aggregating
+        self.bin_size = bin_size
+        self.relative_accuracy = relative_accuracy
+        self.if_sharing_memory = if_sharing_memory
+        if layout_function is None and run_function is run_single_sample:
+            layout_function = get_sample_layout
+        self.layout_function = layout_function
+        self.run_kwargs = run_kwargs
+        self.seeds = []
+        self.data = {}
+        self.statistics = None
+        self.completed = 0
 
     def init(self):
-        pass
+        self.seeds = spawn_seed_sequences(self.seed, self.sample_amount)
+        self.data = {}
+        self.statistics = EnsembleStatistics(self, self.bin_size, self.relative_accuracy) if self.if_aggregating \
+            else None
+        self.completed = 0
 
     def start(self):
-        pass
+        self.init()
+        if self.if_aggregating:
+            return self._start_aggregating()
+        tasks = list(enumerate(self.seeds))
+        run_task = partial(_run_sample_task, self.run_function, self.run_kwargs)
+        n_workers = self.n_workers if self.n_workers is not None else os.cpu_count()
+        if n_workers == 1:
+            for task in tasks:
+                self.call_back("sample finished", run_task(task))
+        elif self.if_sharing_memory:
+            self._start_sharing(tasks, n_workers)
+        else:
+            with multiprocessing.Pool(processes=n_workers) as pool:
+                for result in pool.imap_unordered(run_task, tasks, chunksize=self.chunk_size):
+                    self.call_back("sample finished", result)
+        return self.data
+
+    def _start_sharing(self, tasks, n_workers):
+        # REASON: without samples there is no result to lay out, and self.data stays empty as without shared memory.
+        if not tasks:
+            return
+        # STEP: find the layout of the results, from the first sample if it is not given
+        if self.layout_function is not None:
+            layout = self.layout_function(**self.run_kwargs)
+        else:
+            index, result = _run_sample_task(self.run_function, self.run_kwargs, tasks.pop(0))
+            layout = {name: (np.shape(value), np.asarray(value).dtype) for name, value in result.items()}
+
+        # STEP: allocate the ensemble arrays in shared memory, the workers write their samples into them
+        shared = {name: SharedArray((self.sample_amount,) + tuple(shape), dtype)
+                  for name, (shape, dtype) in layout.items()}
+        self.data = {name: array.array for name, array in shared.items()}
+        if self.layout_function is None:
+            self.call_back("sample finished", (index, result))
+        specs = {name: array.get_spec() for name, array in shared.items()}
+        run_task = partial(_run_shared_task, self.run_function, self.run_kwargs, specs)
+        try:
+            with multiprocessing.Pool(processes=n_workers) as pool:
+                for index in pool.imap_unordered(run_task, tasks, chunksize=self.chunk_size):
+                    self.call_back("sample written", index)
+        finally:
+            # REASON: the workers are gone, the arrays of self.data keep the memory until they are released.
+            for array in shared.values():
+                array.unlink()
+
+    def _start_aggregating(self):
+        # REASON: the chunks are merged in order, so the statistics only depend on the chunk size.
+        chunks = [self.seeds[i:i + self.chunk_size] for i in range(0, self.sample_amount, self.chunk_size)]
+        run_task = partial(_run_aggregate_task, self.run_function, self.run_kwargs, self.bin_size,
+                           self.relative_accuracy)
+        n_workers = self.n_workers if self.n_workers is not None else os.cpu_count()
+        if n_workers == 1:
+            for chunk in chunks:
+                self.call_back("chunk finished", run_task(chunk))
+        else:
+            with multiprocessing.Pool(processes=n_workers) as pool:
+                for result in pool.imap(run_task, chunks):
+                    self.call_back("chunk finished", result)
+        return self.statistics
 
     def call_back(self, option, data):
-        pass
\ No newline at end of file
+        match option:
+            case "sample finished":
+                index, result = data
+                for name, value in result.items():
+                    value = np.asarray(value)
+                    if name not in self.data:
+                        self.data[name] = np.zeros((self.sample_amount,) + value.shape, dtype=value.dtype)
+                    self.data[name][index] = value
+                self.completed += 1
+                if self.show_progress_bar:
+                    print_progress_bar(self.completed, self.sample_amount)
+            case "sample written":
+                self.completed += 1
+                if self.show_progress_bar:
+                    print_progress_bar(self.completed, self.sample_amount)
+            case "chunk finished":
+                self.statistics.merge(data)
+                self.completed += data.sample_amount
+                if self.show_progress_bar:
+                    print_progress_bar(self.completed, self.sample_amount)
+
+    def get_data(self, name):
+        if name in self.data:
+            return self.data[name]
+        return None
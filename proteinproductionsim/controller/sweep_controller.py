@@ -0,0 +1,184 @@
+"""
+===================
+sweep_controller.py
+===================
+
+This file defines the controller for parameter sweeps. A sweep expands a grid of DNAStrand keyword arguments into
+configurations, and runs an ensemble of DNASimController samples for each configuration on a process pool.
+
+Every sample is stored in a ResultCache under its configuration, its seed and the code version, so running the same
+sweep again, or a sweep sharing some of its points, only computes the missing samples.
+"""
+import copy
+import itertools
+import multiprocessing
+import os
+from functools import partial
+
+import numpy as np
+from numpy.random import SeedSequence
+
+from ..interface import Controller
+from ..controller.multi_sample_controller import run_single_sample
+from ..helper.general import print_progress_bar
+from ..helper.random_generator import spawn_seed_sequences
+from ..helper.result_cache import ResultCache, get_code_version
+
+
+def expand_grid(grid: dict[str, list], **fixed_kwargs) -> list[dict]:
+    """
+    This method expands a grid into the list of all its configurations.
+
+    Parameters
+    ----------
+    grid : dict[str, list]
+        the values of each swept keyword argument
+    fixed_kwargs
+        the keyword arguments shared by all the configurations
+
+    Returns
+    -------
+    list[dict]
+        the configurations, the last keyword of the grid varies the fastest
+    """
+    names = list(grid)
+    configs = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        config = dict(fixed_kwargs)
+        config.update(zip(names, values))
+        configs.append(config)
+    return configs
+
+
+def _run_sweep_task(run_function, cache_directory, task):
+    config_index, sample_index, key, seed, config = task
+    result = run_function(seed, **config)
+    ResultCache(cache_directory).save(key, result)
+    return config_index, sample_index, result
+
+
+class SweepController(Controller):
+    """
+    This is the controller for parameter sweeps.
+
+    Parameters
+    ----------
+    grid : dict[str, list]
+        the values of each swept keyword argument, e.g. {"rnap_loading_rate": [0.1, 0.2], "pause_profile": ["flat"]}
+    sample_amount : int, optional
+        the number of samples of each configuration (default is 1)
+    seed : int, optional
+        the root seed. The i-th sample of every configuration is seeded with the i-th child SeedSequence spawned from
+        it. None means a fresh root seed, whose samples can only be reused by passing the recorded seed again.
+    cache_directory : str, optional
+        the directory of the ResultCache (default is ~/.cache/proteinproductionsim)
+    n_workers : int, optional
+        the number of worker processes, None means all the cores. 1 runs the samples in this process.
+    chunk_size : int, optional
+        the number of samples sent to a worker at once (default is 1)
+    run_function : callable, optional
+        the function which runs one sample, called as run_function(seed, **config) (default is run_single_sample)
+    show_progress_bar : bool, optional
+        if the progress bar is printed (default is True)
+    fixed_kwargs
+        the keyword arguments shared by all the configurations. A record_config with a storage_path streams each
+        configuration to its own sub-directory of it, named by the first 16 digits of its ResultCache key.
+
+    Attributes
+    ----------
+    configs : list[dict]
+        the configurations of the sweep
+    data : list[dict[str, numpy array]]
+        the ensemble arrays of each configuration, of shape (sample_amount, ...)
+    computed : int
+        the number of samples that were computed, the others were loaded from the cache
+    """
+    def __init__(self, grid: dict[str, list], sample_amount: int = 1, seed: int = None, cache_directory: str = None,
+                 n_workers: int = None, chunk_size: int = 1, run_function=run_single_sample,
+                 show_progress_bar: bool = True, **fixed_kwargs):
+        super().__init__()
+        self.grid = grid
+        self.sample_amount = sample_amount
+        self.seed = seed if seed is not None else SeedSequence().entropy
+        self.cache = ResultCache(cache_directory)
+        self.n_workers = n_workers
+        self.chunk_size = chunk_size
+        self.run_function = run_function
+        self.show_progress_bar = show_progress_bar
+        self.fixed_kwargs = fixed_kwargs
+        self.configs = []
+        self.data = []
+        self.completed = 0
+        self.computed = 0
+
+    def init(self):
+        self.configs = expand_grid(self.grid, **self.fixed_kwargs)
+        self.data = [{} for _ in self.configs]
+        self.completed = 0
+        self.computed = 0
+
+    def start(self):
+        self.init()
+        code_version = get_code_version()
+        seeds = spawn_seed_sequences(self.seed, self.sample_amount)
+
+        # STEP: load the cached samples, and collect the missing ones as tasks
+        tasks = []
+        for config_index, config in enumerate(self.configs):
+            for sample_index, seed in enumerate(seeds):
+                key = self.cache.get_key(config=config, seed=self.seed, sample=sample_index,
+                                         code_version=code_version, run_function=self.run_function.__name__)
+                result = self.cache.load(key)
+                if result is None:
+                    tasks.append((config_index, sample_index, key, seed, self._get_run_config(config)))
+                else:
+                    self.call_back("sample finished", (config_index, sample_index, result))
+
+        # STEP: compute the missing samples
+        self.computed = len(tasks)
+        run_task = partial(_run_sweep_task, self.run_function, self.cache.directory)
+        n_workers = self.n_workers if self.n_workers is not None else os.cpu_count()
+        if n_workers == 1 or len(tasks) <= 1:
+            for task in tasks:
+                self.call_back("sample finished", run_task(task))
+        else:
+            with multiprocessing.Pool(processes=min(n_workers, len(tasks))) as pool:
+                for result in pool.imap_unordered(run_task, tasks, chunksize=self.chunk_size):
+                    self.call_back("sample finished", result)
+        return self.data
+
+    @staticmethod
+    def _get_run_config(config: dict) -> dict:
+        # REASON: the samples of every configuration are named by their sample index in the storage_path, so each
+        #         configuration streams to its own sub-directory, named by its ResultCache key, as in the command line.
+        record_config = config.get("record_config")
+        if record_config is None or record_config.storage_path is None:
+            return config
+        record_config = copy.copy(record_config)
+        record_config.storage_path = os.path.join(record_config.storage_path, ResultCache.get_key(**config)[:16])
+        return {**config, "record_config": record_config}
+
+    def call_back(self, option, data):
+        match option:
+            case "sample finished":
+                config_index, sample_index, result = data
+                ensemble = self.data[config_index]
+                for name, value in result.items():
+                    value = np.asarray(value)
+                    if name not in ensemble:
+                        ensemble[name] = np.zeros((self.sample_amount,) + value.shape, dtype=value.dtype)
+                    ensemble[name][sample_index] = value
+                self.completed += 1
+                if self.show_progress_bar:
+                    print_progress_bar(self.completed, len(self.configs) * self.sample_amount)
+
+    def get_data(self, **config):
+        """
+        This method returns the ensemble arrays of the configurations matching the given keyword arguments.
+
+        Returns
+        -------
+        list[tuple[dict, dict[str, numpy array]]]
+            the matching configurations and their ensemble arrays
+        """
+        return [(c, d) for c, d in zip(self.configs, self.data) if all(c.get(k) == v for k, v in config.items())]
@@ -2,15 +2,24 @@
 ================
 data_recorder.py
 ================
+
+The recorders keep their data in the chunked stores of recorder_storage.py. If a recorder is given a path, its data is
+streamed to the disk during the run and can be re-opened lazily afterwards with open_chunked_array and
+open_trajectory_store.
+
+The recorders only hold numpy data, which is read with their get methods. Their plot methods are drawn by plotting.py
+on the axes given by the caller, so recording never imports matplotlib.
 """
-import matplotlib.axes
+import os
+
 import numpy as np
 
 from ..interface import DataContainer, Environment, Controller
-import matplotlib.pyplot as plt
 from ..entity.dna_strand import DNAStrand
 from ..environment.dna_sim_environment import DNASimEnvironment
-from ..variables import data_collection_interval, dt
+from ..plotting import plot_rnap_position, plot_single_value, plot_five_three, plot_supercoiling, \
+    format_n_th_rnap
+from .recorder_storage import ChunkedArray, TrajectoryStore
 
 
 class DataRecorder(DataContainer):
@@ -18,21 +27,52 @@ class DataRecorder(DataContainer):
     This is the basis class for the data recorder. This is a successor class of the DataContainer class.
 
     :param controller: The controller instance that owns this class. Stored in order to use callback
+    :param target: the instance whose data is recorded, the parameters of the run are read from the Setting of the
+        controller
+    :param chunk_size: the number of rows buffered in the memory before they are flushed
+    :param path: the directory to stream the data to, None keeps the data in the memory
     """
-    def __init__(self, controller: Controller, target):
+    def __init__(self, controller: Controller, target, chunk_size: int = 4096, path: str = None):
         super().__init__(controller)
+        self.setting = controller.setting
         self.target = target
+        self.chunk_size = chunk_size
+        self.path = path
         pass
 
+    def _store_path(self, name):
+        if self.path is None:
+            return None
+        return os.path.join(self.path, name)
+
     def init(self):
         pass
 
     def log(self, time_index):
         pass
 
+    def back_fill(self, start, stop):
+        """
+        This method logs the time indices from start to stop, during which the target is known to be unchanged.
+        """
+        for time_index in range(start, stop):
+            self.log(time_index)
+
     def get(self):
         pass
 
+    def close(self):
+        """
+        This method flushes the buffered data at the end of the run.
+        """
+        pass
+
+    def restore(self):
+        """
+        This method rolls the stored data back to the state of a loaded checkpoint, before the run is resumed.
+        """
+        pass
+
     def plot(self, fig):
         pass
 
@@ -41,60 +81,41 @@ class DataRecorder(DataContainer):
 
 
 class RNAPPositionRecorder(DataRecorder):
-    def __init__(self, controller, target: DNAStrand, total_time: int):
-        super().__init__(controller, target)
-        self.collection_interval = int(data_collection_interval/dt)
+    def __init__(self, controller, target: DNAStrand, total_time: int, chunk_size: int = 4096, path: str = None):
+        super().__init__(controller, target, chunk_size, path)
+        self.collection_interval = self.setting.stage_per_collection
         self._tot_time = total_time + 1
         self._target = target.RNAP_LIST
-        self._dt = data_collection_interval
-        self._data_list = []
-        self._serial_number_list = []
-        self._initialized = False
-        self._processed_position = None
-        self._processed_serial_numbers = None
-        self._processed_time_list = None
-        self._size = 0
+        self._dt = self.setting.data_collection_interval
+        self._store = TrajectoryStore(chunk_size, path)
 
     def log(self, time_index: int):
         # STEP: check if it is time for loading
         if time_index % self.collection_interval == 0:
             # STEP: record the data
             data, serial_number = self._target.get_position_for_recorder()
-            self._data_list.append(data)
-            self._serial_number_list.append(serial_number)
+            self._store.append(len(self._store)*self._dt, serial_number, data)
+
+    def close(self):
+        self._store.flush()
+
+    def restore(self):
+        self._store.restore()
+
+    def get(self):
+        """
+        This method returns the columns of the snapshots, see TrajectoryStore.get().
+        """
+        return self._store.get()
+
+    def get_trajectories(self):
+        """
+        This method returns the position trajectory of each RNAP, see group_trajectories.
+        """
+        return self._store.get_trajectories()
 
     def plot(self, axe):
-        # STEP: check if the collected data is processed
-        if not self._initialized:
-            # STEP: we need to convert the raw data into a form which can be plotted
-            self._processed_position = []
-            self._processed_serial_numbers = []
-            self._processed_time_list = []
-            cycle_size = len(self._serial_number_list)
-            print(cycle_size)
-            for i in range(cycle_size):
-                true_time = i*self._dt
-                for j in range(len(self._data_list[i])):
-                    serial_n = self._serial_number_list[i][j]
-                    data = self._data_list[i][j]
-                    if serial_n not in self._processed_serial_numbers:
-                        self._processed_position.append([])
-                        self._processed_serial_numbers.append(serial_n)
-                        self._processed_time_list.append([])
-                        self._size += 1
-                    index = self._processed_serial_numbers.index(serial_n)
-                    self._processed_position[index].append(data)
-                    self._processed_time_list[index].append(true_time)
-            self._initialized = True
-
-        axe.set_xlabel('Time [s]')
-        axe.set_ylabel('Position [bps]')
-        axe.set_title('RNAP Position Plot')
-        axe.grid(True)
-        for i in range(self._size):
-            label = format_n_th_rnap(self._processed_serial_numbers[i])
-            axe.plot(self._processed_time_list[i], self._processed_position[i], label=label)
-        pass
+        plot_rnap_position(axe, self)
 
 
 # Amount Recorder Single-Value Recorder.
@@ -102,77 +123,99 @@ class SingleValueRecorder(DataRecorder):
     def __init__(self, controller: Controller, target_function, total_time: int,
                  name_x: str, name_y: str,
                  unit_y: str, unit_x: str,
-                 data_format: str = "versus_time"
+                 data_format: str = "versus_time", chunk_size: int = 4096, path: str = None
                  ):
-        super().__init__(controller, None)
+        super().__init__(controller, None, chunk_size, path)
         self._tot_time = total_time
         self._targe_function = target_function
         self._data_format = data_format
         self._name = [name_x, name_y]
         self._unit = [unit_x, unit_y]
-        self._data = np.zeros(self._tot_time)
+        self._data = ChunkedArray((), float, chunk_size, self._store_path("value"))
 
     def log(self, time_index: int) -> None:
-        self._data[time_index] = self._targe_function()
+        self._data.append(self._targe_function())
+
+    def back_fill(self, start, stop):
+        self._data.fill(self._targe_function(), stop - start)
 
     def get(self):
-        return self._data
+        return self._data.get()
 
-    def plot(self, axe):
+    def close(self):
+        self._data.flush()
+
+    def restore(self):
+        self._data.restore()
+
+    def get_time(self) -> np.ndarray:
+        """
+        This method returns the time of each recorded value in seconds.
+        """
+        return np.arange(len(self._data), dtype=float) * self.setting.dt
+
+    def get_names(self) -> tuple[str, str]:
+        return self._name[0], self._name[1]
+
+    def get_labels(self) -> tuple[str, str]:
+        """
+        This method returns the labels of the time and of the value axes, with their units.
+        """
         x_label = f"{self._name[0]} [{self._unit[0]}]"
         if self._unit[1] == "":
             y_label = f"{self._name[1]}"
         else:
             y_label = f"{self._name[1]} [{self._unit[1]}]"
-        axe.set_xlabel(x_label)
-        axe.set_ylabel(y_label)
-        axe.set_title(f'{self._name[0]} versus {self._name[1]} Plot')
-        axe.grid(True)
-        time_list = np.arange(start=0, stop=self._tot_time, step=1, dtype=float)
-        axe.plot(time_list*dt, self._data)
-        pass
+        return x_label, y_label
+
+    def plot(self, axe):
+        plot_single_value(axe, self)
 
 
 # Multi-Value Recorder
 class FiveThreeRecorder(DataRecorder):
-    def __init__(self, controller, target: DNAStrand, total_time):
-        super().__init__(controller,  target)
+    def __init__(self, controller, target: DNAStrand, total_time, chunk_size: int = 4096, path: str = None):
+        super().__init__(controller,  target, chunk_size, path)
         self._target = target.RNAP_LIST
         self._total_time = total_time
         self._name = []
         self._length = 0
-        self._loaded = []
-        self._detached = []
-        self._degrading = []
-        self._degraded = []
-        self._dt = dt
+        # REASON: the columns are the loaded, detached, degrading and degraded amounts.
+        self._counters = ChunkedArray((4,), int, chunk_size, self._store_path("counters"))
+        self._dt = self.setting.dt
 
-    def log(self, time_index: int):
-        self._loaded.append(self._target.loaded)
-        self._detached.append(self._target.detached)
-        self._degrading.append(self._target.degrading)
-        self._degraded.append(self._target.degraded)
+    def _get_counters(self):
+        return (self._target.loaded, self._target.detached, self._target.degrading, self._target.degraded)
 
+    def log(self, time_index: int):
+        self._counters.append(self._get_counters())
         self._length += 1
         return 0
 
+    def back_fill(self, start, stop):
+        self._counters.fill(self._get_counters(), stop - start)
+        self._length += stop - start
+
+    def close(self):
+        self._counters.flush()
+
+    def restore(self):
+        self._counters.restore()
+
     def get_five_six(self):
-        five = np.array(self._loaded) - np.array(self._degrading)
-        three = np.array(self._detached) - np.array(self._degraded)
+        counters = self._counters.get()
+        five = counters[:, 0] - counters[:, 2]
+        three = counters[:, 1] - counters[:, 3]
         return [five, three]
 
+    def get_time(self) -> np.ndarray:
+        """
+        This method returns the time of each recorded row in seconds.
+        """
+        return np.arange(self._length, dtype=float) * self._dt
+
     def plot(self, axe):
-        five, three = self.get_five_six()
-        axe.set_xlabel('Time [s]')
-        axe.set_ylabel('Amount')
-        axe.set_title('5 and 3 mRNA amount versus time Plot')
-        axe.grid(True)
-        time_list = np.arange(start=0, stop=self._total_time,
-                              step=1, dtype=float) * self._dt
-        axe.plot(time_list, five, label='Five End')
-        axe.plot(time_list, three, label='Three End')
-        # print([self._rnap_loaded, self._rnap_detached])
-        pass
+        plot_five_three(axe, self)
 
 
 class SupercoilingRecorder(DataRecorder):
@@ -183,75 +226,57 @@ class SupercoilingRecorder(DataRecorder):
     :param target: the target DNAStrand instance
     :param total_time: the integer total time steps
     :param rnap_record_amount: the max amount of rnap to record. default is 5
+    :param chunk_size: the number of values buffered in the memory before they are flushed
+    :param path: the directory to stream the data to, None keeps the data in the memory
     """
-    def __init__(self, controller, target: DNAStrand, total_time: int, rnap_record_amount: int = 5):
+    def __init__(self, controller, target: DNAStrand, total_time: int, rnap_record_amount: int = 5,
+                 chunk_size: int = 4096, path: str = None):
         """
         Constructor method
         """
-        super().__init__(controller, target)
-        self.collection_interval = int(data_collection_interval / dt)
+        super().__init__(controller, target, chunk_size, path)
+        self.collection_interval = self.setting.stage_per_collection
         self.rnap_record_amount = rnap_record_amount
         self._tot_time = total_time + 1
         self._target = target
-        self._dt = data_collection_interval
-        self._data_list = []
-        self._serial_number_list = []
-        self._initialized = False
-        self._processed_supercoiling = None
-        self._processed_serial_numbers = None
-        self._processed_time_list = None
-        self._size = 0
+        self._dt = self.setting.data_collection_interval
+        self._store = TrajectoryStore(chunk_size, path)
 
     def log(self, time_index: int):
         # STEP: check if it is time for loading
         if time_index % self.collection_interval == 0:
-            # STEP: record the data
-            data = self.target.phi
+            # STEP: record the supercoiling between each RNAP and the one behind it
+            phi = self.target.phi
             serial_number = self.target.serial_number
-            self._data_list.append(data)
-            self._serial_number_list.append(serial_number)
+            if phi is None or len(phi) < 2:
+                self._store.append(len(self._store)*self._dt, (), ())
+            else:
+                self._store.append(len(self._store)*self._dt, serial_number[:len(phi)-1], np.diff(phi))
 
-    def plot(self, axe):
-        # STEP: check if the collected data is processed
-        if not self._initialized:
-            # STEP: we need to convert the raw data into a form which can be plotted
-            self._processed_supercoiling = []
-            self._processed_serial_numbers = []
-            self._processed_time_list = []
-            cycle_size = len(self._serial_number_list)
-            print(cycle_size)
-            for i in range(cycle_size):
-                true_time = i*self._dt
-                for j in range(len(self._data_list[i])-1):
-                    serial_n = self._serial_number_list[i][j]
-                    data = self._data_list[i][j+1]-self._data_list[i][j]
-                    if serial_n not in self._processed_serial_numbers:
-                        self._processed_supercoiling.append([])
-                        self._processed_serial_numbers.append(serial_n)
-                        self._processed_time_list.append([])
-                        self._size += 1
-                    index = self._processed_serial_numbers.index(serial_n)
-                    self._processed_supercoiling[index].append(data)
-                    self._processed_time_list[index].append(true_time)
-            self._initialized = True
-
-        axe.set_xlabel('Time [s]')
-        axe.set_ylabel('Supercoiling')
-        axe.set_title('RNAP Supercoiling Plot')
-        axe.grid(True)
-        for i in range(max(self._size-self.rnap_record_amount, 0), self._size):
-            label = format_n_th_rnap(self._processed_serial_numbers[i])
-            axe.plot(self._processed_time_list[i], self._processed_supercoiling[i], label=label)
-        pass
+    def back_fill(self, start, stop):
+        # REASON: the phi of the target is computed at the start of a step, so it is stale once the last RNAP of that
+        #         step has detached. no RNAP is attached during the idle steps, each of them records an empty snapshot.
+        first = -(-start // self.collection_interval) * self.collection_interval
+        for _ in range(first, stop, self.collection_interval):
+            self._store.append(len(self._store)*self._dt, (), ())
+
+    def close(self):
+        self._store.flush()
+
+    def restore(self):
+        self._store.restore()
 
+    def get(self):
+        """
+        This method returns the columns of the snapshots, see TrajectoryStore.get().
+        """
+        return self._store.get()
 
-def format_n_th_rnap(number):
-    if number % 10 == 0:
-        label = f"{number + 1}st RNAP"
-    elif number % 10 == 1:
-        label = f"{number + 1}nd RNAP"
-    elif number % 10 == 2:
-        label = f"{number + 1}rd RNAP"
-    else:
-        label = f"{number + 1}th RNAP"
-    return label
+    def get_trajectories(self):
+        """
+        This method returns the supercoiling trajectory of each RNAP, see group_trajectories.
+        """
+        return self._store.get_trajectories()
+
+    def plot(self, axe):
+        plot_supercoiling(axe, self)
@@ -0,0 +1,261 @@
+"""
+======================
+ensemble_statistics.py
+======================
+
+This file defines the EnsembleStatistics class, which aggregates the recorder outputs of many samples on the fly.
+
+Instead of stacking the series of every sample, each finished sample is folded into running statistics per time bin:
+the count, mean and sum of squared deviations of the values, updated with the Welford algorithm, and a quantile sketch.
+Two EnsembleStatistics can be merged, so every worker process can aggregate its own samples, and the memory of an
+ensemble is proportional to the number of time bins instead of the number of samples times the number of time steps.
+
+The quantile sketch is a histogram of logarithmically spaced buckets per time bin, as in DDSketch. Every quantile is
+returned with a relative error of at most relative_accuracy, and merging two sketches is exact, so the result does not
+depend on how the samples are split between the workers. The sketch only supports non-negative values, like the
+protein amount and the mRNA counts.
+"""
+import math
+
+import numpy as np
+
+from ..interface import DataContainer
+from ..plotting import plot_ensemble_statistics
+
+
+class QuantileSketch:
+    """
+    This class is the quantile sketch of non-negative values, one for each time bin.
+
+    Parameters
+    ----------
+    bin_amount : int
+        the number of time bins
+    relative_accuracy : float
+        the maximum relative error of the quantiles
+
+    Attributes
+    ----------
+    zero_count : numpy array of int
+        the number of zero values in each time bin
+    bucket_count : numpy array of int
+        the shape is (bin_amount, number of buckets), the number of values in each bucket of each time bin. the i-th
+        bucket holds the values in (gamma**(offset+i-1), gamma**(offset+i)].
+    offset : int
+        the index of the first bucket
+    """
+    def __init__(self, bin_amount: int, relative_accuracy: float):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.zero_count = np.zeros(bin_amount, dtype=np.int64)
+        self.bucket_count = np.zeros((bin_amount, 0), dtype=np.int64)
+        self.offset = 0
+
+    def _extend(self, low: int, high: int):
+        """
+        This method enlarges the buckets to cover the bucket indices from low to high.
+        """
+        size = self.bucket_count.shape[1]
+        if size == 0:
+            self.bucket_count = np.zeros((self.zero_count.shape[0], high - low + 1), dtype=np.int64)
+            self.offset = low
+            return
+        low, high = min(low, self.offset), max(high, self.offset + size - 1)
+        if low == self.offset and high == self.offset + size - 1:
+            return
+        bucket_count = np.zeros((self.zero_count.shape[0], high - low + 1), dtype=np.int64)
+        bucket_count[:, self.offset - low:self.offset - low + size] = self.bucket_count
+        self.bucket_count = bucket_count
+        self.offset = low
+
+    def add(self, values: np.ndarray, bins: np.ndarray):
+        """
+        This method adds values, the i-th value to the time bin bins[i].
+        """
+        if (values < 0).any():
+            raise ValueError("QuantileSketch only supports non-negative values.")
+        positive = values > 0
+        self.zero_count += np.bincount(bins[~positive], minlength=self.zero_count.shape[0])
+        if not positive.any():
+            return
+        keys = np.ceil(np.log(values[positive]) / self._log_gamma).astype(np.int64)
+        self._extend(int(keys.min()), int(keys.max()))
+        size = self.bucket_count.shape[1]
+        flat = bins[positive] * size + (keys - self.offset)
+        self.bucket_count += np.bincount(flat, minlength=self.bucket_count.size).reshape(self.bucket_count.shape)
+
+    def merge(self, other: "QuantileSketch"):
+        """
+        This method adds all the values of the sketch other to this sketch.
+        """
+        if other.gamma != self.gamma or other.zero_count.shape != self.zero_count.shape:
+            raise ValueError("only the sketches of the same relative accuracy and time bins can be merged.")
+        self.zero_count += other.zero_count
+        size = other.bucket_count.shape[1]
+        if size == 0:
+            return
+        self._extend(other.offset, other.offset + size - 1)
+        start = other.offset - self.offset
+        self.bucket_count[:, start:start + size] += other.bucket_count
+
+    def get_quantile(self, q: float) -> np.ndarray:
+        """
+        This method returns the q-quantile of each time bin, nan for the empty ones.
+        """
+        count = self.zero_count + self.bucket_count.sum(axis=1)
+        rank = q * (count - 1)
+        quantile = np.full(count.shape[0], np.nan)
+        quantile[(count > 0) & (rank < self.zero_count)] = 0
+        in_bucket = (count > 0) & (rank >= self.zero_count)
+        if in_bucket.any():
+            # REASON: the first bucket whose cumulative count passes the rank, the value is the center of the bucket.
+            cumulative = self.zero_count[in_bucket, None] + np.cumsum(self.bucket_count[in_bucket], axis=1)
+            index = np.argmax(cumulative > rank[in_bucket, None], axis=1) + self.offset
+            quantile[in_bucket] = 2 * self.gamma ** index / (self.gamma + 1)
+        return quantile
+
+
+class EnsembleStatistics(DataContainer):
+    """
+    This class stores the running statistics per time bin of the recorder outputs of the samples.
+
+    Parameters
+    ----------
+    parent : Controller, optional
+        the controller aggregating the samples
+    bin_size : int, optional
+        the number of time steps in one time bin, the values of all the time steps of a bin are pooled (default is 1)
+    relative_accuracy : float, optional
+        the maximum relative error of the quantiles (default is 0.02)
+
+    Attributes
+    ----------
+    sample_amount : int
+        the number of samples added
+    """
+    def __init__(self, parent=None, bin_size: int = 1, relative_accuracy: float = 0.02):
+        super().__init__(parent)
+        self.bin_size = bin_size
+        self.relative_accuracy = relative_accuracy
+        self.sample_amount = 0
+        self._length = {}  # the number of time steps of each series.
+        self._count = {}  # the number of values in each time bin.
+        self._mean = {}
+        self._m2 = {}  # the sum of squared deviations from the mean in each time bin.
+        self._sketch = {}
+
+    def init(self):
+        self.sample_amount = 0
+        self._length, self._count, self._mean, self._m2, self._sketch = {}, {}, {}, {}, {}
+
+    def _merge_moments(self, name, count, mean, m2):
+        # REASON: the parallel form of the Welford update, which is the Welford update itself for count 1.
+        total = self._count[name] + count
+        delta = mean - self._mean[name]
+        self._mean[name] += delta * (count / total)
+        self._m2[name] += m2 + delta * delta * (self._count[name] * count / total)
+        self._count[name] = total
+
+    def _init_series(self, name, length):
+        bin_amount = -(-length // self.bin_size)
+        self._length[name] = length
+        self._count[name] = np.zeros(bin_amount, dtype=np.int64)
+        self._mean[name] = np.zeros(bin_amount)
+        self._m2[name] = np.zeros(bin_amount)
+        self._sketch[name] = QuantileSketch(bin_amount, self.relative_accuracy)
+
+    def log(self, data: dict):
+        """
+        This method adds one sample.
+
+        Parameters
+        ----------
+        data : dict[str, numpy array]
+            the series of the sample keyed by name, e.g. the output of collect_recorder_data
+        """
+        for name, value in data.items():
+            value = np.asarray(value, dtype=float).reshape(-1)
+            if name not in self._length:
+                self._init_series(name, value.shape[0])
+            elif value.shape[0] != self._length[name]:
+                raise ValueError(f"the series {name} has {value.shape[0]} time steps, expected {self._length[name]}.")
+            bins = np.arange(value.shape[0]) // self.bin_size
+            if self.bin_size == 1:
+                self._merge_moments(name, 1, value, 0)
+            else:
+                starts = np.arange(0, value.shape[0], self.bin_size)
+                count = np.diff(np.append(starts, value.shape[0]))
+                mean = np.add.reduceat(value, starts) / count
+                self._merge_moments(name, count, mean, np.add.reduceat((value - mean[bins]) ** 2, starts))
+            self._sketch[name].add(value, bins)
+        self.sample_amount += 1
+
+    def merge(self, other: "EnsembleStatistics"):
+        """
+        This method adds all the samples of other, e.g. aggregated by another worker, to this instance.
+        """
+        if other.bin_size != self.bin_size or other.relative_accuracy != self.relative_accuracy:
+            raise ValueError("only the statistics of the same bin size and relative accuracy can be merged.")
+        for name, length in other._length.items():
+            if name not in self._length:
+                self._init_series(name, length)
+            elif length != self._length[name]:
+                raise ValueError(f"the series {name} has {length} time steps, expected {self._length[name]}.")
+            self._merge_moments(name, other._count[name], other._mean[name], other._m2[name])
+            self._sketch[name].merge(other._sketch[name])
+        self.sample_amount += other.sample_amount
+        return self
+
+    @property
+    def names(self) -> list[str]:
+        return list(self._length)
+
+    def get_mean(self, name) -> np.ndarray:
+        return self._mean[name].copy()
+
+    def get_variance(self, name, ddof: int = 1) -> np.ndarray:
+        """
+        This method returns the variance of each time bin, nan if there are not more than ddof values.
+        """
+        count = self._count[name]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(count > ddof, self._m2[name] / (count - ddof), np.nan)
+
+    def get_std(self, name, ddof: int = 1) -> np.ndarray:
+        return np.sqrt(self.get_variance(name, ddof))
+
+    def get_quantile(self, name, q: float) -> np.ndarray:
+        """
+        This method returns the approximate q-quantile of each time bin.
+        """
+        return self._sketch[name].get_quantile(q)
+
+    def get(self, quantiles=(0.05, 0.5, 0.95)) -> dict:
+        """
+        This method returns the statistics of all the series.
+
+        Returns
+        -------
+        dict[str, dict]
+            for each series, the "count", "mean" and "std" of each time bin, and the quantiles keyed by q
+        """
+        data = {}
+        for name in self._length:
+            data[name] = {"count": self._count[name].copy(), "mean": self.get_mean(name), "std": self.get_std(name)}
+            for q in quantiles:
+                data[name][q] = self.get_quantile(name, q)
+        return data
+
+    def get_time(self, name, dt: float = None) -> np.ndarray:
+        """
+        This method returns the start of each time bin of the series name, in time steps, or in seconds if dt is given.
+        """
+        time_list = np.arange(self._mean[name].shape[0], dtype=float) * self.bin_size
+        return time_list if dt is None else time_list * dt
+
+    def plot(self, axe, name, quantiles=(0.05, 0.95), dt: float = None):
+        """
+        This method plots the mean of the series name, with the band between the two given quantiles.
+        """
+        plot_ensemble_statistics(axe, self, name, quantiles, dt)
@@ -0,0 +1,306 @@
+"""
+===================
+recorder_storage.py
+===================
+
+This file contains the storage backend of the data recorders.
+
+The recorded rows are buffered in a fixed-size numpy chunk. Once the chunk is full it is flushed, either to the memory
+or, if a path is given, appended to a raw binary file next to a small JSON index. The index is rewritten on every
+flush, so the data on the disk can be re-opened lazily as a numpy memmap at any time, and the memory used by a
+recorder stays at one chunk no matter how long the run is.
+
+The files of a store at path are:
+    path.bin    the raw rows in C order
+    path.json   the index, with the dtype, the shape of one row and the number of rows
+
+The snapshots of the RNAPs are kept in a TrajectoryStore, which is columnar: the serial numbers and the values of all
+the snapshots are flat arrays delimited by offsets, and the per-RNAP trajectories are recovered by one sort.
+"""
+import json
+import os
+
+import numpy as np
+
+
+class ChunkedArray:
+    """
+    This class is an appendable array of rows of the same shape, which is buffered in fixed-size chunks.
+
+    Parameters
+    ----------
+    row_shape : tuple, optional
+        the shape of one row, () for scalars (default is ())
+    dtype : optional
+        the dtype of the rows (default is float)
+    chunk_size : int, optional
+        the number of rows buffered before a flush (default is 4096)
+    path : str, optional
+        the path of the store without extension, None keeps the flushed chunks in the memory
+
+    Attributes
+    ----------
+    length : int
+        the number of rows appended
+    """
+    def __init__(self, row_shape: tuple = (), dtype=float, chunk_size: int = 4096, path: str = None):
+        self.row_shape = tuple(row_shape)
+        self.dtype = np.dtype(dtype)
+        self.chunk_size = chunk_size
+        self.path = path
+        self.length = 0
+        self._buffer = np.zeros((chunk_size,) + self.row_shape, dtype=self.dtype)
+        self._buffered = 0
+        self._chunks = []
+        self._cache = None
+        if self.path is not None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            # REASON: a new store starts from an empty file, even if an old run used the same path.
+            open(self.path + ".bin", "wb").close()
+            self._write_index()
+
+    def __len__(self):
+        return self.length
+
+    def append(self, row):
+        self._buffer[self._buffered] = row
+        self._buffered += 1
+        self.length += 1
+        self._cache = None
+        if self._buffered == self.chunk_size:
+            self.flush()
+
+    def extend(self, rows):
+        """
+        This method appends many rows at once.
+
+        Parameters
+        ----------
+        rows : array_like
+            the rows, of shape (n,) + row_shape
+        """
+        rows = np.asarray(rows, dtype=self.dtype)
+        start = 0
+        while start < len(rows):
+            size = min(len(rows) - start, self.chunk_size - self._buffered)
+            self._buffer[self._buffered:self._buffered + size] = rows[start:start + size]
+            self._buffered += size
+            self.length += size
+            start += size
+            if self._buffered == self.chunk_size:
+                self.flush()
+        self._cache = None
+
+    def fill(self, row, amount: int):
+        """
+        This method appends the same row amount times.
+        """
+        self.extend(np.broadcast_to(np.asarray(row, dtype=self.dtype), (amount,) + self.row_shape))
+
+    def flush(self):
+        """
+        This method moves the buffered rows out of the chunk, to the disk if a path is given.
+        """
+        if self._buffered == 0:
+            return
+        if self.path is None:
+            self._chunks.append(self._buffer[:self._buffered].copy())
+            self._buffered = 0
+        else:
+            with open(self.path + ".bin", "ab") as file:
+                file.write(self._buffer[:self._buffered].tobytes())
+            self._buffered = 0
+            self._write_index()
+
+    def get(self) -> np.ndarray:
+        """
+        This method returns all the rows, as a read-only memmap if the store is on the disk.
+
+        Returns
+        -------
+        numpy array
+            of shape (length,) + row_shape
+        """
+        if self.path is not None:
+            self.flush()
+            return open_chunked_array(self.path)
+        if self._cache is None:
+            self._cache = np.concatenate(self._chunks + [self._buffer[:self._buffered]])
+        return self._cache
+
+    def __getstate__(self):
+        # REASON: only the buffered rows are part of the state, the flushed ones are in the memory chunks or on the
+        #         disk.
+        state = self.__dict__.copy()
+        state["_buffer"] = self._buffer[:self._buffered].copy()
+        state["_cache"] = None
+        return state
+
+    def __setstate__(self, state):
+        buffered = state["_buffer"]
+        state["_buffer"] = np.zeros((state["chunk_size"],) + state["row_shape"], dtype=state["dtype"])
+        state["_buffer"][:len(buffered)] = buffered
+        self.__dict__.update(state)
+
+    def restore(self):
+        """
+        This method drops the rows flushed to the disk after this state was pickled, so the file matches the state
+        again and the run can go on appending to it.
+
+        Unpickling a store leaves its file untouched, so a checkpoint can be loaded without losing the data streamed
+        after it. This method is called only once a run is resumed from the checkpoint.
+        """
+        if self.path is None:
+            return
+        with open(self.path + ".bin", "r+b") as file:
+            file.truncate((self.length - self._buffered) * self._buffer[0].nbytes)
+        self._write_index()
+
+    def _write_index(self):
+        index = {"dtype": self.dtype.str, "row_shape": list(self.row_shape), "length": self.length - self._buffered}
+        with open(self.path + ".json", "w") as file:
+            json.dump(index, file)
+
+
+class TrajectoryStore:
+    """
+    This class is a columnar store of the snapshots of the RNAPs on the DNA, in a CSR layout.
+
+    Each snapshot lists the serial numbers of the RNAPs present at one time point and one value for each of them. The
+    serial numbers and the values of all the snapshots are stored back to back in two flat arrays, so the entries of
+    the i-th snapshot, taken at time[i], are serial_number[start:stop] and value[start:stop] with start = offsets[i]
+    and stop = offsets[i + 1].
+
+    Parameters
+    ----------
+    chunk_size : int, optional
+        the number of entries buffered before a flush (default is 4096)
+    path : str, optional
+        the directory of the store, None keeps everything in the memory.
+    """
+    def __init__(self, chunk_size: int = 4096, path: str = None):
+        self.path = path
+        self._time = ChunkedArray((), float, chunk_size, _join(path, "time"))
+        self._offsets = ChunkedArray((), np.int64, chunk_size, _join(path, "offsets"))
+        self._serial_number = ChunkedArray((), np.int64, chunk_size, _join(path, "serial_number"))
+        self._value = ChunkedArray((), float, chunk_size, _join(path, "value"))
+        self._offsets.append(0)
+
+    def __len__(self):
+        return len(self._time)
+
+    def append(self, time, serial_number, value):
+        """
+        This method appends one snapshot, serial_number and value must be of the same size.
+        """
+        self._time.append(time)
+        self._serial_number.extend(np.ravel(serial_number))
+        self._value.extend(np.ravel(value))
+        self._offsets.append(len(self._value))
+
+    def flush(self):
+        self._time.flush()
+        self._offsets.flush()
+        self._serial_number.flush()
+        self._value.flush()
+
+    def restore(self):
+        """
+        This method rolls the files of the store back to its pickled state, see ChunkedArray.restore().
+        """
+        self._time.restore()
+        self._offsets.restore()
+        self._serial_number.restore()
+        self._value.restore()
+
+    def get(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        This method returns the columns of the store.
+
+        Returns
+        -------
+        tuple[numpy array, numpy array, numpy array, numpy array]
+            the time of each snapshot, the offsets, the flat serial numbers and the flat values
+        """
+        return self._time.get(), self._offsets.get(), self._serial_number.get(), self._value.get()
+
+    def get_trajectories(self):
+        """
+        This method regroups the snapshots into one trajectory for each RNAP, see group_trajectories.
+        """
+        return group_trajectories(*self.get())
+
+
+def group_trajectories(time, offsets, serial_number, value):
+    """
+    This method regroups the entries of the snapshots into one trajectory for each RNAP, by a stable sort of the
+    entries by serial number.
+
+    Parameters
+    ----------
+    time : numpy array
+        the time of each snapshot
+    offsets : numpy array
+        the offsets of the snapshots in the flat arrays
+    serial_number : numpy array
+        the flat serial numbers
+    value : numpy array
+        the flat values
+
+    Returns
+    -------
+    tuple[numpy array, numpy array, numpy array, numpy array]
+        the sorted unique serial numbers, the offsets of their trajectories, and the time and the value of the entries
+        grouped by RNAP. The trajectory of the k-th RNAP is time[start:stop] and value[start:stop], where start and
+        stop are trajectory_offsets[k] and trajectory_offsets[k + 1], in ascending time.
+    """
+    # STEP: give each entry the time of its snapshot
+    entry_time = np.repeat(np.asarray(time), np.diff(offsets))
+    # STEP: group the entries by serial number, the stable sort keeps them in ascending time inside each group
+    order = np.argsort(serial_number, kind="stable")
+    sorted_serial_number = np.asarray(serial_number)[order]
+    serial_numbers, starts = np.unique(sorted_serial_number, return_index=True)
+    trajectory_offsets = np.append(starts, len(sorted_serial_number))
+    return serial_numbers, trajectory_offsets, entry_time[order], np.asarray(value)[order]
+
+
+def _join(path, name):
+    if path is None:
+        return None
+    return os.path.join(path, name)
+
+
+def open_chunked_array(path: str) -> np.memmap:
+    """
+    This method lazily re-opens a ChunkedArray stored at path.
+
+    Parameters
+    ----------
+    path : str
+        the path of the store without extension
+
+    Returns
+    -------
+    numpy memmap
+        the read-only rows that have been flushed to the disk
+    """
+    with open(path + ".json") as file:
+        index = json.load(file)
+    shape = (index["length"],) + tuple(index["row_shape"])
+    if index["length"] == 0:
+        return np.zeros(shape, dtype=index["dtype"])
+    return np.memmap(path + ".bin", dtype=index["dtype"], mode="r", shape=shape)
+
+
+def open_trajectory_store(path: str) -> tuple[np.memmap, np.memmap, np.memmap, np.memmap]:
+    """
+    This method lazily re-opens a TrajectoryStore stored in the directory path.
+
+    Returns
+    -------
+    tuple[numpy memmap, numpy memmap, numpy memmap, numpy memmap]
+        the same columns as TrajectoryStore.get(), which can be passed to group_trajectories
+    """
+    return tuple(open_chunked_array(os.path.join(path, name)) for name in ("time", "offsets", "serial_number", "value"))
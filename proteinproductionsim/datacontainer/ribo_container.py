@@ -8,17 +8,30 @@ This file defines the RIBOContainer class which is used by the RNAP class to sto
 """
 
 from ..interface import DataContainer
-from ..variables import RIBO_size, dt, k_elong, length
+from .setting import Setting
 import numpy as np
 
 
 class RIBOContainer(DataContainer):
-    def __init__(self, rnap):
+    """
+    This class stores the positions of the ribosomes loaded on one mRNA.
+
+    The positions of the attached ribosomes are stored in a ring buffer in the loading order, so the front-most
+    ribosome comes first. The i-th attached ribosome is in the slot (_head+i) % capacity, and a detached ribosome only
+    moves _head forward, so its slot is reused by the next loaded ones. The buffer only grows when all the slots are
+    attached, and the memory of a mRNA does not grow with the number of ribosomes it ever loaded.
+
+    The ribosome size, the elongation speed and the length of the mRNA are read from setting, a default Setting is used
+    if it is not given.
+    """
+    def __init__(self, rnap, capacity: int = 16, setting: Setting = None):
         super().__init__(rnap)
+        self.setting = setting if setting is not None else Setting()
         self.ribo_loaded = 0
         self.ribo_attached = 0
         self.ribo_detached = 0
-        self.ribo_list = []
+        self.ribo_list = np.zeros(capacity, dtype=float)
+        self._head = 0
 
     def if_empty(self):
         if self.ribo_loaded == 0:
@@ -32,51 +45,74 @@ class RIBOContainer(DataContainer):
         if self.if_empty():
             return True
         else:
-            if self.ribo_list[self.ribo_loaded-1] - RIBO_size >= 0:
+            # REASON: the detached ribosomes are past the end of the mRNA, so only the rear-most attached one matters.
+            if self.ribo_attached == 0:
+                return True
+            rear = (self._head + self.ribo_attached - 1) % self.ribo_list.shape[0]
+            if self.ribo_list[rear] - self.setting.ribo_size >= 0:
                 return True
             else:
                 return False
 
     def load_one(self):
+        capacity = self.ribo_list.shape[0]
+        if self.ribo_attached == capacity:
+            # REASON: all the slots are attached, the ring is unrolled into a buffer twice as large.
+            self.ribo_list = np.concatenate((self.ribo_list[self._head:], self.ribo_list[:self._head],
+                                             np.zeros(capacity)))
+            self._head = 0
+            capacity *= 2
+        self.ribo_list[(self._head + self.ribo_attached) % capacity] = 0
         self.ribo_loaded += 1
         self.ribo_attached += 1
-        self.ribo_list.append(0)
-
-    def step(self, time_index, rnap_position):
-
-        # REASON: we now will create a general stepping array, that just represents the stepping for each attached
-        #         ribosome. At first, the stepping for any attached ribosome is just the elongation speed times the dt,
-        #         but we also have to account for hindrance between each ribosome.
-
-        # REASON: set up the general stepping array.
-        stepping = np.full(shape=self.ribo_attached, fill_value=k_elong*dt, dtype=float)
 
-        # REASON: check for hindrance. start from the front ribosome and adjust as we're moving toward the end.
-        for i in range(self.ribo_attached):
-            # REASON: this is the actual index of the element within the self.ribo_list.
-            actual_i = i + self.ribo_detached
-
-            # REASON: check for ribo hindrance. there are two potential cases of hindrance:
-            #         First: if the mRNA has not finished transcription, then the front-most Ribosome cannot move ahead
-            #         of that length transcribed, as that would be unphysical
-            if i == 0 and self.parent.attached:
-                if self.ribo_list[actual_i] + stepping[i] > rnap_position:
-                    stepping[i] = rnap_position - self.ribo_list[actual_i]
-            # 2. hindrance between the adjacent Ribosomes
-            if i != 0:
-                if self.ribo_list[actual_i]+stepping[i] > self.ribo_list[actual_i - 1]+stepping[i - 1]-RIBO_size:
-                    stepping[i] = self.ribo_list[actual_i-1]+stepping[i-1]-RIBO_size-self.ribo_list[actual_i]
+    def step(self, time_index, rnap_position, rnap_attached=True):
+
+        # REASON: every attached ribosome tries to move by the elongation speed times the dt, but we also have to
+        #         account for hindrance between each ribosome.
+        if self.ribo_attached == 0:
+            return 0
+        setting = self.setting
+        ribo_size = setting.ribo_size
+        capacity = self.ribo_list.shape[0]
+        stop = self._head + self.ribo_attached
+        if stop <= capacity:
+            slots = None
+            attached = self.ribo_list[self._head:stop]
+        else:
+            # REASON: the attached ribosomes wrap around the end of the ring, they are gathered in order.
+            slots = np.arange(self._head, stop) % capacity
+            attached = self.ribo_list[slots]
+        candidate = attached + setting.ribo_step
+
+        # REASON: check for ribo hindrance. there are two potential cases of hindrance:
+        #         First: if the mRNA has not finished transcription, then the front-most Ribosome cannot move ahead
+        #         of that length transcribed, as that would be unphysical
+        if rnap_attached and candidate[0] > rnap_position:
+            candidate[0] = rnap_position
+
+        # REASON: 2. hindrance between the adjacent Ribosomes. most of the time no ribosome is blocked, which we check
+        #         first. otherwise, the i-th ribosome cannot pass the j-th ribosome ahead of it minus (i-j) ribosome
+        #         sizes, so the new position is the cumulative minimum of candidate[j] + j*RIBO_size shifted back by
+        #         i*RIBO_size. we take the binding candidate[j] directly to avoid adding and removing the large offsets.
+        if self.ribo_attached > 1 and (candidate[1:] > candidate[:-1] - ribo_size).any():
+            index = np.arange(self.ribo_attached)
+            offset = index * ribo_size
+            shifted = candidate + offset
+            blocked = shifted > np.minimum.accumulate(shifted)
+            binding = np.maximum.accumulate(np.where(blocked, 0, index))
+            candidate = candidate[binding] - (offset - offset[binding])
+        if slots is None:
+            attached[:] = candidate
+        else:
+            self.ribo_list[slots] = candidate
 
         # update ribosome position and check for protein production and detached Ribosome
-        prot = 0
         detached = 0
-        for i in range(self.ribo_attached):
-            actual_i = i + self.ribo_detached
-            self.ribo_list[actual_i] += stepping[i]
-            if self.ribo_list[actual_i] > length:
-                detached += 1
-                prot += 1
+        if candidate[0] > setting.length:
+            detached = int(np.count_nonzero(candidate > setting.length))
         self.ribo_detached += detached
         self.ribo_attached -= detached
+        self._head = (self._head + detached) % capacity if self.ribo_attached != 0 else 0
 
-        return prot
+        return detached
@@ -0,0 +1,101 @@
+"""
+===============
+rnap_summary.py
+===============
+
+This file defines the RNAPSummary class, which folds the finished RNAPs of a DNA strand into summary statistics.
+
+A RNAP is finished once its mRNA is degraded, or once it is interrupted, e.g. by falling off the DNA due to high
+supercoiling. Nothing about a finished RNAP changes anymore, so in the compaction mode of the DNAStrand it is added to
+the summary and released, and the memory used by the strand no longer grows with the number of transcripts ever made.
+"""
+import math
+
+from ..interface import DataContainer
+from .setting import Setting
+
+
+class RNAPSummary(DataContainer):
+    """
+    This class accumulates the count, the sum, the running mean and sum of squared deviations, the minimum and the
+    maximum of the quantities of the finished RNAPs.
+
+    Parameters
+    ----------
+    parent : RNAPList or RNAPArray
+        the owner of the RNAPs
+    setting : Setting
+        the setting of the run, used to convert the lifetimes to seconds
+
+    Attributes
+    ----------
+    degraded : int
+        the number of RNAPs whose mRNA is degraded
+    interrupted : int
+        the number of interrupted RNAPs
+    """
+    _quantities = ("lifetime", "ribosomes loaded", "proteins produced")
+
+    def __init__(self, parent, setting: Setting):
+        super().__init__(parent)
+        self.setting = setting
+        self.degraded = 0
+        self.interrupted = 0
+        # REASON: each quantity is [count, sum, mean, sum of squared deviations from the mean, minimum, maximum]. the
+        #         variance is updated by Welford's method, as in EnsembleStatistics, since the difference of the mean
+        #         square and the squared mean loses its precision when the mean is large compared with the spread.
+        self._statistics = {name: [0, 0.0, 0.0, 0.0, math.inf, -math.inf] for name in self._quantities}
+
+    def _add_value(self, name, value):
+        value = float(value)
+        statistic = self._statistics[name]
+        statistic[0] += 1
+        statistic[1] += value
+        delta = value - statistic[2]
+        statistic[2] += delta / statistic[0]
+        statistic[3] += delta * (value - statistic[2])
+        statistic[4] = min(statistic[4], value)
+        statistic[5] = max(statistic[5], value)
+
+    def log(self, lifetime, ribosomes_loaded: int, proteins_produced: int, interrupted: bool = False):
+        """
+        This method adds one finished RNAP.
+
+        Parameters
+        ----------
+        lifetime : int
+            the time steps from the loading of the RNAP to the degradation of its mRNA, None if it is interrupted
+        ribosomes_loaded : int
+            the number of ribosomes loaded on its mRNA
+        proteins_produced : int
+            the number of proteins produced from its mRNA
+        interrupted : bool, optional
+            if the RNAP is interrupted rather than degraded (default is False)
+        """
+        if interrupted:
+            self.interrupted += 1
+        else:
+            self.degraded += 1
+        if lifetime is not None:
+            self._add_value("lifetime", lifetime * self.setting.dt)
+        self._add_value("ribosomes loaded", ribosomes_loaded)
+        self._add_value("proteins produced", proteins_produced)
+
+    def get(self) -> dict:
+        """
+        This method returns the summary.
+
+        Returns
+        -------
+        dict
+            the "degraded" and "interrupted" amounts, and for each of "lifetime" (in seconds, of the degraded mRNAs
+            only), "ribosomes loaded" and "proteins produced" a dict of its "count", "total", "mean", "std", "min" and
+            "max"
+        """
+        summary = {"degraded": self.degraded, "interrupted": self.interrupted}
+        for name, (count, total, mean, m2, minimum, maximum) in self._statistics.items():
+            mean = mean if count else math.nan
+            variance = m2 / count if count else math.nan
+            summary[name] = {"count": count, "total": total, "mean": mean, "std": math.sqrt(variance),
+                             "min": minimum if count else math.nan, "max": maximum if count else math.nan}
+        return summary
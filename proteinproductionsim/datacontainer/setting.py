@@ -5,29 +5,190 @@ setting.py
 
 This class defines the setting class, which store the setting.
 
+A Setting holds the physical and numerical parameters of one run. The defaults are the values of variables.py. The
+quantities used in the hot path, like the scaled time indices and the pace of a paused RNAP, are computed once when
+the Setting is constructed, instead of at every step. A Setting cannot be modified after its construction, use
+replace() to derive a different one.
+
+The pausing sites can be any number of sites. The pause profile of a DNAStrand selects the sites it uses:
+    "flat"          no site
+    "OnepauseAbs"   the first site
+    "TwopauseAbs"   the first two sites
+    "table"         all the sites
 """
+import numpy as np
 
 from ..interface import DataContainer
+from ..helper.pause_site_table import PauseSiteTable
+from .. import variables
 
 
 class Setting(DataContainer):
     """
     This stores the setting of a run. This is used to passed all the setting around.
+
+    Parameters
+    ----------
+    total_time : float, optional
+        the simulation time in seconds
+    dt : float, optional
+        the time step in seconds
+    data_collection_interval : float, optional
+        the interval between two snapshots of the position and supercoiling recorders in seconds
+    data_smoothing_interval : float, optional
+        the smoothing interval of the plots in seconds
+    length : int, optional
+        the length of the gene in bps
+    t_on : float, optional
+        the time the promoter stays open after a RNAP is loaded in seconds
+    pause_site : tuple[int, ...], optional
+        the positions of the pausing sites, they are sorted by position together with their durations and
+        probabilities
+    pause_duration : tuple[float, ...], optional
+        the time spent in each pausing site in seconds
+    pause_prob : float or tuple[float, ...], optional
+        the probability that a RNAP pauses at a pausing site, either the same for all the sites or one for each
+    rnap_size, ribo_size : int, optional
+        the footprints of a RNAP in bps and of a ribosome in nts
+    k_elong : float, optional
+        the elongation speed of the ribosomes in nts per second
+    ribo_loading_interval : float, optional
+        the mean lifetime of the mRNAs with the exponential degradation in seconds
+    k_ribo_loading : float, optional
+        the loading rate of the ribosomes per second
+    initiation_nt : int, optional
+        the length of mRNA needed before a ribosome can load in nts
+    m1, m2, t_crit : float, optional
+        the parameters of the stepwise exponential degradation
+    gamma, v_0, tau_c, tau_0 : float, optional
+        the supercoiling constant, the basic RNAP velocity, the critical torque and the torque constant
+    stalling_supercoiling : float, optional
+        the supercoiling above which a RNAP falls off the DNA
+
+    Attributes
+    ----------
+    multiplier : int
+        the number of time steps in one second
+    total_time_index, t_on_index : int
+        total_time and t_on in index form
+    stage_per_collection : int
+        the number of time steps between two snapshots
+    pause_duration_index : numpy array of int
+        pause_duration in index form
+    pause_pace : numpy array of float
+        the stepping of a RNAP inside each pausing site
+    pause_table : PauseSiteTable
+        the table of all the pausing sites
+    rnap_step : float
+        the stepping of a RNAP without supercoiling, v_0*dt
+    ribo_step : float
+        the stepping of a free ribosome, k_elong*dt
+    ribo_loading_probability : float
+        the probability that a ribosome loading attempt happens in one time step, k_ribo_loading*dt
     """
+    _parameters = ("total_time", "dt", "data_collection_interval", "data_smoothing_interval", "length", "t_on",
+                   "pause_site", "pause_duration", "pause_prob", "rnap_size", "k_elong", "ribo_size",
+                   "ribo_loading_interval", "k_ribo_loading", "initiation_nt", "m1", "m2", "t_crit", "gamma", "v_0",
+                   "tau_c", "tau_0", "stalling_supercoiling")
+
     def __init__(self,
-                 total_time=300.0,
-                 dt = 1/30,
-                 data_collection_interval=1/10,
-                 data_smoothing_interval=5,
-                 length=3072,
-                 t_on=7.8,
-                 stop=90,
-                 pause_profile="flat",
-                 loading_profile="stochastic",
-                 degradation_profile="exponential"
+                 total_time: float = variables.total_time,
+                 dt: float = variables.dt,
+                 data_collection_interval: float = variables.data_collection_interval,
+                 data_smoothing_interval: float = variables.data_smoothing_interval,
+                 length: int = variables.length,
+                 t_on: float = variables.t_on,
+                 pause_site: tuple[int, ...] = tuple(variables.pauseSite),
+                 pause_duration: tuple[float, ...] = tuple(variables.pauseDuration),
+                 pause_prob: float | tuple[float, ...] = variables.pauseProb,
+                 rnap_size: int = variables.RNAP_size,
+                 k_elong: float = variables.k_elong,
+                 ribo_size: int = variables.RIBO_size,
+                 ribo_loading_interval: float = variables.ribo_loading_interval,
+                 k_ribo_loading: float = variables.kRiboLoading,
+                 initiation_nt: int = variables.initiation_nt,
+                 m1: float = variables.m1,
+                 m2: float = variables.m2,
+                 t_crit: float = variables.t_crit,
+                 gamma: float = variables.gamma,
+                 v_0: float = variables.v_0,
+                 tau_c: float = variables.tau_c,
+                 tau_0: float = variables.tau_0,
+                 stalling_supercoiling: float = variables.stalling_supercoiling
                  ):
-        self.parent = None
-        pass
+        super().__init__(None)
+        self.total_time = total_time
+        self.dt = dt
+        self.data_collection_interval = data_collection_interval
+        self.data_smoothing_interval = data_smoothing_interval
+        self.length = length
+        self.t_on = t_on
+        if len(pause_site) != len(pause_duration) or (np.ndim(pause_prob) != 0 and len(pause_prob) != len(pause_site)):
+            raise ValueError("pause_site, pause_duration and pause_prob must be of the same size.")
+        order = np.argsort(np.array(pause_site), kind="stable")
+        self.pause_site = _read_only(np.array(pause_site)[order])
+        self.pause_duration = _read_only(np.array(pause_duration)[order])
+        self.pause_prob = pause_prob if np.ndim(pause_prob) == 0 else tuple(np.array(pause_prob)[order].tolist())
+        self.rnap_size = rnap_size
+        self.k_elong = k_elong
+        self.ribo_size = ribo_size
+        self.ribo_loading_interval = ribo_loading_interval
+        self.k_ribo_loading = k_ribo_loading
+        self.initiation_nt = initiation_nt
+        self.m1 = m1
+        self.m2 = m2
+        self.t_crit = t_crit
+        self.gamma = gamma
+        self.v_0 = v_0
+        self.tau_c = tau_c
+        self.tau_0 = tau_0
+        self.stalling_supercoiling = stalling_supercoiling
+
+        # STEP: the derived quantities, computed the same way as the module-level expressions they replace
+        self.multiplier = int(1/dt)
+        self.total_time_index = self.scaling(total_time)
+        self.t_on_index = self.scaling(t_on)
+        self.stage_per_collection = int(data_collection_interval/dt)
+        self.pause_duration_index = _read_only(np.array([self.scaling(d) for d in self.pause_duration], dtype=int))
+        self.pause_pace = _read_only(1 / self.pause_duration_index)
+        self.pause_table = PauseSiteTable(self.pause_site, self.pause_duration,
+                                          np.broadcast_to(self.pause_prob, self.pause_site.shape), self.pause_pace)
+        self._pause_tables = {"flat": self.pause_table.head(0), "OnepauseAbs": self.pause_table.head(1),
+                              "TwopauseAbs": self.pause_table.head(2), "table": self.pause_table}
+        self.rnap_step = v_0*dt
+        self.ribo_step = k_elong*dt
+        self.ribo_loading_probability = k_ribo_loading*dt
+        self._frozen = True
+
+    def __setattr__(self, name, value):
+        if getattr(self, "_frozen", False):
+            raise AttributeError(f"Setting is immutable, use replace() to change {name}.")
+        super().__setattr__(name, value)
+
+    def __delattr__(self, name):
+        raise AttributeError(f"Setting is immutable, {name} cannot be deleted.")
+
+    def scaling(self, value) -> int:
+        """
+        This method converts a time in seconds to index form.
+        """
+        return int(self.multiplier * value)
+
+    def get_pause_table(self, pause_profile: str) -> PauseSiteTable:
+        """
+        This method returns the table of the pausing sites used by the given pause profile.
+        """
+        if pause_profile not in self._pause_tables:
+            raise ValueError(f"unknown pause profile {pause_profile}, expected one of {list(self._pause_tables)}.")
+        return self._pause_tables[pause_profile]
+
+    def replace(self, **changes):
+        """
+        This method returns a new Setting with the given parameters changed.
+        """
+        parameters = self.get()
+        parameters.update(changes)
+        return Setting(**parameters)
 
     def _init(self):
         pass
@@ -35,8 +196,20 @@ class Setting(DataContainer):
     def log(self):
         pass
 
-    def get(self):
-        pass
+    def get(self) -> dict:
+        """
+        This method returns the parameters of this Setting, with which an equal Setting can be constructed.
+        """
+        parameters = {name: getattr(self, name) for name in self._parameters}
+        parameters["pause_site"] = tuple(parameters["pause_site"].tolist())
+        parameters["pause_duration"] = tuple(parameters["pause_duration"].tolist())
+        return parameters
 
     def plot(self):
         pass
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array.setflags(write=False)
+    return array
+
@@ -6,25 +6,56 @@ dna_strand.py
 This file contains the DNAStrand class.
 """
 from numpy import ndarray
+from numpy.random import Generator
 
 from proteinproductionsim.interface import Entity
-from proteinproductionsim.variables import length, scaling, dt, total_time, v_0, pauseDuration, pauseSite, RNAP_size, \
-    t_on, tau_0, tau_c, stalling_supercoiling
+from proteinproductionsim.datacontainer.setting import Setting
+from proteinproductionsim.datacontainer.rnap_summary import RNAPSummary
 
 from proteinproductionsim.helper.loading_list import LoadingList
-from proteinproductionsim.helper.supercoilling import s, n_dependence_cubic_3
-from proteinproductionsim.helper.general import if_out_of_interval
+from proteinproductionsim.helper.supercoilling import n_dependence_cubic_3, phi_array, torque_array, velocity_array
 from proteinproductionsim.entity.rnap import RNAP
+from proteinproductionsim.entity.rnap_array import RNAPArray
 import numpy as np
 
 
+def generate_rnap_loading_list(parent, rnap_loading_rate: float, rng: Generator, setting: Setting,
+                               rnap_loading_pattern: str = "stochastic",
+                               include_busty_promoter: bool = False) -> LoadingList:
+    """
+    This method generates the RNAP loading list of a DNA strand over the whole simulation time.
+    """
+    if_stochastic = False
+    match rnap_loading_pattern:
+        case "stochastic":
+            if_stochastic = True
+        case "uniform":
+            if_stochastic = False
+    return LoadingList(parent, setting.total_time_index, rnap_loading_rate*setting.dt, if_stochastic=if_stochastic,
+                       if_bursty=include_busty_promoter, rng=rng)
+
+
 class RNAPList:
+    """
+    This class stores and manages the RNAP instances of a DNAStrand.
+
+    The RNAPs are registered in dictionaries keyed by their serial numbers, so that looking up, removing and
+    transferring a RNAP takes constant time. As the RNAPs are loaded in ascending serial number and the dictionaries
+    keep their insertion order, iterating through the attached RNAPs still goes from the front-most to the rear-most.
+
+    Every finished RNAP, i.e. degraded or interrupted, is added to summary. With the compaction mode of the DNAStrand,
+    a finished RNAP is then released instead of being kept in inert_rnap.
+    """
     def __init__(self, dna):
         # basic initiation
         self.dna = dna  # keep the parent instance
-        self.attached_rnap_list: list[RNAP] = []  # this list stores the attached RNAPs instances
-        self.detached_rnap_list: list[RNAP] = []  # this list stores the detached RNAPs instances
-        self.inert_rnap_list: list[RNAP] = []  # this list stores all the deactivated RNAPs instances
+        self.setting: Setting = dna.setting
+        self.attached_rnap: dict[int, RNAP] = {}  # this registry stores the attached RNAPs instances
+        self.detached_rnap: dict[int, RNAP] = {}  # this registry stores the detached RNAPs instances
+        self.inert_rnap: dict[int, RNAP] = {}  # this registry stores all the deactivated RNAPs instances
+        self.summary = RNAPSummary(self, self.setting)  # the summary statistics of the finished RNAPs
+        # REASON: with compaction, the finished RNAPs are dropped, together with their loading lists and ribosomes.
+        self.finished_registry = None if dna.compact_finished_rnap else self.inert_rnap
 
         # variables related to the status of its children mRNAs.
         self.loaded = 0  # number of RNAPs that have been loaded.
@@ -35,87 +66,134 @@ class RNAPList:
         self.interrupted = 0  # number of RNAPs that interrupted.
 
         # adaptive supercoiling
-        self.r_ref: list[float] = []  # reference position of active RNAPs for adaptive supercoiling
-        self.flag_r_ref: list[bool] = []  # boolean for the whether the r_ref is used
+        # REASON: both are keyed by the serial numbers of the attached RNAPs, so they stay aligned with attached_rnap.
+        self.r_ref: dict[int, float] = {}  # reference position of active RNAPs for adaptive supercoiling
+        self.flag_r_ref: dict[int, bool] = {}  # boolean for the whether the r_ref is used
 
     def init(self):
         return
 
-    def transfer_element(self, old_list, new_list, element):
-        if old_list is self.attached_rnap_list:
-            index = self.attached_rnap_list.index(element)
-            self.r_ref.pop(index)
-            self.flag_r_ref.pop(index)
-        old_list.remove(element)
-        new_list.append(element)
+    @property
+    def attached_rnap_list(self) -> list[RNAP]:
+        return list(self.attached_rnap.values())
+
+    @property
+    def detached_rnap_list(self) -> list[RNAP]:
+        return list(self.detached_rnap.values())
+
+    @property
+    def inert_rnap_list(self) -> list[RNAP]:
+        return list(self.inert_rnap.values())
+
+    def transfer_element(self, old_registry, new_registry, element):
+        serial_number = element.serial_number
+        if old_registry is self.attached_rnap:
+            self.r_ref.pop(serial_number)
+            self.flag_r_ref.pop(serial_number)
+        del old_registry[serial_number]
+        if new_registry is not None:
+            new_registry[serial_number] = element
         return True
 
     def if_loading_site_clean(self):
-        if self.loaded == 0:
+        if self.loaded == 0 or len(self.attached_rnap) == 0:
             return True
         if_clean = True
         last_attached_rnap: RNAP = self.get_rear_attached_rnap()
-        if (last_attached_rnap.position - RNAP_size) < 0:
+        if (last_attached_rnap.position - self.setting.rnap_size) < 0:
             if_clean = False
         return if_clean
 
     def attach_rnap(self, **kwargs):
         serial_n = self.loaded
-        self.attached_rnap_list.append(RNAP(self, serial_n=serial_n, **kwargs))
+        rnap = RNAP(self, serial_n=serial_n, rng=self.dna.rng, setting=self.setting, **kwargs)
+        if self.dna.timer is not None:
+            self.dna.timer.instrument(rnap, "step", "RNAP")
+            self.dna.timer.instrument(rnap.RIBO_LIST, "step", "RIBOContainer")
+        self.attached_rnap[serial_n] = rnap
         self.loaded += 1
         self.attached += 1
-        self.r_ref.append(0)
-        self.flag_r_ref.append(False)
+        self.r_ref[serial_n] = 0
+        self.flag_r_ref[serial_n] = False
         pass
 
     def get_attached_serial_number(self) -> list[int]:
-        attached_rnap_serial_number: list[int] = []
-        for i in range(len(self.attached_rnap_list)):
-            attached_rnap_serial_number.append(self.attached_rnap_list[i].serial_number)
-        return attached_rnap_serial_number
+        return list(self.attached_rnap)
 
     def get_detached_serial_number(self) -> list[int]:
-        detached_rnap_serial_number: list[int] = []
-        for i in range(len(self.detached_rnap_list)):
-            detached_rnap_serial_number.append(self.detached_rnap_list[i].serial_number)
-        return detached_rnap_serial_number
+        return list(self.detached_rnap)
 
     def get_position_for_all_attached_rnap(self) -> tuple[list[float], list[int]]:
-        attached_rnap_position: list[float] = []
-        attached_rnap_serial_number: list[int] = []
-        for i in range(len(self.attached_rnap_list)):
-            rnap = self.attached_rnap_list[i]
-            attached_rnap_serial_number.append(rnap.serial_number)
-            attached_rnap_position.append(rnap.position)
-
+        attached_rnap_position: list[float] = [rnap.position for rnap in self.attached_rnap.values()]
+        attached_rnap_serial_number: list[int] = list(self.attached_rnap)
         return attached_rnap_position, attached_rnap_serial_number
 
     def get_supercoiling_ref(self):
-        return self.r_ref, self.flag_r_ref
+        return list(self.r_ref.values()), list(self.flag_r_ref.values())
 
     def get_attached_rnap(self, serial_number):
-        for rnap in self.attached_rnap_list:
-            if rnap.serial_number == serial_number:
-                return rnap
+        return self.attached_rnap.get(serial_number)
 
     def get_detached_rnap(self, serial_number):
-        for rnap in self.detached_rnap_list:
-            if rnap.serial_number == serial_number:
-                return rnap
+        return self.detached_rnap.get(serial_number)
 
     def step(self, time_index, stepping: list[float], serial_number_list: list[int]) -> int:
         prot = 0
         for i in range(len(serial_number_list)):
-            serial_number = serial_number_list[i]
-            rnap = self.get_attached_rnap(serial_number)
+            rnap = self.attached_rnap[serial_number_list[i]]
             prot += rnap.step(time_index, stepping[i])
-        detached_rnap_serial_number_list = self.get_detached_serial_number()
-        for i in range(len(detached_rnap_serial_number_list)):
-            serial_number = detached_rnap_serial_number_list[i]
-            rnap = self.get_detached_rnap(serial_number)
+        # REASON: the RNAPs may be transferred while stepping, so we step a snapshot of the detached RNAPs.
+        for rnap in self.detached_rnap_list:
             prot += rnap.step(time_index, 0.0)
         return prot
 
+    def site_specific_pausing(self, stepping):
+        """
+        This method checks the attached RNAPs for site-specific pausing and modifies the stepping in place.
+        """
+        pause_table = self.dna.pause_table
+        pending_entry = pause_table.pending_entry_list
+        step = stepping.tolist()
+        for count, rnap in enumerate(self.attached_rnap.values()):
+            # REASON: only the pausing RNAPs and the ones reaching the entry of their next pending site can change.
+            if rnap.pausing_site >= 0 or rnap.position + step[count] >= pending_entry[rnap.next_pause]:
+                stepping[count] = pause_table.apply_to_rnap(rnap, step[count])
+
+    def resolve_hindrance(self, stepping):
+        """
+        This method checks the attached RNAPs for hindrance and modifies the stepping in place.
+        """
+        attached_rnap_list = self.attached_rnap_list
+        rnap_size = self.setting.rnap_size
+        for i in range(len(attached_rnap_list)):
+            rnap = attached_rnap_list[i]
+            # REASON: if this rnap is not attached, we do not need to worry about it.
+            # REASON: if this rnap is the front-most attached rnap, we also do not need to care about it.
+            if i == 0:
+                continue
+            # REASON: if this rnap is going to move past its front rnap, then a collision happens,
+            #         and we need to set its position such that it sit right between its front rnap with a distance of
+            #         rnap_size.
+            else:
+                previous_rnap_end_position = attached_rnap_list[i-1].position+stepping[i - 1]-rnap_size
+                if rnap.position + stepping[i] > previous_rnap_end_position:
+                    stepping[i] = previous_rnap_end_position - rnap.position
+
+    def process_rnap_fall_off(self, serial_number):
+        rnap = self.attached_rnap[serial_number]
+        self.call_back("high_supercoiling_fall_off", rnap)
+
+    def reset_rear_r_ref(self, if_flag=False):
+        """
+        This method sets the reference position of the rear-most attached RNAP to its current position.
+        """
+        if len(self.attached_rnap) == 0:
+            return
+        rnap = self.get_rear_attached_rnap()
+        self.r_ref[rnap.serial_number] = rnap.position
+        if if_flag:
+            self.flag_r_ref[rnap.serial_number] = True
+
     def call_back(self, operation: str, entity: RNAP):
         match operation:
             case "attached":
@@ -123,12 +201,14 @@ class RNAPList:
             case "detached":
                 self.attached -= 1
                 self.detached += 1
-                self.transfer_element(self.attached_rnap_list, self.detached_rnap_list, entity)
+                self.transfer_element(self.attached_rnap, self.detached_rnap, entity)
             case "degrading":
                 self.degrading += 1
             case "degraded":
                 self.degraded += 1
-                self.transfer_element(self.detached_rnap_list, self.inert_rnap_list, entity)
+                self.summary.log(entity.degraded_time - entity.initial_t, entity.RIBO_LIST.ribo_loaded,
+                                 entity.RIBO_LIST.ribo_detached)
+                self.transfer_element(self.detached_rnap, self.finished_registry, entity)
             case "interrupted":
                 self.attached -= 1
                 self.interrupted += 1
@@ -139,55 +219,67 @@ class RNAPList:
                 self.process_rnap_interruption(entity)
 
     def process_rnap_detachment(self, entity: RNAP):
-        idx = self.attached_rnap_list.index(entity)
-        self.transfer_element(self.attached_rnap_list, self.detached_rnap_list, entity)
-        self.r_ref.pop(idx)
-        self.flag_r_ref.pop(idx)
+        self.transfer_element(self.attached_rnap, self.detached_rnap, entity)
 
     def process_rnap_interruption(self, entity: RNAP):
 
-        if entity in self.attached_rnap_list:
+        if entity.serial_number in self.attached_rnap:
             self.accumulate_r_ref_to_the_front_rnap(entity)
-            self.transfer_element(self.attached_rnap_list, self.inert_rnap_list, entity)
-        elif entity in self.detached_rnap_list:
-            self.transfer_element(self.detached_rnap_list, self.detached_rnap_list, entity)
+            self.summary.log(None, entity.RIBO_LIST.ribo_loaded, entity.RIBO_LIST.ribo_detached, interrupted=True)
+            self.transfer_element(self.attached_rnap, self.finished_registry, entity)
+        elif entity.serial_number in self.detached_rnap:
+            self.transfer_element(self.detached_rnap, self.detached_rnap, entity)
 
     def get_rear_attached_rnap(self) -> RNAP:
-        return self.attached_rnap_list[-1]
+        return next(reversed(self.attached_rnap.values()))
 
     def get_position_for_recorder(self):
         data = np.zeros(self.attached)
         serial_number = np.zeros(self.attached, dtype=int)
-        for i in range(len(self.attached_rnap_list)):
-            data[i] = self.attached_rnap_list[i].position
-            serial_number[i] = self.attached_rnap_list[i].serial_number
+        for i, rnap in enumerate(self.attached_rnap.values()):
+            data[i] = rnap.position
+            serial_number[i] = rnap.serial_number
         return data, serial_number
 
     def accumulate_r_ref_to_the_front_rnap(self, entity: RNAP):
-        # STEP: get RNAP index
-        idx = self.attached_rnap_list.index(entity)
-        if idx == 0:
+        # STEP: get the serial number of the front rnap, this walk only happens when a RNAP falls off.
+        front_serial_number = None
+        for serial_number in self.r_ref:
+            if serial_number == entity.serial_number:
+                break
+            front_serial_number = serial_number
+        if front_serial_number is None:
             return
 
         # STEP: accumulate r_ref to the front rnap
-        self.r_ref[idx-1] += self.r_ref[idx]
+        self.r_ref[front_serial_number] += self.r_ref[entity.serial_number]
         return
 
 
 class DNAStrand(Entity):
     """
     This class represents the DNA strand.
+
+    The parameters of the run are read from setting, a default Setting is used if it is not given. implemented_t_on
+    and the supercoiling fall-off bounds default to the values of the setting.
+
+    With compact_finished_rnap, the RNAPs whose mRNA is degraded or which are interrupted are folded into the summary
+    statistics of the RNAP_LIST and released, so the memory of a long run does not grow with the number of
+    transcripts. Only get_rnap_summary() is available for them afterwards.
     """
     def __init__(self, environment, rnap_loading_rate, include_supercoiling=True, include_busty_promoter=False,
                  rnap_loading_pattern="stochastic", promoter_shut_off_time=-1, pause_profile="flat",
                  ribo_loading_profile="stochastic", degradation_profile="exponential",
                  protein_production_off: bool = False, if_storing_supercoiling_value: bool = False,
-                 implemented_t_on: float = t_on,
+                 implemented_t_on: float = None,
                  if_rnap_fall_off_from_supercoiling: bool = False, rnap_fall_off_amount: int = 5,
-                 supercoiling_fall_off_upper: float = stalling_supercoiling,
-                 supercoiling_fall_off_lower: float = -stalling_supercoiling):
+                 supercoiling_fall_off_upper: float = None,
+                 supercoiling_fall_off_lower: float = None,
+                 rnap_engine: str = "object", rng: Generator = None, setting: Setting = None,
+                 compact_finished_rnap: bool = False):
         super().__init__(environment)
-        self.length: int = length
+        self.setting = setting if setting is not None else Setting()
+        self.length: int = self.setting.length
         self.rnap_loading_rate: float = rnap_loading_rate
 
         # settings
@@ -198,52 +290,50 @@ class DNAStrand(Entity):
         self.ribo_loading_pattern = ribo_loading_profile
         self.degradation_profile = degradation_profile
         self.protein_production_off = protein_production_off
-        self.t_on = implemented_t_on
+        self.compact_finished_rnap = compact_finished_rnap
+        self.t_on = implemented_t_on if implemented_t_on is not None else self.setting.t_on
+        self.t_on_index = self.setting.scaling(self.t_on)
+        # REASON: all the random draws of this strand and its RNAPs come from this generator.
+        self.rng = rng if rng is not None else np.random.default_rng()
         self.if_rnap_fall_off_from_supercoiling = if_rnap_fall_off_from_supercoiling
         self.maximum_rnap_fall_off_amount = rnap_fall_off_amount
         self.rnap_fall_off_amount = 0
-        self.supercoiling_fall_off_upper = supercoiling_fall_off_upper
-        self.supercoiling_fall_off_lower = supercoiling_fall_off_lower
+        self.supercoiling_fall_off_upper = supercoiling_fall_off_upper if supercoiling_fall_off_upper is not None \
+            else self.setting.stalling_supercoiling
+        self.supercoiling_fall_off_lower = supercoiling_fall_off_lower if supercoiling_fall_off_lower is not None \
+            else -self.setting.stalling_supercoiling
 
         # setup loading list.
-        if_stochastic = False
-        match self.rnap_loading_pattern:
-            case "stochastic":
-                if_stochastic = True
-            case "uniform":
-                if_stochastic = False
-        if self.include_busty_promoter:
-            self.loading_list = LoadingList(self, scaling(total_time), self.rnap_loading_rate*dt,
-                                            if_stochastic=if_stochastic, if_bursty=True)
-        else:
-            self.loading_list = LoadingList(self, scaling(total_time), self.rnap_loading_rate*dt,
-                                            if_stochastic=if_stochastic, if_bursty=False)
+        self.loading_list = generate_rnap_loading_list(self, self.rnap_loading_rate, self.rng, self.setting,
+                                                       self.rnap_loading_pattern, self.include_busty_promoter)
 
         # promoter_state
         self.promoter_state = False
         if promoter_shut_off_time == -1:
-            self.T_stop = scaling(total_time)
+            self.T_stop = self.setting.total_time_index
         elif promoter_shut_off_time >= 0:
-            self.T_stop = scaling(promoter_shut_off_time)
+            self.T_stop = self.setting.scaling(promoter_shut_off_time)
             self.loading_list.trim(self.T_stop)
 
         # Site-Specific Pausing
-        self.include_site_specific_pausing = True
-        match self.pause_profile:
-            case "flat":
-                self.include_site_specific_pausing = False
-            case "OnepauseAbs":
-                self.n_pause = 1
-            case "TwopauseAbs":
-                self.n_pause = 2
+        self.pause_table = self.setting.get_pause_table(self.pause_profile)
+        self.n_pause = self.pause_table.size
+        self.include_site_specific_pausing = self.n_pause != 0
 
         # mRNA Degradation
-        self.RNAP_LIST = RNAPList(self)
+        # REASON: the "object" engine keeps one RNAP instance for each RNAP, the "array" engine keeps the state of all
+        #         RNAPs in numpy columns and steps them and their ribosomes at once. the array engine is faster once a
+        #         few RNAPs are on the strand at the same time, the object engine has less overhead per step when the
+        #         strand is mostly empty, e.g. with a low loading rate or a bursty promoter.
+        self.rnap_engine = rnap_engine
+        match self.rnap_engine:
+            case "object":
+                self.RNAP_LIST = RNAPList(self)
+            case "array":
+                self.RNAP_LIST = RNAPArray(self)
 
         # adaptive supercoiling
-        self.r_ref = self.RNAP_LIST.r_ref
-        self.flag_r_ref = self.RNAP_LIST.flag_r_ref
-        self.T_open = scaling(total_time)
+        self.T_open = self.setting.total_time_index
         self.just_loaded = False
 
         # storage
@@ -256,12 +346,61 @@ class DNAStrand(Entity):
         self.serial_number = None
         self.protein_amount = 0
 
+        # instrumentation, see enable_timer()
+        self.timer = None
+
     def init(self):
         self.RNAP_LIST.init()
         pass
 
+    def enable_timer(self, timer):
+        """
+        This method times the phases of the steps of this strand, its RNAPs and their ribosomes with the PhaseTimer
+        timer. It should be called before the first step.
+        """
+        self.timer = timer
+        timer.instrument(self, "step", "DNAStrand")
+        timer.instrument(self, "load_rnap", "DNAStrand", "loading")
+        timer.instrument(self, "switch_promoter", "DNAStrand", "promoter switching")
+        timer.instrument(self, "supercoiling", "DNAStrand")
+        timer.instrument(self, "rnap_fall_off", "DNAStrand", "rnap fall off")
+        entity = type(self.RNAP_LIST).__name__
+        timer.instrument(self.RNAP_LIST, "site_specific_pausing", entity, "site-specific pausing")
+        timer.instrument(self.RNAP_LIST, "resolve_hindrance", entity, "hindrance")
+        timer.instrument(self.RNAP_LIST, "step", entity)
+        if isinstance(self.RNAP_LIST, RNAPArray):
+            # REASON: the RNAPArray steps the ribosomes of all its mRNAs at once, which is timed as their step.
+            timer.instrument(self.RNAP_LIST, "_ribo_step", "RIBOContainer", "step")
+
     def step(self, time_index):
+        # REASON: check for loading and load one RNAP if it can
+        self.load_rnap(time_index)
+
+        # REASON: check the promoter closing and the permanent promoter shutoff
+        self.switch_promoter(time_index)
+
+        # REASON: calculate stepping
+        if self.include_supercoiling:
+            stepping, serial_numbers = self.supercoiling()
+        else:
+            serial_numbers = self.RNAP_LIST.get_attached_serial_number()
+            stepping = np.full(self.RNAP_LIST.attached, self.setting.rnap_step)
+
+        # REASON: check for site-specific pausing and set pausing.
+        if self.include_site_specific_pausing and self.RNAP_LIST.attached != 0:
+            self.RNAP_LIST.site_specific_pausing(stepping)
+
+        # REASON: check for hindrance and modify stepping
+        self.RNAP_LIST.resolve_hindrance(stepping)
 
+        # REASON: now we plug in the stepping into the RNAPs and collect protein production from all RNAP.
+        prot = self.RNAP_LIST.step(time_index, stepping, serial_numbers)
+
+        # return protein production
+        self.protein_amount += prot
+        return prot
+
+    def load_rnap(self, time_index):
         # REASON: time to check for loading
         to_load = False
 
@@ -276,17 +415,18 @@ class DNAStrand(Entity):
         # REASON: if it can load, then load one RNAP
         if to_load:
             if self.include_supercoiling:
-                self.T_open = time_index + scaling(self.t_on)
+                self.T_open = time_index + self.t_on_index
                 self.promoter_state = True
                 self.just_loaded = True
                 if self.RNAP_LIST.loaded > 0:
-                    self.r_ref[-1] = self.RNAP_LIST.attached_rnap_list[-1].position
-                    self.flag_r_ref[-1] = True
+                    self.RNAP_LIST.reset_rear_r_ref(if_flag=True)
 
             self.RNAP_LIST.attach_rnap(initial_t=time_index, pause_profile=self.pause_profile,
                                        ribo_loading_profile=self.ribo_loading_pattern,
                                        degradation_profile=self.degradation_profile,
                                        protein_production_off=self.protein_production_off)
+
+    def switch_promoter(self, time_index):
         # REASON: check the promoter closing resulting from the RNAP loading
         if self.just_loaded and time_index >= self.T_open and self.promoter_state:
             # REASON: switch the promoter
@@ -294,132 +434,58 @@ class DNAStrand(Entity):
             self.promoter_state = False
             if self.RNAP_LIST.loaded != 0:
                 # REASON: we reset the reference position of the last RNAP
-                self.r_ref[-1] = self.RNAP_LIST.get_rear_attached_rnap().position
+                self.RNAP_LIST.reset_rear_r_ref()
 
         # REASON: check for permanent promoter shutoff
         if time_index >= self.T_stop and self.promoter_state:
             self.promoter_state = False
             if self.RNAP_LIST.loaded != 0:
-                value = self.RNAP_LIST.attached_rnap_list[-1].position
-                self.r_ref[-1] = value
-
-        # REASON: calculate stepping
-        if self.include_supercoiling:
-            stepping, serial_numbers = self.supercoiling()
-        else:
-            stepping = []
-            serial_numbers = self.RNAP_LIST.get_attached_serial_number()
-            for i in range(self.RNAP_LIST.attached):
-                stepping.append(v_0*dt)
-
-        # REASON: check for site-specific pausing and set pausing.
-        if self.include_site_specific_pausing and self.RNAP_LIST.attached != 0:
-            for count, rnap in enumerate(self.RNAP_LIST.attached_rnap_list):
-                # REASON: if passed both, then just skip
-                if rnap.passed_site_1 and rnap.passed_site_2:
-                    continue
-
-                if not rnap.passed_site_1:
-                    # REASON: check if the rnap is still in the pause site.
-                    if rnap.passing_1 and rnap.position + 1 / scaling(pauseDuration[0]) < pauseSite[0]:
-                        stepping[count] = 1 / scaling(pauseDuration[0])
-                        continue
-
-                    # REASON: passing out of the pausing site.
-                    if rnap.passing_1 and rnap.position + 1 / scaling(pauseDuration[0]) >= pauseSite[0]:
-                        self.RNAP_LIST.attached_rnap_list[count].passing_1 = False
-                        self.RNAP_LIST.attached_rnap_list[count].passed_site_1 = True
-                        continue
-
-                    # REASON: passing into the pause_site 1
-                    if rnap.position < (pauseSite[0] - 1) and ((rnap.position + stepping[count]) >= pauseSite[0] - 1):
-                        self.RNAP_LIST.attached_rnap_list[count].passing_1 = True
-                        self.RNAP_LIST.attached_rnap_list[count].position = pauseSite[0] - 1
-                        stepping[count] = 0
-                        continue
-
-                if not rnap.passed_site_2:
-                    if rnap.passing_2 and rnap.position + 1 / scaling(pauseDuration[1]) < pauseSite[1]:
-                        stepping[count] = 1 / scaling(pauseDuration[1])
-                        continue
-
-                    # REASON: passing out of the pausing site.
-                    if rnap.passing_2 and rnap.position + 1 / scaling(pauseDuration[1]) >= pauseSite[1]:
-                        self.RNAP_LIST.attached_rnap_list[count].passing_2 = False
-                        self.RNAP_LIST.attached_rnap_list[count].passed_site_2 = True
-                        continue
-
-                    # REASON: passing into the pause_site 2
-                    if rnap.position < (pauseSite[1] - 1) and ((rnap.position + stepping[count]) >= pauseSite[1] - 1):
-                        self.RNAP_LIST.attached_rnap_list[count].passing_2 = True
-                        self.RNAP_LIST.attached_rnap_list[count].position = pauseSite[1] - 1
-                        stepping[count] = 0
-                        continue
-
-        # REASON: check for hindrance and modify stepping
-        for i in range(len(self.RNAP_LIST.attached_rnap_list)):
-            rnap = self.RNAP_LIST.attached_rnap_list[i]
-            # REASON: if this rnap is not attached, we do not need to worry about it.
-            # REASON: if this rnap is the front-most attached rnap, we also do not need to care about it.
-            if i == 0:
-                continue
-            # REASON: if this rnap is going to move past its front rnap, then a collision happens,
-            #         and we need to set its position such that it sit right between its front rnap with a distance of
-            #         RNAP_size.
-            else:
-                previous_rnap_end_position = self.RNAP_LIST.attached_rnap_list[i-1].position+stepping[i - 1]-RNAP_size
-                if rnap.position + stepping[i] > previous_rnap_end_position:
-                    stepping[i] = previous_rnap_end_position - rnap.position
-
-        # REASON: now we plug in the stepping into the RNAPs and collect protein production from all RNAP.
-        prot = self.RNAP_LIST.step(time_index, stepping, serial_numbers)
-
-        # return protein production
-        self.protein_amount += prot
-        return prot
+                self.RNAP_LIST.reset_rear_r_ref()
+
+    def get_next_event_time(self, time_index):
+        """
+        This method returns the earliest time index, not before time_index, at which a step can change the strand.
+
+        The strand is idle when no RNAP is attached or detached, in which case only a loading attempt, the promoter
+        closing or the promoter shut off can change it. Otherwise, time_index itself is returned.
+        """
+        if self.RNAP_LIST.attached != 0 or self.RNAP_LIST.detached != self.RNAP_LIST.degraded:
+            return time_index
+        next_event = self.setting.total_time_index
+        if not self.loading_list.if_empty():
+            next_event = min(next_event, self.loading_list.get_current())
+        if self.promoter_state:
+            next_event = min(next_event, self.T_stop)
+            if self.just_loaded:
+                next_event = min(next_event, self.T_open)
+        return max(next_event, time_index)
+
+    def get_rnap_summary(self) -> dict:
+        """
+        This method returns the summary statistics of the finished RNAPs, see RNAPSummary.get().
+        """
+        return self.RNAP_LIST.summary.get()
 
     def supercoiling(self):
         # STEP: setup
         positions, serial_number = self.RNAP_LIST.get_position_for_all_attached_rnap()
         r_ref, flag_r_ref = self.RNAP_LIST.get_supercoiling_ref()
         size = len(positions)
-        positions = np.array(positions)
+        positions = np.array(positions, dtype=float)
+        serial_number = np.array(serial_number, dtype=int)
+
+        setting = self.setting
 
         # STEP: phi generation
-        phi: ndarray = np.zeros(size+1)
-        for i in range(size + 1):
-            if i == 0:  # STEP: check the front-most element
-                phi[i] = 0.0
-            elif i == size:  # STEP: check the back-most element
-                if self.promoter_state:  # STEP: check if the repressor is off. The supercoiling is diffused
-                    phi[i] = 0.0
-                else:  # STEP: check if the repressor is attached, full supercoiling.
-                    travel_dist_last_rnap = positions[i-1] - r_ref[i - 1]
-                    phi[i] = s(travel_dist_last_rnap)
-            else:  # STEP: check the middle element
-                travel_dist_last_rnap = positions[i - 1] - r_ref[i - 1]
-                phi[i] = s(travel_dist_last_rnap - positions[i])
-                # not passed the location
+        phi: ndarray = phi_array(positions, np.array(r_ref, dtype=float), self.promoter_state, setting.gamma)
 
         # STEP: torque generation
-        torq = np.zeros(size)
         n = n_dependence_cubic_3(size)
-
-        for i in range(size):
-            torq[i] = -tau_0 * n * (phi[i]-phi[i+1])
+        torq = torque_array(phi, n, setting.tau_0)
 
         # STEP: velocity generation
-        velo = np.zeros(size)
-
-        for i in range(size):
-            # REASON: we are using this for loop, to avoid large value generated from the exponential function.
-            if torq[i] > 1.5 * tau_c:
-                velo[i] = 0
-            elif torq[i] < -1.5 * tau_c:
-                velo[i] = 2 * v_0
-            else:
-                velo[i] = 2 * v_0 / (1 + np.exp(2 * (torq[i] / tau_c) ** 3))
-        stepping: np.ndarray = velo*dt
+        velo = velocity_array(torq, setting.tau_c, setting.v_0)
+        stepping: np.ndarray = velo*setting.dt
 
         # STEP: checking for RNAP fall-off due to high supercoiling
         if self.if_rnap_fall_off_from_supercoiling:
@@ -436,28 +502,22 @@ class DNAStrand(Entity):
         return stepping, serial_number
 
     def rnap_fall_off(self, phi, stepping, serial_number_list):
-        corrected_phi = []
-        corrected_stepping = []
-        corrected_serial_number_list = []
-
-        # STEP: find all the RNAPs that have high supercoiling
-        high_supercoiling_rnap_serial_number_list = []
-        for i in range(len(serial_number_list)):
-            if if_out_of_interval(phi[i], -1, stalling_supercoiling) \
-                    and self.rnap_fall_off_amount < self.maximum_rnap_fall_off_amount:
-                self.rnap_fall_off_amount += 1
-                high_supercoiling_rnap_serial_number_list.append(serial_number_list[i])
-            else:
-                corrected_phi.append(phi[i])
-                corrected_stepping.append(stepping[i])
-                corrected_serial_number_list.append(serial_number_list[i])
+        # STEP: find all the RNAPs that have high supercoiling, only the first ones are allowed to fall off until the
+        #       maximum fall-off amount is reached.
+        size = len(serial_number_list)
+        out_of_interval = (phi[:size] >= self.setting.stalling_supercoiling) | (phi[:size] < -1)
+        fall_off_index = np.flatnonzero(out_of_interval)
+        fall_off_index = fall_off_index[:max(self.maximum_rnap_fall_off_amount - self.rnap_fall_off_amount, 0)]
+        if fall_off_index.size == 0:
+            return phi[:size], stepping, serial_number_list
+        self.rnap_fall_off_amount += fall_off_index.size
+        keep = np.ones(size, dtype=bool)
+        keep[fall_off_index] = False
 
         # STEP: Remove all such rnap from the active_rnap_list
         #       Also remove the stepping of removed rnap
-        for i in range(len(high_supercoiling_rnap_serial_number_list)):
-            serial_n = high_supercoiling_rnap_serial_number_list[i]
-            rnap = self.RNAP_LIST.get_attached_rnap(serial_n)
-            self.RNAP_LIST.call_back("high_supercoiling_fall_off", rnap)
+        for serial_n in serial_number_list[fall_off_index]:
+            self.RNAP_LIST.process_rnap_fall_off(serial_n)
 
         # STEP: return the corrected stepping and serial_number_list
-        return corrected_phi, corrected_stepping, corrected_serial_number_list
+        return phi[:size][keep], stepping[keep], serial_number_list[keep]
@@ -0,0 +1,467 @@
+"""
+===================
+dna_strand_batch.py
+===================
+
+This file contains the DNAStrandBatch class, which simulates many independent replicates of the same DNA strand in
+lockstep.
+
+The state of the RNAPs of all the replicates is kept in padded 2-D numpy arrays of shape (batch size, window), where
+the j-th column of a replicate is its (base + j)-th loaded RNAP. The ribosomes attached to each mRNA are kept in a 3-D
+array of shape (batch size, window, ribosome capacity), the front-most attached ribosome first. Loading, promoter
+switching, supercoiling, site-specific pausing, hindrance and ribosome stepping are each applied once per time step
+across the whole batch, following the same rules as the DNAStrand with the RNAPList.
+
+Degraded mRNAs at the head of the window are dropped when a replicate runs out of columns, so the window only grows
+with the number of mRNAs alive at the same time.
+
+The rows do not have to be replicates of the same gene. The RNAP loading rate and the pause profile can be given for
+each row, and so can a Setting in gene_setting, e.g. a panel of genes of different lengths, promoter opening times,
+pausing sites, ribosome loading rates and mRNA lifetimes. Only the time and the physical constants of the RNAPs and
+ribosomes, listed in _shared_parameters, must be the same for all the rows, as the step is applied once across them.
+"""
+import numpy as np
+from numpy.random import Generator
+
+from proteinproductionsim.interface import Entity
+from proteinproductionsim.datacontainer.setting import Setting
+from proteinproductionsim.helper.supercoilling import s, n_dependence_cubic_3, velocity_array
+from proteinproductionsim.entity.dna_strand import generate_rnap_loading_list
+from proteinproductionsim.entity.rnap import generate_pause_state, generate_degradation_time, \
+    generate_ribo_loading_list
+from proteinproductionsim.entity.rnap_array import resolve_hindrance
+
+
+class DNAStrandBatch(Entity):
+    """
+    This class represents a batch of independent replicates of the DNA strand.
+
+    Parameters
+    ----------
+    environment : Environment
+        the parent environment
+    rnap_loading_rate : float or array_like of float
+        the loading rate of RNAPs, the same for all the replicates or one for each
+    batch_size : int
+        the number of replicates
+    window : int, optional
+        the initial number of RNAP columns of each replicate, it grows when needed (default is 32)
+    rng : list[Generator], optional
+        the random generator of each replicate, fresh ones are used if not given
+    setting : Setting, optional
+        the setting of the run, shared by all the replicates, a default Setting is used if not given
+    pause_profile : str or list[str], optional
+        the pause profile, the same for all the replicates or one for each (default is "flat")
+    gene_setting : list[Setting], optional
+        the setting of each replicate, its parameters in _shared_parameters must be those of setting. setting is used
+        for all the replicates if not given.
+
+    The other keyword arguments are the same as those of the DNAStrand. The fall-off of RNAPs due to high
+    supercoiling is not supported.
+
+    Attributes
+    ----------
+    length, t_on_index : numpy array of int
+        the length of the gene and the time the promoter stays open in index form of each replicate
+    loaded, attached, detached, degrading, degraded : numpy array of int
+        the RNAP counters of each replicate, the same as the counters of the RNAPList
+    protein_amount : numpy array of int
+        the total amount of proteins produced by each replicate
+    """
+    _rnap_columns = ("position", "initial_t", "t_degrade", "r_ref", "flag_r_ref", "passed_site", "pausing_site",
+                     "next_pause", "is_attached", "is_degrading", "is_degraded", "is_initiated", "next_ribo_loading",
+                     "ribo_attached", "ribo_loaded", "ribo_position", "ribo_loading_list")
+    _shared_parameters = ("total_time", "dt", "data_collection_interval", "rnap_size", "k_elong", "ribo_size",
+                          "initiation_nt", "gamma", "v_0", "tau_c", "tau_0")
+
+    def __init__(self, environment, rnap_loading_rate, batch_size: int, include_supercoiling=True,
+                 include_busty_promoter=False, rnap_loading_pattern="stochastic", promoter_shut_off_time=-1,
+                 pause_profile="flat", ribo_loading_profile="stochastic", degradation_profile="exponential",
+                 protein_production_off: bool = False, implemented_t_on: float = None,
+                 if_rnap_fall_off_from_supercoiling: bool = False, window: int = 32, rng: list[Generator] = None,
+                 setting: Setting = None, gene_setting: list[Setting] = None):
+        super().__init__(environment)
+        if if_rnap_fall_off_from_supercoiling:
+            raise ValueError("DNAStrandBatch does not support the RNAP fall-off from supercoiling.")
+        self.setting = setting if setting is not None else Setting()
+        self.batch_size = batch_size
+        self.gene_setting = list(gene_setting) if gene_setting is not None else [self.setting] * batch_size
+        if len(self.gene_setting) != batch_size:
+            raise ValueError(f"gene_setting has {len(self.gene_setting)} Settings, expected {batch_size}.")
+        shared = {name: getattr(self.setting, name) for name in self._shared_parameters}
+        for gene_setting in self.gene_setting:
+            different = [name for name, value in shared.items() if getattr(gene_setting, name) != value]
+            if different:
+                raise ValueError(f"the parameters {different} must be the same for all the replicates.")
+        self.length = np.array([gene_setting.length for gene_setting in self.gene_setting], dtype=int)
+        self.rnap_loading_rate = rnap_loading_rate
+
+        # settings
+        self.include_supercoiling = include_supercoiling
+        self.include_busty_promoter = include_busty_promoter
+        self.rnap_loading_pattern = rnap_loading_pattern
+        self.pause_profile = pause_profile
+        self._pause_profile = [pause_profile] * batch_size if isinstance(pause_profile, str) else list(pause_profile)
+        self.ribo_loading_pattern = ribo_loading_profile
+        self.degradation_profile = degradation_profile
+        self.protein_production_off = protein_production_off
+        self.t_on = np.array([implemented_t_on if implemented_t_on is not None else gene_setting.t_on
+                              for gene_setting in self.gene_setting])
+        self.t_on_index = np.array([self.setting.scaling(t_on) for t_on in self.t_on], dtype=int)
+        self.pause_table = [gene_setting.get_pause_table(pause_profile)
+                            for gene_setting, pause_profile in zip(self.gene_setting, self._pause_profile)]
+        # REASON: the pausing is applied once for each distinct table, to all the replicates using it.
+        self._pause_group = {}
+        for replicate, pause_table in enumerate(self.pause_table):
+            if pause_table.size != 0:
+                self._pause_group.setdefault(id(pause_table), (pause_table, np.zeros(batch_size, dtype=bool)))
+                self._pause_group[id(pause_table)][1][replicate] = True
+        self.include_site_specific_pausing = len(self._pause_group) != 0
+        # REASON: each replicate draws from its own generator, so replicate i follows the same sample path as a
+        #         DNAStrand given the same generator.
+        self.rng = rng if rng is not None else [np.random.default_rng() for _ in range(batch_size)]
+
+        # promoter_state
+        if promoter_shut_off_time == -1:
+            self.T_stop = self.setting.total_time_index
+        elif promoter_shut_off_time >= 0:
+            self.T_stop = self.setting.scaling(promoter_shut_off_time)
+
+        # setup loading list for each replicate.
+        rnap_loading_rate = np.broadcast_to(rnap_loading_rate, (batch_size,))
+        self.loading_list = []
+        for replicate in range(batch_size):
+            loading_list = generate_rnap_loading_list(self, rnap_loading_rate[replicate], self.rng[replicate],
+                                                      self.gene_setting[replicate], self.rnap_loading_pattern,
+                                                      self.include_busty_promoter)
+            if promoter_shut_off_time >= 0:
+                loading_list.trim(self.T_stop)
+            self.loading_list.append(loading_list)
+        self.next_rnap_loading = np.array([np.inf if loading_list.if_empty() else loading_list.get_current()
+                                           for loading_list in self.loading_list], dtype=float)
+        self.promoter_state = np.zeros(batch_size, dtype=bool)
+        self.just_loaded = np.zeros(batch_size, dtype=bool)
+        self.T_open = np.full(batch_size, self.setting.total_time_index)
+
+        # counters for each replicate
+        self.loaded = np.zeros(batch_size, dtype=int)
+        self.attached = np.zeros(batch_size, dtype=int)
+        self.detached = np.zeros(batch_size, dtype=int)
+        self.degrading = np.zeros(batch_size, dtype=int)
+        self.degraded = np.zeros(batch_size, dtype=int)
+        self.protein_amount = np.zeros(batch_size, dtype=int)
+
+        # the RNAP columns of each replicate, the j-th column is the (base + j)-th loaded RNAP
+        self.base = np.zeros(batch_size, dtype=int)
+        self.window = window
+        shape = (batch_size, window)
+        self.position = np.zeros(shape, dtype=float)
+        self.initial_t = np.zeros(shape, dtype=int)
+        self.t_degrade = np.zeros(shape, dtype=int)
+        self.r_ref = np.zeros(shape, dtype=float)
+        self.flag_r_ref = np.zeros(shape, dtype=bool)
+        self.passed_site = np.zeros(shape + (max(pause_table.size for pause_table in self.pause_table),), dtype=bool)
+        self.pausing_site = np.full(shape, -1, dtype=int)
+        self.next_pause = np.zeros(shape, dtype=int)
+        self.is_attached = np.zeros(shape, dtype=bool)
+        self.is_degrading = np.zeros(shape, dtype=bool)
+        self.is_degraded = np.zeros(shape, dtype=bool)
+        self.is_initiated = np.zeros(shape, dtype=bool)
+        self.next_ribo_loading = np.full(shape, np.inf)
+        self.ribo_attached = np.zeros(shape, dtype=int)
+        self.ribo_loaded = np.zeros(shape, dtype=int)
+        self.ribo_position = np.zeros(shape + (8,), dtype=float)
+        self.ribo_loading_list = np.empty(shape, dtype=object)
+
+    def init(self):
+        pass
+
+    def _used(self) -> np.ndarray:
+        return np.arange(self.window) < (self.loaded - self.base)[:, None]
+
+    def _rear_column(self) -> np.ndarray:
+        return self.loaded - self.base - 1
+
+    def _compact(self):
+        """
+        This method drops the leading degraded columns of each replicate and grows the window if it is still full.
+        """
+        # REASON: the shift of each replicate is the number of its leading degraded columns.
+        leading = np.pad(self.is_degraded & self._used(), ((0, 0), (0, 1)))
+        shift = np.argmin(leading, axis=1)
+        if shift.any():
+            index = np.minimum(np.arange(self.window)[None, :] + shift[:, None], self.window - 1)
+            for name in self._rnap_columns:
+                column = getattr(self, name)
+                column_index = index.reshape(index.shape + (1,) * (column.ndim - 2))
+                setattr(self, name, np.take_along_axis(column, column_index, axis=1))
+            self.base += shift
+            # REASON: the columns after the rear one are not used, so their flags are cleared.
+            unused = ~self._used()
+            for name in ("is_attached", "is_degrading", "is_degraded", "is_initiated"):
+                getattr(self, name)[unused] = False
+            self.ribo_attached[unused] = 0
+        if ((self.loaded - self.base) >= self.window).any():
+            self._grow_window(2 * self.window)
+
+    def _grow_window(self, window):
+        for name in self._rnap_columns:
+            column = getattr(self, name)
+            pad = [(0, 0)] * column.ndim
+            pad[1] = (0, window - self.window)
+            if column.dtype == object:
+                new = np.empty((column.shape[0], window) + column.shape[2:], dtype=object)
+                new[:, :self.window] = column
+            else:
+                new = np.pad(column, pad, constant_values=np.inf if name == "next_ribo_loading" else 0)
+            setattr(self, name, new)
+        self.window = window
+
+    def _grow_ribo_capacity(self):
+        self.ribo_position = np.pad(self.ribo_position, [(0, 0), (0, 0), (0, self.ribo_position.shape[2])])
+
+    def _reset_rear_r_ref(self, replicates, if_flag=False):
+        """
+        This method sets the reference position of the rear-most attached RNAP of the given replicates.
+        """
+        rear = self._rear_column()[replicates]
+        has_rear = rear >= 0
+        replicates, rear = replicates[has_rear], rear[has_rear]
+        attached = self.is_attached[replicates, rear]
+        replicates, rear = replicates[attached], rear[attached]
+        self.r_ref[replicates, rear] = self.position[replicates, rear]
+        if if_flag:
+            self.flag_r_ref[replicates, rear] = True
+
+    def _attach_rnap(self, replicate, time_index):
+        if self.loaded[replicate] - self.base[replicate] >= self.window:
+            self._compact()
+        j = self.loaded[replicate] - self.base[replicate]
+        # REASON: the random quantities are drawn in the same order as the RNAP class does.
+        rng = self.rng[replicate]
+        gene_setting = self.gene_setting[replicate]
+        passed_site = generate_pause_state(self._pause_profile[replicate], rng, gene_setting)
+        t_degrade = generate_degradation_time(self.degradation_profile, rng, gene_setting)
+        loading_list = generate_ribo_loading_list(self, t_degrade, rng, gene_setting, self.ribo_loading_pattern,
+                                                  self.protein_production_off)
+        self.position[replicate, j] = 0
+        self.initial_t[replicate, j] = time_index
+        self.t_degrade[replicate, j] = t_degrade
+        self.r_ref[replicate, j] = 0
+        self.flag_r_ref[replicate, j] = False
+        self.passed_site[replicate, j] = False
+        self.passed_site[replicate, j, :passed_site.size] = passed_site
+        self.pausing_site[replicate, j] = -1
+        self.next_pause[replicate, j] = self.pause_table[replicate].get_next_pending(passed_site)
+        self.is_attached[replicate, j] = True
+        self.is_degrading[replicate, j] = False
+        self.is_degraded[replicate, j] = False
+        self.is_initiated[replicate, j] = False
+        self.next_ribo_loading[replicate, j] = np.inf if loading_list.if_empty() \
+            else loading_list.get_current() + time_index
+        self.ribo_attached[replicate, j] = 0
+        self.ribo_loaded[replicate, j] = 0
+        self.ribo_loading_list[replicate, j] = loading_list
+        self.loaded[replicate] += 1
+        self.attached[replicate] += 1
+
+    def step(self, time_index):
+        # REASON: check if there is one loading attempt for each replicate, the loading attempt is used up even if the
+        #         loading site is congested.
+        attempt = np.flatnonzero(time_index >= self.next_rnap_loading)
+        for replicate in attempt:
+            loading_list = self.loading_list[replicate]
+            loading_list.increment()
+            self.next_rnap_loading[replicate] = np.inf if loading_list.if_empty() else loading_list.get_current()
+        if time_index > self.T_stop:
+            attempt = attempt[:0]
+
+        # REASON: check if there is one RNAP congesting the loading site, we just check the last rnap.
+        rear = self._rear_column()[attempt]
+        rear_attached = (rear >= 0) & self.is_attached[attempt, np.maximum(rear, 0)]
+        congested = rear_attached & (self.position[attempt, np.maximum(rear, 0)] - self.setting.rnap_size < 0)
+        to_load = attempt[~congested]
+
+        # REASON: if it can load, then load one RNAP
+        if to_load.size != 0:
+            if self.include_supercoiling:
+                self.T_open[to_load] = time_index + self.t_on_index[to_load]
+                self.promoter_state[to_load] = True
+                self.just_loaded[to_load] = True
+                self._reset_rear_r_ref(to_load, if_flag=True)
+            for replicate in to_load:
+                self._attach_rnap(replicate, time_index)
+
+        # REASON: check the promoter closing resulting from the RNAP loading
+        closing = np.flatnonzero(self.just_loaded & (time_index >= self.T_open) & self.promoter_state)
+        self.just_loaded[closing] = False
+        self.promoter_state[closing] = False
+        self._reset_rear_r_ref(closing)
+
+        # REASON: check for permanent promoter shutoff
+        if time_index >= self.T_stop:
+            closing = np.flatnonzero(self.promoter_state)
+            self.promoter_state[closing] = False
+            self._reset_rear_r_ref(closing)
+
+        # REASON: calculate stepping for the attached RNAPs, in the order of replicates then front-most first.
+        attached = np.nonzero(self.is_attached)
+        replicate = attached[0]
+        same_strand = replicate[1:] == replicate[:-1]
+        position = self.position[attached]
+        if self.include_supercoiling:
+            stepping = self.supercoiling(attached, same_strand)
+        else:
+            stepping = np.full(replicate.size, self.setting.rnap_step)
+
+        # REASON: check for site-specific pausing and set pausing.
+        if self.include_site_specific_pausing and replicate.size != 0:
+            for pause_table, in_group in self._pause_group.values():
+                rows = np.flatnonzero(in_group[replicate])
+                if rows.size == 0:
+                    continue
+                group = (attached[0][rows], attached[1][rows])
+                group_position, group_stepping = position[rows], stepping[rows]
+                passed_site = self.passed_site[group][:, :pause_table.size]
+                pausing_site, next_pause = self.pausing_site[group], self.next_pause[group]
+                pause_table.apply(group_position, passed_site, pausing_site, next_pause, group_stepping)
+                position[rows], stepping[rows] = group_position, group_stepping
+                self.position[group], self.passed_site[group[0], group[1], :pause_table.size] = \
+                    group_position, passed_site
+                self.pausing_site[group], self.next_pause[group] = pausing_site, next_pause
+
+        # REASON: check for hindrance and modify stepping
+        resolve_hindrance(position, stepping, self.setting.rnap_size, same_strand)
+
+        # REASON: now we plug in the stepping into the RNAPs, then the detached RNAPs, including the ones just
+        #         detached, are stepped with no pace like the RNAPList.
+        pace = np.zeros((self.batch_size, self.window))
+        pace[attached] = stepping
+        prot = self._advance(self.is_attached.copy(), pace, time_index)
+        detached = self._used() & ~self.is_attached & ~self.is_degraded
+        prot += self._advance(detached, np.zeros((self.batch_size, self.window)), time_index)
+
+        self.protein_amount += prot
+        return prot
+
+    def supercoiling(self, attached, same_strand):
+        """
+        This method calculates the stepping of the attached RNAPs from supercoiling, in the same way as the
+        DNAStrand.supercoiling() does for each replicate.
+        """
+        setting = self.setting
+        replicate = attached[0]
+        positions = self.position[attached]
+        r_ref = self.r_ref[attached]
+        size = positions.size
+        front_most = np.ones(size, dtype=bool)
+        front_most[1:] = ~same_strand
+        rear_most = np.ones(size, dtype=bool)
+        rear_most[:-1] = ~same_strand
+
+        # STEP: phi generation, phi_front is the phi ahead of each RNAP and phi_back is the phi behind it.
+        phi_front = np.zeros(size)
+        phi_front[1:] = s(positions[:-1] - r_ref[:-1] - positions[1:], setting.gamma)
+        phi_front[front_most] = 0.0
+        phi_back = np.zeros(size)
+        phi_back[:-1] = phi_front[1:]
+        rear_phi = np.where(self.promoter_state[replicate], 0.0, s(positions - r_ref, setting.gamma))
+        phi_back[rear_most] = rear_phi[rear_most]
+
+        # STEP: torque generation
+        n = n_dependence_cubic_3(self.attached[replicate])
+        torq = -setting.tau_0 * n * (phi_front - phi_back)
+
+        # STEP: velocity generation
+        velo = velocity_array(torq, setting.tau_c, setting.v_0)
+        return velo*setting.dt
+
+    def _advance(self, mask, pace, time_index):
+        """
+        This method step the masked RNAPs and their mRNAs forward, this is the batched version of RNAP.step().
+        """
+        # REASON: increment the RNAP position by the amount pace.
+        self.position[mask] += pace[mask]
+
+        # REASON: check if the RNAP is detached
+        detaching = mask & self.is_attached & (self.position >= self.length[:, None])
+        self.is_attached[detaching] = False
+        n = detaching.sum(axis=1)
+        self.attached -= n
+        self.detached += n
+
+        # REASON: check for degradation initiation, initiation and loading of Ribosome on the mRNAs that are not
+        #         degrading yet.
+        active = mask & ~self.is_degrading
+        degrading = active & (time_index >= self.t_degrade + self.initial_t)
+        self.is_degrading[degrading] = True
+        self.degrading += degrading.sum(axis=1)
+        self.is_initiated[active & (self.position >= self.setting.initiation_nt)] = True
+        loading = np.nonzero(active & self.is_initiated & (time_index >= self.next_ribo_loading))
+        for replicate, j in zip(*loading):
+            loading_list = self.ribo_loading_list[replicate, j]
+            loading_list.increment()
+            self.next_ribo_loading[replicate, j] = np.inf if loading_list.if_empty() \
+                else loading_list.get_current() + self.initial_t[replicate, j]
+        ribo_attached = self.ribo_attached[loading]
+        rear_ribo = self.ribo_position[loading + (np.maximum(ribo_attached - 1, 0),)]
+        clear = (ribo_attached == 0) | (rear_ribo - self.setting.ribo_size >= 0)
+        loading = (loading[0][clear], loading[1][clear])
+        if loading[0].size != 0:
+            if (self.ribo_attached[loading] == self.ribo_position.shape[2]).any():
+                self._grow_ribo_capacity()
+            self.ribo_position[loading + (self.ribo_attached[loading],)] = 0
+            self.ribo_attached[loading] += 1
+            self.ribo_loaded[loading] += 1
+
+        # REASON: step the Ribosomes on the mRNAs that have any attached Ribosome
+        prot = np.zeros(self.batch_size, dtype=int)
+        stepping = np.nonzero(mask & (self.ribo_attached > 0))
+        if stepping[0].size != 0:
+            detached = self._ribo_step(stepping)
+            prot += np.bincount(stepping[0], weights=detached, minlength=self.batch_size).astype(int)
+
+        # REASON: check for complete degradation.
+        degraded = mask & ~self.is_attached & self.is_degrading & (self.ribo_attached == 0)
+        self.is_degraded[degraded] = True
+        self.degraded += degraded.sum(axis=1)
+        return prot
+
+    def _ribo_step(self, mrna):
+        """
+        This method steps the ribosomes on the given mRNAs, this is the batched version of RIBOContainer.step().
+        """
+        ribo_attached = self.ribo_attached[mrna]
+        # REASON: only the columns up to the longest queue of attached ribosomes are needed.
+        capacity = int(ribo_attached.max())
+        index = np.arange(capacity)
+        valid = index[None, :] < ribo_attached[:, None]
+        candidate = self.ribo_position[mrna[0], mrna[1], :capacity] + self.setting.ribo_step
+
+        # REASON: the front-most Ribosome cannot move ahead of the transcribing RNAP.
+        rnap_position = self.position[mrna]
+        capped = self.is_attached[mrna] & (candidate[:, 0] > rnap_position)
+        candidate[capped, 0] = rnap_position[capped]
+
+        # REASON: hindrance between the adjacent Ribosomes, see RIBOContainer.step().
+        offset = index * self.setting.ribo_size
+        shifted = np.where(valid, candidate + offset, np.inf)
+        blocked = valid & (shifted > np.minimum.accumulate(shifted, axis=1))
+        if blocked.any():
+            binding = np.maximum.accumulate(np.where(blocked, 0, index), axis=1)
+            candidate = np.take_along_axis(candidate, binding, axis=1) - (offset - offset[binding])
+
+        # REASON: the detached Ribosomes are at the front, we drop them by shifting the rest forward.
+        detached = np.count_nonzero(valid & (candidate > self.length[mrna[0], None]), axis=1)
+        if detached.any():
+            shifted_index = np.minimum(index[None, :] + detached[:, None], capacity - 1)
+            candidate = np.take_along_axis(candidate, shifted_index, axis=1)
+            self.ribo_attached[mrna] -= detached
+        self.ribo_position[mrna[0], mrna[1], :capacity] = candidate
+        return detached
+
+    def get_five_three(self):
+        """
+        This method returns the five and three mRNA amount of each replicate, as the FiveThreeRecorder does.
+        """
+        return self.loaded - self.degrading, self.detached - self.degraded
@@ -8,12 +8,68 @@ the DNA strand to conduct the transcription of messanger RNA.
 
 
 """
+import numpy as np
+from numpy.random import Generator, default_rng
+
 from ..interface import Entity
-from ..helper.random_generator import binary_generator, exponential_generator, stepwise_exponential_generator
+from ..helper.random_generator import exponential_generator, stepwise_exponential_generator
 from ..helper.loading_list import LoadingList
 from ..datacontainer.ribo_container import RIBOContainer
-from ..variables import length, kRiboLoading, ribo_loading_interval, m1, m2, t_crit, \
-    initiation_nt, scaling, dt
+from ..datacontainer.setting import Setting
+
+
+def generate_pause_state(pause_profile: str, rng: Generator, setting: Setting) -> np.ndarray:
+    """
+    This method draws which pausing sites a newly loaded RNAP will bypass.
+
+    Parameters
+    ----------
+    pause_profile : str
+        the site-specific pausing pattern that is used
+    rng : Generator
+        the random generator to draw from
+    setting : Setting
+        the setting of the run, which gives the pausing sites of the profile
+
+    Returns
+    -------
+    numpy array of bool
+        the passed flag of each site of the profile, True for the bypassed ones
+    """
+    return setting.get_pause_table(pause_profile).draw_bypass(rng)
+
+
+def generate_degradation_time(degradation_profile: str, rng: Generator, setting: Setting,
+                              degradation_uniform_lifetime: float = 60.0) -> int:
+    """
+    This method draws the degradation time of a newly loaded mRNA in index form.
+    """
+    match degradation_profile:
+        case "determined":
+            return setting.scaling(degradation_uniform_lifetime)
+        case "exponential":
+            return setting.scaling(exponential_generator(1 / setting.ribo_loading_interval, rng))
+        case "stepwise exponential":
+            return setting.scaling(stepwise_exponential_generator(setting.m1, setting.m2, setting.t_crit, rng))
+
+
+def generate_ribo_loading_list(parent, t_degrade: int, rng: Generator, setting: Setting,
+                               ribo_loading_profile: str = "stochastic",
+                               protein_production_off: bool = False) -> LoadingList:
+    """
+    This method generates the ribosome loading list of a newly loaded mRNA.
+    """
+    loading_list = None
+    match ribo_loading_profile:
+        case "uniform":
+            loading_list = LoadingList(parent, setting.scaling(t_degrade), setting.ribo_loading_probability,
+                                       if_stochastic=False, if_bursty=False, rng=rng)
+        case "stochastic":
+            loading_list = LoadingList(parent, setting.scaling(t_degrade), setting.ribo_loading_probability,
+                                       if_stochastic=True, if_bursty=False, rng=rng)
+    if protein_production_off:
+        loading_list.dump()
+    return loading_list
 
 
 class RNAP(Entity):
@@ -31,6 +87,10 @@ class RNAP(Entity):
         this is the loading pattern for the ribosomes (default is "stochastic")
     degradation_profile : str, optional
         the degradation time or loading interval pattern that is used (default is "exponential")
+    rng : Generator, optional
+        the random generator of the simulation, a fresh one is used if not given
+    setting : Setting, optional
+        the setting of the run, a default Setting is used if not given
 
 
     Attributes
@@ -43,11 +103,12 @@ class RNAP(Entity):
         the position of the RNAP on the DNA
     attached : bool
         this shows if the RNAP is attached to the DNA
-    passed_site_1 : bool
-        this shows if the RNAP has passed the pausing site 1
-    passed_site_2 : bool
-    passing_1 : bool
-    passing_2 : bool
+    passed_site : numpy array of bool
+        this shows if the RNAP has passed or will bypass each pausing site
+    pausing_site : int
+        the index of the pausing site the RNAP is pausing at, -1 if none
+    next_pause : int
+        the index of the first pausing site the RNAP has not passed
     initiated : bool
     degradation_profile : str
     degrading : bool
@@ -60,11 +121,10 @@ class RNAP(Entity):
 
 
     """
-    pauseProb = 0.8
-
     def __init__(self, parent, serial_n: int, initial_t, pause_profile: str = "flat",
                  ribo_loading_profile: str = "stochastic", degradation_profile: str = "exponential",
-                 protein_production_off: bool = False, degradation_uniform_lifetime: float = 60.0):
+                 protein_production_off: bool = False, degradation_uniform_lifetime: float = 60.0,
+                 rng: Generator = None, setting: Setting = None):
         super().__init__(parent)
         self.parent = parent  # this store the reference to its mother DNA, so that callback method can be used.
         self.serial_number = serial_n  # this number is chosen such that each instance should have a unique number.
@@ -72,23 +132,19 @@ class RNAP(Entity):
         self.position = 0  # means position.
         self.attached = True  # indicated if the RNAP is attached to the DNA. Will detached if reach the end.
         self.detached_time = -1
+        self.degraded_time = -1
         self.interrupted = False
+        self.setting = setting if setting is not None else Setting()
 
         # Site-Pausing
-        self.passed_site_1 = False  # passed_site_1 is indicating whether the RNAP has passed the pausing site.
-        self.passed_site_2 = False  # similar to above. This two variable is also used to bypass mechanisms.
-        self.passing_1 = False  # if the RNAP is passing pausing site 1.
-        self.passing_2 = False  # if the RNAP is passing pausing site 2.
-        match pause_profile:
-            case "flat":
-                self.passed_site_1 = True
-                self.passed_site_2 = True
-            case "OnepauseAbs":
-                self.passed_site_1 = binary_generator(1-RNAP.pauseProb)
-                self.passed_site_2 = True
-            case "TwopauseAbs":
-                self.passed_site_1 = binary_generator(1-RNAP.pauseProb)
-                self.passed_site_2 = binary_generator(1-RNAP.pauseProb)
+        # passed_site is indicating whether the RNAP has passed each pausing site. It is also used to bypass
+        # mechanisms.
+        if rng is None:
+            rng = default_rng()
+        self.passed_site = generate_pause_state(pause_profile, rng, self.setting)
+        self.pausing_site = -1  # the index of the pausing site the RNAP is passing.
+        # the index of the first pausing site that is not passed.
+        self.next_pause = self.setting.get_pause_table(pause_profile).get_next_pending(self.passed_site)
 
         # mRNA degradation
         self.initiated = False  # initiated indicates if the length has passed the size required for initiation (33nts)
@@ -97,30 +153,17 @@ class RNAP(Entity):
         self.degradation_profile = degradation_profile
         self.degrading = False
         self.degraded = False
-        match self.degradation_profile:
-            case "determined":
-                self.t_degrade = scaling(degradation_uniform_lifetime)
-            case "exponential":
-                self.t_degrade = scaling(exponential_generator(1 / ribo_loading_interval))
-            case "stepwise exponential":
-                self.t_degrade = scaling(stepwise_exponential_generator(m1, m2, t_crit))
+        self.t_degrade = generate_degradation_time(self.degradation_profile, rng, self.setting,
+                                                   degradation_uniform_lifetime)
 
         # Loading of Ribosomes
-        match ribo_loading_profile:
-            case "uniform":
-                self.loading_list = LoadingList(self, scaling(self.t_degrade), kRiboLoading*dt, if_stochastic=False,
-                                                if_bursty=False)
-            case "stochastic":
-                self.loading_list = LoadingList(self, scaling(self.t_degrade), kRiboLoading*dt, if_stochastic=True,
-                                                if_bursty=False)
-
         # sometimes we do not want to activate the protein production, then we just dump the whole loading list.
-        if protein_production_off:
-            self.loading_list.dump()
+        self.loading_list = generate_ribo_loading_list(self, self.t_degrade, rng, self.setting,
+                                                       ribo_loading_profile, protein_production_off)
 
         # we use the DataContainer RIBOContainer to both store and manage the Ribosomes
         # the class RIBOContainer will contain various class functions to helpe us with RIBO-related business
-        self.RIBO_LIST = RIBOContainer(self)
+        self.RIBO_LIST = RIBOContainer(self, setting=self.setting)
 
     def init(self):
         """
@@ -154,7 +197,7 @@ class RNAP(Entity):
 
         # REASON: check if the RNAP is detached,
         #         use callback method of the parent DNA to increment the detached amount.
-        if self.attached and (self.position >= length):
+        if self.attached and (self.position >= self.setting.length):
             self.attached = False
             self.detached_time = time_index
             self.parent.call_back(operation="detached", entity=self)
@@ -171,8 +214,8 @@ class RNAP(Entity):
             # REASON: check for self.initiated,
             #         if the RNAP instance is not initiated, and it satisfies to requirement to be initiated
             #         then we initiate it :)
-            if not self.initiated and self.position >= initiation_nt:
-                if self.position >= initiation_nt:
+            if not self.initiated and self.position >= self.setting.initiation_nt:
+                if self.position >= self.setting.initiation_nt:
                     self.initiated = True
 
             # REASON: if the mRNA is initiated and the loading list is not empty, then check for potential Loading.
@@ -186,7 +229,7 @@ class RNAP(Entity):
 
         # REASON: we let the RIBO_LIST handle the stepping of the Ribosome
         #         we can trust it to check for hindrance and various matters
-        prot = self.RIBO_LIST.step(time_index, self.position)
+        prot = self.RIBO_LIST.step(time_index, self.position, self.attached)
 
         # REASON: check for complete degradation. if completely degraded, then set self.degraded to True
         #         first the RNAP has to be detached.
@@ -194,6 +237,7 @@ class RNAP(Entity):
         #         third all the ribosome has to be already detached from the mRNA
         if not self.attached and self.degrading and self.RIBO_LIST.if_all_detached():
             self.degraded = True
+            self.degraded_time = time_index
             self.parent.call_back(operation="degraded", entity=self)
         # return protein production
         return prot
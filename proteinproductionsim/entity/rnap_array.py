@@ -0,0 +1,457 @@
+"""
+=============
+rnap_array.py
+=============
+
+This file contains the RNAPArray class, the struct-of-arrays alternative to the RNAPList class.
+
+Instead of keeping one RNAP instance for each loaded RNAP, the RNAPArray stores the state of all the RNAPs as contiguous
+numpy columns. The row of a RNAP is its serial number minus the serial number of the first row, so looking up a RNAP
+is just indexing. The rows of the attached RNAPs, and of the detached RNAPs whose mRNA is not degraded yet, are kept as
+sorted index arrays which are updated when a RNAP changes state, so a step does not scan all the rows.
+
+The ribosomes of each mRNA are kept in a 2-D column of shape (capacity, ribosome capacity), the front-most attached
+ribosome first, and the ribosomes of all the stepped mRNAs are loaded and stepped at once, as in the DNAStrandBatch.
+Only the ribosome loading list of each mRNA is still kept as an object, as its size varies from mRNA to mRNA.
+
+With the compaction mode of the DNAStrand, the loading list of a finished RNAP is released as soon as it is added to the
+summary, and the leading rows of finished RNAPs are dropped when the columns are full, so the columns only span the
+RNAPs from the oldest unfinished one.
+
+The RNAPArray exposes the same methods and counters as the RNAPList, so that the DNAStrand and the data recorders can
+use either of them.
+"""
+import numpy as np
+
+from proteinproductionsim.entity.rnap import generate_pause_state, generate_degradation_time, \
+    generate_ribo_loading_list
+from proteinproductionsim.datacontainer.setting import Setting
+from proteinproductionsim.datacontainer.rnap_summary import RNAPSummary
+
+
+def resolve_hindrance(position, stepping, rnap_size, same_strand=None):
+    """
+    This method checks the given attached RNAPs for hindrance and modifies the stepping in place.
+
+    An RNAP which would move past the end of its front RNAP is set right behind it with a distance of rnap_size.
+    A correction only shortens the stepping of a RNAP, so only the RNAP right behind it can newly collide. The RNAPs
+    colliding with the stepping as given are found at once, and are resolved by one front-to-back scan which follows
+    each chain of pushed back RNAPs, so the result is the one of the sequential rule of the RNAPList in O(n).
+
+    Parameters
+    ----------
+    position : numpy array of float
+        the positions of the RNAPs, front-most first
+    stepping : numpy array of float
+        the stepping of the RNAPs
+    rnap_size : int
+        the footprint of a RNAP on the DNA
+    same_strand : numpy array of bool, optional
+        the size is len(position)-1, shows if each RNAP is on the same DNA strand as the RNAP ahead of it in the
+        arrays. all of them are on the same strand by default.
+    """
+    if position.size < 2:
+        return
+    collision = position[1:] + stepping[1:] > position[:-1] + stepping[:-1] - rnap_size
+    if same_strand is not None:
+        collision &= same_strand
+    size = position.size
+    last_corrected = 0
+    for i in np.flatnonzero(collision) + 1:
+        # REASON: this RNAP was already corrected behind its corrected front RNAP.
+        if i <= last_corrected:
+            continue
+        while i < size and (same_strand is None or same_strand[i - 1]):
+            previous_rnap_end_position = position[i - 1] + stepping[i - 1] - rnap_size
+            if not position[i] + stepping[i] > previous_rnap_end_position:
+                break
+            stepping[i] = previous_rnap_end_position - position[i]
+            last_corrected = i
+            i += 1
+
+
+class RNAPArray:
+    """
+    This class stores the state of all the RNAPs of a DNAStrand as numpy columns.
+
+    Attributes
+    ----------
+    position : numpy array of float
+        the position of each RNAP on the DNA
+    initial_t : numpy array of int
+        the time index when each RNAP is loaded
+    t_degrade : numpy array of int
+        the degradation time of each mRNA in index form
+    detached_time : numpy array of int
+        the time index when each RNAP is detached, -1 if it is not detached
+    passed_site : numpy array of bool
+        the shape is (capacity, number of pausing sites), shows if the RNAP has passed or will bypass each pausing site
+    pausing_site : numpy array of int
+        the index of the pausing site each RNAP is pausing at, -1 if none
+    next_pause : numpy array of int
+        the index of the first pausing site each RNAP has not passed
+    is_attached, is_degrading, is_degraded, is_interrupted, is_initiated : numpy array of bool
+        the state flags of each RNAP
+    next_ribo_loading : numpy array of float
+        the next time index when a ribosome can load on each mRNA, inf if the loading list is empty
+    r_ref : numpy array of float
+        reference position of each RNAP for adaptive supercoiling
+    flag_r_ref : numpy array of bool
+        boolean for the whether the r_ref is used
+    ribo_position : numpy array of float
+        the shape is (capacity, ribosome capacity), the positions of the attached ribosomes of each mRNA, front-most
+        first
+    ribo_attached, ribo_loaded : numpy array of int
+        the number of attached and loaded ribosomes of each mRNA
+    """
+    def __init__(self, dna, capacity: int = 64):
+        # basic initiation
+        self.dna = dna  # keep the parent instance
+        self.setting: Setting = dna.setting
+        self._capacity = 0
+        self._base = 0  # the serial number of the first row.
+        self.summary = RNAPSummary(self, self.setting)  # the summary statistics of the finished RNAPs
+        self.compact_finished_rnap = dna.compact_finished_rnap
+
+        # variables related to the status of its children mRNAs.
+        self.loaded = 0  # number of RNAPs that have been loaded.
+        self.detached = 0  # number of RNAPs that have been detached.
+        self.attached = 0  # number of RNAPs that are attached.
+        self.degrading = 0  # number of RNAPs that are degrading.
+        self.degraded = 0  # number of RNAPs that are already degraded.
+        self.interrupted = 0  # number of RNAPs that interrupted.
+
+        # columns
+        self.serial_number = np.zeros(0, dtype=int)
+        self.position = np.zeros(0, dtype=float)
+        self.initial_t = np.zeros(0, dtype=int)
+        self.t_degrade = np.zeros(0, dtype=int)
+        self.detached_time = np.zeros(0, dtype=int)
+        self.passed_site = np.zeros((0, dna.pause_table.size), dtype=bool)
+        self.pausing_site = np.zeros(0, dtype=int)
+        self.next_pause = np.zeros(0, dtype=int)
+        self.is_attached = np.zeros(0, dtype=bool)
+        self.is_degrading = np.zeros(0, dtype=bool)
+        self.is_degraded = np.zeros(0, dtype=bool)
+        self.is_interrupted = np.zeros(0, dtype=bool)
+        self.is_initiated = np.zeros(0, dtype=bool)
+        self.next_ribo_loading = np.zeros(0, dtype=float)
+        self.r_ref = np.zeros(0, dtype=float)
+        self.flag_r_ref = np.zeros(0, dtype=bool)
+        self.ribo_position = np.zeros((0, 16), dtype=float)
+        self.ribo_attached = np.zeros(0, dtype=int)
+        self.ribo_loaded = np.zeros(0, dtype=int)
+        # the sorted rows of the attached RNAPs, in a buffer as large as the columns, see _attached.
+        self._attached_rows = np.zeros(0, dtype=int)
+        self._attached_count = 0
+        self._grow(capacity)
+
+        # object columns
+        self.loading_list = []
+
+        # the sorted rows of the detached RNAPs whose mRNA is not degraded yet.
+        self._detached = np.zeros(0, dtype=int)
+
+    def init(self):
+        return
+
+    _columns = ("serial_number", "position", "initial_t", "t_degrade", "detached_time", "passed_site", "pausing_site",
+                "next_pause", "is_attached", "is_degrading", "is_degraded", "is_interrupted", "is_initiated",
+                "next_ribo_loading", "r_ref", "flag_r_ref", "ribo_position", "ribo_attached", "ribo_loaded")
+
+    @property
+    def _attached(self) -> np.ndarray:
+        """
+        This method returns the sorted rows of the attached RNAPs, as a view of the buffer.
+        """
+        return self._attached_rows[:self._attached_count]
+
+    def _set_attached(self, rows):
+        self._attached_count = rows.size
+        self._attached_rows[:rows.size] = rows
+
+    def _grow(self, capacity):
+        """
+        This method enlarges all the columns, and the buffer of the attached rows, to the given capacity.
+        """
+        for name in self._columns:
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self._capacity] = old
+            setattr(self, name, new)
+        # REASON: there are at most as many attached RNAPs as rows, so loading one never overflows the buffer.
+        attached_rows = np.zeros(capacity, dtype=int)
+        attached_rows[:self._attached_count] = self._attached
+        self._attached_rows = attached_rows
+        self._capacity = capacity
+
+    def _grow_ribo_capacity(self):
+        """
+        This method doubles the number of ribosomes each mRNA can hold.
+        """
+        old = self.ribo_position
+        self.ribo_position = np.zeros((old.shape[0], 2 * old.shape[1]), dtype=old.dtype)
+        self.ribo_position[:, :old.shape[1]] = old
+
+    def _compact(self):
+        """
+        This method drops the leading rows of finished RNAPs, i.e. degraded or interrupted, from all the columns.
+        """
+        n = self.loaded - self._base
+        finished = self.is_degraded[:n] | self.is_interrupted[:n]
+        leading = n if finished.all() else int(np.argmin(finished))
+        if leading == 0:
+            return
+        for name in self._columns:
+            column = getattr(self, name)
+            column[:n - leading] = column[leading:n]
+        del self.loading_list[:leading]
+        self._attached_rows[:self._attached_count] -= leading
+        self._detached -= leading
+        self._base += leading
+
+    def _finish(self, row, lifetime=None):
+        """
+        This method adds the RNAP of the given row to the summary, and releases its loading list with compaction.
+        """
+        ribo_loaded = int(self.ribo_loaded[row])
+        self.summary.log(lifetime, ribo_loaded, ribo_loaded - int(self.ribo_attached[row]),
+                         interrupted=lifetime is None)
+        if self.compact_finished_rnap:
+            self.loading_list[row] = None
+
+    def if_loading_site_clean(self):
+        if self.loaded == 0 or self.attached == 0:
+            return True
+        return not (self.position[self._attached[-1]] - self.setting.rnap_size) < 0
+
+    def attach_rnap(self, initial_t, pause_profile: str = "flat", ribo_loading_profile: str = "stochastic",
+                    degradation_profile: str = "exponential", protein_production_off: bool = False,
+                    degradation_uniform_lifetime: float = 60.0):
+        # REASON: the random quantities are drawn in the same order as the RNAP class does.
+        row = self.loaded - self._base
+        if row == self._capacity:
+            if self.compact_finished_rnap:
+                self._compact()
+                row = self.loaded - self._base
+            # REASON: the columns are also enlarged when compaction frees less than half of them, so that it does not
+            #         happen at every loading.
+            if row > self._capacity // 2:
+                self._grow(2 * self._capacity)
+        rng = self.dna.rng
+        setting = self.setting
+        passed_site = generate_pause_state(pause_profile, rng, setting)
+        t_degrade = generate_degradation_time(degradation_profile, rng, setting, degradation_uniform_lifetime)
+        loading_list = generate_ribo_loading_list(self, t_degrade, rng, setting, ribo_loading_profile,
+                                                  protein_production_off)
+
+        self.serial_number[row] = self.loaded
+        self.position[row] = 0
+        self.initial_t[row] = initial_t
+        self.t_degrade[row] = t_degrade
+        self.detached_time[row] = -1
+        self.passed_site[row] = passed_site
+        self.pausing_site[row] = -1
+        self.next_pause[row] = self.dna.pause_table.get_next_pending(passed_site)
+        self.is_attached[row] = True
+        self.is_degrading[row] = False
+        self.is_degraded[row] = False
+        self.is_interrupted[row] = False
+        self.is_initiated[row] = False
+        self.next_ribo_loading[row] = np.inf if loading_list.if_empty() else loading_list.get_current() + initial_t
+        self.r_ref[row] = 0
+        self.flag_r_ref[row] = False
+        self.ribo_attached[row] = 0
+        self.ribo_loaded[row] = 0
+        self.loading_list.append(loading_list)
+        self._attached_rows[self._attached_count] = row
+        self._attached_count += 1
+
+        self.loaded += 1
+        self.attached += 1
+
+    def get_attached_serial_number(self) -> np.ndarray:
+        return self.serial_number[self._attached]
+
+    def get_detached_serial_number(self) -> np.ndarray:
+        return self.serial_number[self._detached]
+
+    def get_position_for_all_attached_rnap(self) -> tuple[np.ndarray, np.ndarray]:
+        return self.position[self._attached], self.serial_number[self._attached]
+
+    def get_supercoiling_ref(self):
+        return self.r_ref[self._attached], self.flag_r_ref[self._attached]
+
+    def get_position_for_recorder(self):
+        return self.position[self._attached], self.serial_number[self._attached]
+
+    def reset_rear_r_ref(self, if_flag=False):
+        """
+        This method sets the reference position of the rear-most attached RNAP to its current position.
+        """
+        if self.attached == 0:
+            return
+        row = self._attached[-1]
+        self.r_ref[row] = self.position[row]
+        if if_flag:
+            self.flag_r_ref[row] = True
+
+    def site_specific_pausing(self, stepping):
+        """
+        This method checks the attached RNAPs for site-specific pausing and modifies the stepping in place.
+        """
+        rows = self._attached
+        position, passed_site = self.position[rows], self.passed_site[rows]
+        pausing_site, next_pause = self.pausing_site[rows], self.next_pause[rows]
+        self.dna.pause_table.apply(position, passed_site, pausing_site, next_pause, stepping)
+        self.position[rows], self.passed_site[rows] = position, passed_site
+        self.pausing_site[rows], self.next_pause[rows] = pausing_site, next_pause
+
+    def resolve_hindrance(self, stepping):
+        """
+        This method checks the attached RNAPs for hindrance and modifies the stepping in place.
+        """
+        resolve_hindrance(self.position[self._attached], stepping, self.setting.rnap_size)
+
+    def process_rnap_fall_off(self, serial_number):
+        self.attached -= 1
+        self.interrupted += 1
+        # STEP: accumulate r_ref to the front rnap
+        row = serial_number - self._base
+        index = int(np.searchsorted(self._attached, row))
+        if index != 0:
+            self.r_ref[self._attached[index - 1]] += self.r_ref[row]
+        self._set_attached(np.delete(self._attached, index))
+        self.is_attached[row] = False
+        self.is_interrupted[row] = True
+        self._finish(row)
+
+    def step(self, time_index, stepping, serial_number_list) -> int:
+        rows = np.asarray(serial_number_list, dtype=int) - self._base
+        prot = self._advance(rows, np.asarray(stepping, dtype=float), time_index)
+        # REASON: the detached RNAPs, including the ones just detached, are then stepped with no pace like the RNAPList.
+        rows = self._detached
+        prot += self._advance(rows, np.zeros(rows.size), time_index)
+        return prot
+
+    def _advance(self, rows, pace, time_index) -> int:
+        """
+        This method step the given RNAPs and their mRNAs forward, this is the array version of RNAP.step().
+        """
+        if rows.size == 0:
+            return 0
+
+        # REASON: increment the RNAP position by the amount pace.
+        position = self.position[rows] + pace
+        self.position[rows] = position
+
+        # REASON: check if the RNAP is detached
+        is_attached = self.is_attached[rows]
+        detaching = is_attached & (position >= self.setting.length)
+        if detaching.any():
+            detaching_rows = rows[detaching]
+            self.is_attached[detaching_rows] = False
+            self.detached_time[detaching_rows] = time_index
+            self._set_attached(np.setdiff1d(self._attached, detaching_rows, assume_unique=True))
+            self._detached = np.union1d(self._detached, detaching_rows)
+            is_attached = is_attached & ~detaching
+            n = detaching_rows.size
+            self.attached -= n
+            self.detached += n
+
+        # REASON: check for degradation initiation, initiation and loading of Ribosome on the mRNAs that are not
+        #         degrading yet.
+        active = ~self.is_degrading[rows]
+        degrading = active & (time_index >= self.t_degrade[rows] + self.initial_t[rows])
+        if degrading.any():
+            self.is_degrading[rows[degrading]] = True
+            self.degrading += int(np.count_nonzero(degrading))
+        self.is_initiated[rows[active & (position >= self.setting.initiation_nt)]] = True
+        loading = rows[active & self.is_initiated[rows] & (time_index >= self.next_ribo_loading[rows])]
+        if loading.size != 0:
+            self._load_ribo(loading)
+
+        # REASON: step the Ribosomes on the mRNAs that have any attached Ribosome
+        prot = 0
+        stepping = self.ribo_attached[rows] > 0
+        if stepping.any():
+            prot = self._ribo_step(rows[stepping], position[stepping], is_attached[stepping])
+
+        # REASON: check for complete degradation.
+        degraded = rows[~is_attached & self.is_degrading[rows] & (self.ribo_attached[rows] == 0)]
+        if degraded.size != 0:
+            self.is_degraded[degraded] = True
+            self.degraded += degraded.size
+            self._detached = np.setdiff1d(self._detached, degraded, assume_unique=True)
+            for row in degraded:
+                self._finish(row, time_index - self.initial_t[row])
+        return prot
+
+    def _load_ribo(self, rows):
+        """
+        This method moves the loading lists of the given mRNAs forward, and loads one Ribosome on each of them whose
+        start is clear, this is the array version of RIBOContainer.load_one().
+        """
+        for row in rows:
+            loading_list = self.loading_list[row]
+            loading_list.increment()
+            self.next_ribo_loading[row] = np.inf if loading_list.if_empty() \
+                else loading_list.get_current() + self.initial_t[row]
+        # REASON: the start is clear if the rear-most attached Ribosome has moved by its size, see
+        #         RIBOContainer.if_clear_at_start().
+        ribo_attached = self.ribo_attached[rows]
+        rear_ribo = self.ribo_position[rows, np.maximum(ribo_attached - 1, 0)]
+        rows = rows[(ribo_attached == 0) | (rear_ribo - self.setting.ribo_size >= 0)]
+        if rows.size == 0:
+            return
+        if (self.ribo_attached[rows] == self.ribo_position.shape[1]).any():
+            self._grow_ribo_capacity()
+        self.ribo_position[rows, self.ribo_attached[rows]] = 0
+        self.ribo_attached[rows] += 1
+        self.ribo_loaded[rows] += 1
+
+    def _ribo_step(self, rows, rnap_position, rnap_attached) -> int:
+        """
+        This method steps the Ribosomes on the given mRNAs, this is the array version of RIBOContainer.step().
+
+        Returns
+        -------
+        int
+            the number of Ribosomes which detached, i.e. the proteins produced
+        """
+        ribo_attached = self.ribo_attached[rows]
+        # REASON: only the columns up to the longest queue of attached Ribosomes are needed.
+        capacity = int(ribo_attached.max())
+        candidate = self.ribo_position[rows, :capacity] + self.setting.ribo_step
+
+        # REASON: the front-most Ribosome cannot move ahead of the transcribing RNAP.
+        capped = rnap_attached & (candidate[:, 0] > rnap_position)
+        candidate[capped, 0] = rnap_position[capped]
+
+        # REASON: hindrance between the adjacent Ribosomes, see RIBOContainer.step(). the columns past the attached
+        #         Ribosomes of a mRNA are ignored, and only the mRNAs with a blocked Ribosome are resolved.
+        if capacity > 1:
+            index = np.arange(capacity)
+            ribo_size = self.setting.ribo_size
+            valid = index < ribo_attached[:, None]
+            hindered = (valid[:, 1:] & (candidate[:, 1:] > candidate[:, :-1] - ribo_size)).any(axis=1)
+            if hindered.any():
+                offset = index * ribo_size
+                queue = candidate[hindered]
+                shifted = np.where(valid[hindered], queue + offset, np.inf)
+                blocked = valid[hindered] & (shifted > np.minimum.accumulate(shifted, axis=1))
+                binding = np.maximum.accumulate(np.where(blocked, 0, index), axis=1)
+                candidate[hindered] = queue[np.arange(queue.shape[0])[:, None], binding] - (offset - offset[binding])
+        self.ribo_position[rows, :capacity] = candidate
+
+        # REASON: the detached Ribosomes are at the front, so there is none unless a front-most one is past the end. we
+        #         drop them by shifting the rest of their mRNA forward.
+        length = self.setting.length
+        if not (candidate[:, 0] > length).any():
+            return 0
+        detached = ((candidate > length) & (np.arange(capacity) < ribo_attached[:, None])).sum(axis=1)
+        for i in np.flatnonzero(detached):
+            row, n = rows[i], detached[i]
+            self.ribo_position[row, :capacity - n] = candidate[i, n:]
+        self.ribo_attached[rows] -= detached
+        return int(detached.sum())
@@ -0,0 +1,33 @@
+"""
+=====================
+batch_sim_environment
+=====================
+this file contains the Environment subclass that is used for batch_sim_controller.
+"""
+import numpy as np
+
+from proteinproductionsim.interface import Environment
+from proteinproductionsim.entity.dna_strand_batch import DNAStrandBatch
+
+
+class BatchSimEnvironment(Environment):
+    """
+    This class represents the environment of a batch of independent DNA-to-protein Experiments, which are stepped in
+    lockstep by one DNAStrandBatch.
+    """
+    def __init__(self, controller, rnap_loading_rate: float, batch_size: int, **kwargs):
+        super().__init__(parent=controller)
+        self.dna = DNAStrandBatch(environment=self, rnap_loading_rate=rnap_loading_rate, batch_size=batch_size,
+                                  **kwargs)
+        self.total_prot = np.zeros(batch_size, dtype=int)
+        pass
+
+    def step(self, time_index):
+        self.total_prot += self.dna.step(time_index)
+
+    def init(self):
+        self.dna.init()
+        pass
+
+    def call_back(self, option, data):
+        pass
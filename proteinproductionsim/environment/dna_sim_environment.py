@@ -31,6 +31,9 @@ class DNASimEnvironment(Environment):
     def step(self, time_index):
         self.total_prot += self.dna.step(time_index)
 
+    def get_next_event_time(self, time_index):
+        return self.dna.get_next_event_time(time_index)
+
     def init(self):
         self.dna.init()
         pass
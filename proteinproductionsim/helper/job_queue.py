@@ -0,0 +1,194 @@
+"""
+============
+job_queue.py
+============
+
+This helper file contains a job queue stored in a directory, which can be shared by workers on several nodes through a
+shared file system.
+
+The queue directory contains:
+    spec.json       the description of the work, written once when the queue is created
+    pending/        one file for each job that is not claimed
+    claimed/        the jobs being run, the name of each file also contains the id of its worker
+    done/           the finished jobs
+    shards/         the result of each finished job
+
+Every state change of a job is a rename of its file, which is atomic on a POSIX file system, so two workers can never
+claim the same job. A worker refreshes the modification time of its claims while it runs them, and the claims which are
+not refreshed for lease_timeout seconds are put back to pending, so the jobs of a crashed worker are run again by
+another one. The results are written aside and then renamed, so a shard is either complete or missing.
+"""
+import json
+import os
+import socket
+import time
+
+import numpy as np
+
+
+def get_default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _write_atomic(path, write):
+    temporary_path = f"{path}.{get_default_worker_id()}.tmp"
+    with open(temporary_path, "wb") as file:
+        write(file)
+    os.replace(temporary_path, path)
+
+
+class JobQueue:
+    """
+    This class manages a job queue directory.
+
+    Parameters
+    ----------
+    directory : str
+        the queue directory
+    lease_timeout : float, optional
+        the seconds after which a claim which is not refreshed is considered abandoned (default is 600)
+    """
+    _states = ("pending", "claimed", "done", "shards")
+
+    def __init__(self, directory: str, lease_timeout: float = 600):
+        self.directory = directory
+        self.lease_timeout = lease_timeout
+
+    def _get_path(self, *names):
+        return os.path.join(self.directory, *names)
+
+    def create(self, spec: dict, jobs: dict[str, dict]) -> bool:
+        """
+        This method creates the queue, or checks that the existing queue has the same spec.
+
+        Parameters
+        ----------
+        spec : dict
+            the JSON-serializable description of the work
+        jobs : dict[str, dict]
+            the JSON-serializable description of each job, keyed by the job id
+
+        Returns
+        -------
+        bool
+            True if the queue is created, False if it already exists
+        """
+        spec_path = self._get_path("spec.json")
+        if self.if_created():
+            if self.get_spec() != json.loads(json.dumps(spec)):
+                raise ValueError(f"the queue {self.directory} already exists with a different spec.")
+            return False
+        for state in self._states:
+            os.makedirs(self._get_path(state), exist_ok=True)
+        for job_id, job in jobs.items():
+            text = json.dumps(job).encode()
+            _write_atomic(self._get_path("pending", f"{job_id}.json"), lambda file: file.write(text))
+        # REASON: the spec is written last, so a queue with a spec always has all its jobs.
+        _write_atomic(spec_path, lambda file: file.write(json.dumps(spec, sort_keys=True).encode()))
+        return True
+
+    def if_created(self) -> bool:
+        return os.path.exists(self._get_path("spec.json"))
+
+    def get_spec(self) -> dict:
+        with open(self._get_path("spec.json")) as file:
+            return json.load(file)
+
+    def _list(self, state) -> list[str]:
+        return sorted(name for name in os.listdir(self._get_path(state)) if name.endswith(".json"))
+
+    def claim(self, worker_id: str):
+        """
+        This method claims one job for the worker. The claims the worker still holds, e.g. from before it crashed, are
+        returned first, then the pending jobs in order of their ids.
+
+        Returns
+        -------
+        tuple[str, dict] or None
+            the job id and the job, None if there is no job left to claim
+        """
+        suffix = f"@{worker_id}.json"
+        for name in self._list("claimed"):
+            if name.endswith(suffix):
+                job_id = name[:-len(suffix)]
+                self.heartbeat(job_id, worker_id)
+                return job_id, self._read("claimed", name)
+        self.requeue_abandoned()
+        for name in self._list("pending"):
+            job_id = name[:-len(".json")]
+            try:
+                os.rename(self._get_path("pending", name), self._get_path("claimed", f"{job_id}{suffix}"))
+            except FileNotFoundError:
+                # REASON: another worker claimed it first.
+                continue
+            self.heartbeat(job_id, worker_id)
+            return job_id, self._read("claimed", f"{job_id}{suffix}")
+        return None
+
+    def _read(self, state, name) -> dict:
+        with open(self._get_path(state, name)) as file:
+            return json.load(file)
+
+    def heartbeat(self, job_id: str, worker_id: str):
+        """
+        This method refreshes the claim of the worker on the job, so that it is not considered abandoned.
+        """
+        try:
+            os.utime(self._get_path("claimed", f"{job_id}@{worker_id}.json"))
+        except FileNotFoundError:
+            pass
+
+    def requeue_abandoned(self) -> int:
+        """
+        This method puts the claims which are not refreshed for lease_timeout seconds back to pending.
+
+        Returns
+        -------
+        int
+            the number of jobs put back
+        """
+        requeued = 0
+        now = time.time()
+        for name in self._list("claimed"):
+            path = self._get_path("claimed", name)
+            try:
+                if now - os.path.getmtime(path) < self.lease_timeout:
+                    continue
+                os.rename(path, self._get_path("pending", name.split("@")[0] + ".json"))
+                requeued += 1
+            except FileNotFoundError:
+                continue
+        return requeued
+
+    def has_shard(self, job_id: str) -> bool:
+        return os.path.exists(self._get_path("shards", f"{job_id}.npz"))
+
+    def complete(self, job_id: str, worker_id: str, result: dict[str, np.ndarray] = None):
+        """
+        This method stores the result of the job, if given, and marks the job as done.
+        """
+        if result is not None:
+            _write_atomic(self._get_path("shards", f"{job_id}.npz"), lambda file: np.savez(file, **result))
+        claim = self._get_path("claimed", f"{job_id}@{worker_id}.json")
+        try:
+            os.rename(claim, self._get_path("done", f"{job_id}.json"))
+        except FileNotFoundError:
+            # REASON: the claim was given up as abandoned and claimed again, the result is the same anyway.
+            pass
+
+    def load_shard(self, job_id: str) -> dict[str, np.ndarray]:
+        with np.load(self._get_path("shards", f"{job_id}.npz")) as file:
+            return {name: file[name] for name in file.files}
+
+    def get_status(self) -> dict[str, int]:
+        """
+        This method returns the number of "pending", "claimed" and "done" jobs.
+        """
+        return {state: len(self._list(state)) for state in ("pending", "claimed", "done")}
+
+    def get_done(self) -> list[str]:
+        return [name[:-len(".json")] for name in self._list("done")]
+
+    def if_finished(self) -> bool:
+        status = self.get_status()
+        return status["pending"] == 0 and status["claimed"] == 0
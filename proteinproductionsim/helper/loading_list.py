@@ -17,58 +17,91 @@ promoter list is different from the actual "real" promoter list, as that will be
 other DataContainer.
 """
 
+import math
+
+import numpy as np
+
 from proteinproductionsim.interface import DataContainer
-from proteinproductionsim.helper.random_generator import exponential_generator
+from proteinproductionsim.helper.random_generator import exponential_array_generator
 
 # Helper functions for the helper class
 
 
-def _stochastic_cumulative_array_generator(duration, rate):
+def _accumulate_intervals(duration, interval_generator, block_size):
+    """
+    This method accumulates intervals from time 0 until the first interval that does not fit in the duration. The
+    intervals are generated in blocks and accumulated with cumulative sums.
+    Parameters
+    ----------
+    duration : float
+    interval_generator : callable
+        interval_generator(size) returns a numpy array of size intervals.
+    block_size : int
+        the number of intervals generated at once
+
+    Returns
+    -------
+    tuple[numpy array of float, numpy array of float]
+        the accepted intervals, and the time points 0, t_1, ..., t_k after each accepted interval.
+    """
+    duration = float(duration)
+    t = 0.0
+    intervals = []
+    t_slots = [np.zeros(1)]
+    while True:
+        block = interval_generator(block_size)
+        # REASON: accumulating from t keeps the same float additions as adding the intervals one by one.
+        ends = np.cumsum(np.concatenate(([t], block)))
+        fits = block < duration - ends[:-1]
+        accepted = block_size if fits.all() else int(np.argmin(fits))
+        intervals.append(block[:accepted])
+        t_slots.append(ends[1:accepted + 1])
+        if accepted < block_size:
+            break
+        t = ends[-1]
+    return np.concatenate(intervals), np.concatenate(t_slots)
+
+
+def _poisson_block_size(duration, rate):
+    # REASON: the mean number of events plus a few standard deviations, so that one block is almost always enough.
+    mean = float(duration) * rate
+    return int(mean + 4 * math.sqrt(mean)) + 8
+
+
+def _stochastic_cumulative_array_generator(duration, rate, rng):
     """
     This method generate a stochastic loading array. The elements are accumulative.
     Parameters
     ----------
     duration : int
     rate : float
+    rng : Generator
 
     Returns
     -------
-    list[float]
+    numpy array of float
     """
-    t = 0.0
-    t_slots = [0]
-    while t <= duration:
-        add_time = exponential_generator(rate)
-        if add_time < float(duration) - t:
-            t += add_time
-            t_slots.append(t)
-        else:
-            break
+    _, t_slots = _accumulate_intervals(duration, lambda size: exponential_array_generator(rate, size, rng),
+                                       _poisson_block_size(duration, rate))
     return t_slots
 
 
-def _stochastic_noncumulative_array_generator(duration, rate):
+def _stochastic_noncumulative_array_generator(duration, rate, rng):
     """
     This method generate a stochastic loading array. The elements are noncumulative.
     Parameters
     ----------
     duration : int
     rate : float
+    rng : Generator
 
     Returns
     -------
-    list[float]
+    numpy array of float
     """
-    t = 0.0
-    t_slots = [0]
-    while t <= duration:
-        add_time = exponential_generator(rate)
-        if add_time < float(duration) - t:
-            t_slots.append(t)
-            t += add_time
-        else:
-            break
-    return t_slots
+    _, t_slots = _accumulate_intervals(duration, lambda size: exponential_array_generator(rate, size, rng),
+                                       _poisson_block_size(duration, rate))
+    return np.concatenate(([0.0], t_slots[:-1]))
 
 
 def _uniform_cumulative_array_generator(duration, rate):
@@ -81,18 +114,10 @@ def _uniform_cumulative_array_generator(duration, rate):
 
     Returns
     -------
-    list[float]
+    numpy array of float
     """
     interval = 1/rate
-    t = 0.0
-    t_slots = [0]
-    while t <= duration:
-        add_time = interval
-        if add_time < float(duration) - t:
-            t += add_time
-            t_slots.append(t)
-        else:
-            break
+    _, t_slots = _accumulate_intervals(duration, lambda size: np.full(size, interval), int(duration * rate) + 2)
     return t_slots
 
 
@@ -106,79 +131,55 @@ def _uniform_noncumulative_array_generator(duration, rate):
 
     Returns
     -------
-    list[float]
+    numpy array of float
     """
     interval = 1/rate
-    t = 0.0
-    t_slots = [0]
-    while t <= duration:
-        add_time = interval
-        if add_time < float(duration) - t:
-            t_slots.append(t)
-            t += add_time
-        else:
-            break
-    return t_slots
+    _, t_slots = _accumulate_intervals(duration, lambda size: np.full(size, interval), int(duration * rate) + 2)
+    return np.concatenate(([0.0], t_slots[:-1]))
 
 
-def _promoter_array_generator(duration, tau_on, tau_off):
+def _promoter_array_generator(duration, tau_on, tau_off, rng):
     duration = float(duration)
-    t = 0
-    i = False
-    t_slots = []
-    while t <= duration:
-        if i:
-            add_time = exponential_generator(1/tau_off)
-            if add_time < duration - t:
-                i = not i
-                t_slots.append([False, add_time])
-                t += add_time
-            else:
-                t_slots.append([False, duration - t])
-                break
-        else:
-            add_time = exponential_generator(1/tau_on)
-            if add_time < duration - t:
-                i = not i
-                t_slots.append([True, add_time])
-                t += add_time
-            else:
-                t_slots.append([True, duration - t])
-                break
-
+    # REASON: the promoter alternates between the on and the off states starting with on, so the blocks are of even
+    #         size with interleaved rates.
+    rates = np.array([1/tau_on, 1/tau_off])
+    block_size = 2 * _poisson_block_size(duration, 1/(tau_on + tau_off))
+    intervals, t_switch = _accumulate_intervals(
+        duration, lambda size: exponential_array_generator(np.tile(rates, size // 2), size, rng), block_size)
+    t_slots = [[i % 2 == 0, float(add_time)] for i, add_time in enumerate(intervals)]
+    # REASON: the last state is cut at the end of the duration.
+    t_slots.append([len(intervals) % 2 == 0, duration - float(t_switch[-1])])
     return t_slots
 
 
-def _stochastic_bursty_array_generator(duration, rate, tau_off=143.0, tau_loading=2.2):
+def _stochastic_bursty_array_generator(duration, rate, rng, tau_off=143.0, tau_loading=2.2):
     """
     This method generate a loading list that is both bursty and stochastic.
     """
     tau_on = rate * tau_loading * tau_off / (1.0 - rate * tau_loading)
-    promoter_list = _promoter_array_generator(duration, tau_on, tau_off)
+    promoter_list = _promoter_array_generator(duration, tau_on, tau_off, rng)
     t_loading = []
     for pair in promoter_list:
         if pair[0]:
-            loading_list = _stochastic_noncumulative_array_generator(pair[1], 1/tau_loading)
-            for t in loading_list:
-                t_loading.append(t)
+            loading_list = _stochastic_noncumulative_array_generator(pair[1], 1/tau_loading, rng)
+            t_loading.extend(loading_list.tolist())
 
     for i in range(len(t_loading)-1):
         t_loading[i+1] = t_loading[i] + t_loading[i]
     return t_loading, promoter_list
 
 
-def _uniform_bursty_array_generator(duration, rate, tau_off=143.0, tau_loading=2.2):
+def _uniform_bursty_array_generator(duration, rate, rng, tau_off=143.0, tau_loading=2.2):
     """
     This method generate a loading list that is both bursty and stochastic.
     """
     tau_on = rate * tau_loading * tau_off / (1.0 - rate * tau_loading)
-    promoter_list = _promoter_array_generator(duration, tau_on, tau_off)
+    promoter_list = _promoter_array_generator(duration, tau_on, tau_off, rng)
     t_loading = []
     for pair in promoter_list:
         if pair[0]:
             loading_list = _uniform_noncumulative_array_generator(pair[1], 1 / tau_loading)
-            for t in loading_list:
-                t_loading.append(t)
+            t_loading.extend(loading_list.tolist())
 
     for i in range(len(t_loading) - 1):
         t_loading[i + 1] = t_loading[i] + t_loading[i]
@@ -189,6 +190,8 @@ class LoadingList(DataContainer):
     """
     This is a container class for the loading list.
 
+    A stochastic loading list draws from rng, the random generator of the simulation.
+
     Attributes
     ----------
     location : int
@@ -196,7 +199,7 @@ class LoadingList(DataContainer):
     arr : numpy array of int
         this represents the loading list, each element is in index form.
     """
-    def __init__(self, parent, duration, rate, if_stochastic=False, if_bursty=False):
+    def __init__(self, parent, duration, rate, if_stochastic=False, if_bursty=False, rng=None):
         super().__init__(parent)
         self.location = 0
         self._arr = None
@@ -208,13 +211,13 @@ class LoadingList(DataContainer):
                 case False:
                     match if_stochastic:
                         case True:
-                            self._arr = _stochastic_cumulative_array_generator(duration, rate)
+                            self._arr = _stochastic_cumulative_array_generator(duration, rate, rng)
                         case False:
                             self._arr = _uniform_cumulative_array_generator(duration, rate)
                 case True:
-                    self._arr, self.promoter_list = _stochastic_bursty_array_generator(duration, rate)
+                    self._arr, self.promoter_list = _stochastic_bursty_array_generator(duration, rate, rng)
         self.length = len(self._arr)
-        self.arr = [int(self._arr[i]) for i in range(self.length)]
+        self.arr = np.asarray(self._arr).astype(int).tolist()
         self.length = len(self.arr)
         self._remove_duplicate()
         self.dumped = False
@@ -237,7 +240,8 @@ class LoadingList(DataContainer):
                 print("Repeat!")
 
     def _remove_duplicate(self):
-        self.arr = [i for n, i in enumerate(self.arr) if i not in self.arr[:n]]
+        # REASON: dict keeps the insertion order, so this keeps the first occurrence of each element in linear time.
+        self.arr = list(dict.fromkeys(self.arr))
         self.length = len(self.arr)
 
     def log(self, **kwargs):
@@ -0,0 +1,196 @@
+"""
+===================
+pause_site_table.py
+===================
+
+This helper file contains the table of the site-specific pausing sites of a gene.
+
+The sites are stored as arrays sorted by position, with the duration and the probability of a pause at each of them.
+Every RNAP keeps one flag per site, which is set once the site is passed or bypassed, and the index of the site it is
+pausing at, -1 if none. In each step, the site an RNAP may enter is found for all the RNAPs at once with searchsorted,
+so the cost of a step does not grow with the number of sites. Every RNAP also keeps the index of its next pending site,
+so the RNAPs far from any site they have not passed are filtered out with one comparison. The per-RNAP work is only
+done on the rare steps when a RNAP enters or leaves a site.
+"""
+from bisect import bisect_right
+
+import numpy as np
+from numpy.random import Generator
+
+
+class PauseSiteTable:
+    """
+    This class stores the pausing sites of a gene, sorted by position.
+
+    Parameters
+    ----------
+    position : array_like of int
+        the positions of the sites
+    duration : array_like of float
+        the time spent in each site in seconds
+    probability : array_like of float
+        the probability that a RNAP pauses at each site
+    pace : array_like of float
+        the stepping of a RNAP inside each site, i.e. 1/duration in index form
+
+    Attributes
+    ----------
+    size : int
+        the number of sites
+    entry : numpy array of int
+        the position where a RNAP stops when it enters each site, one before the site
+    pending_entry : numpy array of float
+        the entry of each site followed by inf, indexed by the next pending site of a RNAP
+    pending_entry_list : list[float]
+        pending_entry as a python list
+    """
+    def __init__(self, position, duration, probability, pace):
+        order = np.argsort(np.asarray(position), kind="stable")
+        self.position = _read_only(np.asarray(position)[order])
+        self.duration = _read_only(np.asarray(duration, dtype=float)[order])
+        self.probability = _read_only(np.asarray(probability, dtype=float)[order])
+        self.pace = _read_only(np.asarray(pace, dtype=float)[order])
+        self.entry = _read_only(self.position - 1)
+        self.pending_entry = _read_only(np.append(self.entry, np.inf))
+        self.size = self.position.shape[0]
+        # REASON: apply_to_rnap() works on one RNAP at a time, for which python lists are faster than numpy arrays.
+        self._position = self.position.tolist()
+        self._pace = self.pace.tolist()
+        self._entry = self.entry.tolist()
+        self.pending_entry_list = self.pending_entry.tolist()
+
+    def head(self, size: int):
+        """
+        This method returns the table of the first size sites.
+        """
+        return PauseSiteTable(self.position[:size], self.duration[:size], self.probability[:size], self.pace[:size])
+
+    def draw_bypass(self, rng: Generator) -> np.ndarray:
+        """
+        This method draws which sites a newly loaded RNAP will bypass.
+
+        Parameters
+        ----------
+        rng : Generator
+            the random generator to draw from, one uniform value is drawn for each site in order
+
+        Returns
+        -------
+        numpy array of bool
+            the passed flags of the sites, True for the bypassed ones
+        """
+        if self.size == 0:
+            return np.zeros(0, dtype=bool)
+        # REASON: the same draws as binary_generator(1-probability, rng) for each site in order.
+        return rng.random(self.size) >= 1 - self.probability
+
+    def get_next_pending(self, passed_site, start: int = 0) -> int:
+        """
+        This method returns the index of the first site from start that is not passed, size if there is none.
+        """
+        pending = np.flatnonzero(~passed_site[start:])
+        return start + int(pending[0]) if pending.size != 0 else self.size
+
+    def apply(self, position, passed_site, pausing_site, next_pause, stepping) -> tuple[np.ndarray, np.ndarray]:
+        """
+        This method applies site-specific pausing to the given attached RNAPs. All the arguments are modified in
+        place.
+
+        A RNAP pausing at a site moves by the pace of the site until it reaches the site, then the site is passed.
+        Otherwise, a RNAP that would reach the entry of a site it has not passed stops at the entry and starts pausing.
+        Only the first such site counts, and each RNAP is modified by at most one of the rules.
+
+        Parameters
+        ----------
+        position : numpy array of float
+            the positions of the RNAPs
+        passed_site : numpy array of bool, or list of them
+            the passed flags of each RNAP, passed_site[i] is the row of the i-th RNAP
+        pausing_site : numpy array of int
+            the index of the site each RNAP is pausing at, -1 if none
+        next_pause : numpy array of int
+            the index of the first site each RNAP has not passed, size if none
+        stepping : numpy array of float
+            the stepping of the RNAPs
+
+        Returns
+        -------
+        tuple[numpy array, numpy array]
+            the indices of the RNAPs that entered a site and of those that left a site
+        """
+        # STEP: only the pausing RNAPs, and the ones reaching the entry of their next pending site, can change.
+        pausing = pausing_site >= 0
+        rows = np.flatnonzero(pausing | (position + stepping >= self.pending_entry[next_pause]))
+        if rows.size == 0:
+            return rows, rows
+
+        # STEP: the pausing RNAPs either stay in the site or leave it.
+        paused = rows[pausing[rows]]
+        site = pausing_site[paused]
+        pace = self.pace[site]
+        staying = position[paused] + pace < self.position[site]
+        stepping[paused[staying]] = pace[staying]
+        left = paused[~staying]
+        for row, k in zip(left, site[~staying]):
+            passed_site[row][k] = True
+            next_pause[row] = self.get_next_pending(passed_site[row], next_pause[row])
+        pausing_site[left] = -1
+
+        # STEP: the other RNAPs enter the first site they have not passed whose entry is in (position, position +
+        #       stepping].
+        rows = rows[~pausing[rows]]
+        first = np.searchsorted(self.entry, position[rows], side="right")
+        last = np.searchsorted(self.entry, position[rows] + stepping[rows], side="right")
+        crossing = first < last
+        entered = []
+        for row, start, stop in zip(rows[crossing], first[crossing], last[crossing]):
+            pending = np.flatnonzero(~passed_site[row][start:stop])
+            if pending.size == 0:
+                continue
+            k = start + pending[0]
+            pausing_site[row] = k
+            position[row] = self.entry[k]
+            stepping[row] = 0
+            entered.append(row)
+        return np.array(entered, dtype=int), left
+
+    def apply_to_rnap(self, rnap, stepping: float) -> float:
+        """
+        This method is the version of apply() for one RNAP instance, whose position, passed_site, pausing_site and
+        next_pause are modified in place.
+
+        Parameters
+        ----------
+        rnap : RNAP
+            the attached RNAP
+        stepping : float
+            the stepping of the RNAP
+
+        Returns
+        -------
+        float
+            the corrected stepping
+        """
+        k = rnap.pausing_site
+        if k >= 0:
+            # REASON: check if the rnap is still in the pause site.
+            pace = self._pace[k]
+            if rnap.position + pace < self._position[k]:
+                return pace
+            # REASON: passing out of the pausing site.
+            rnap.passed_site[k] = True
+            rnap.pausing_site = -1
+            rnap.next_pause = self.get_next_pending(rnap.passed_site, rnap.next_pause)
+            return stepping
+        # REASON: passing into the first pending site whose entry is crossed.
+        for k in range(bisect_right(self._entry, rnap.position), bisect_right(self._entry, rnap.position + stepping)):
+            if not rnap.passed_site[k]:
+                rnap.pausing_site = k
+                rnap.position = self._entry[k]
+                return 0
+        return stepping
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array.setflags(write=False)
+    return array
@@ -0,0 +1,101 @@
+"""
+==============
+phase_timer.py
+==============
+
+This helper file contains the opt-in instrumentation of the hot path.
+
+A PhaseTimer accumulates the wall time and the number of calls of each phase of each entity type. The phases are
+timed by replacing the method of an instance with a TimedMethod, so nothing is changed, and nothing costs, when the
+timer is not enabled. The phases can be nested, e.g. the "step" of the RNAPList contains the "step" of every
+RIBOContainer, so their times are not additive.
+"""
+import time
+
+
+class TimedMethod:
+    """
+    This class wraps a method of one instance, and adds the time of every call to a PhaseTimer. It is a class rather
+    than a closure so that the instrumented instances can still be pickled.
+    """
+    def __init__(self, timer, instance, method_name: str, entity: str, phase: str):
+        self.timer = timer
+        self.instance = instance
+        self.method_name = method_name
+        self.entity = entity
+        self.phase = phase
+
+    def __call__(self, *args, **kwargs):
+        method = getattr(type(self.instance), self.method_name)
+        start = time.perf_counter()
+        result = method(self.instance, *args, **kwargs)
+        self.timer.add(self.entity, self.phase, time.perf_counter() - start)
+        return result
+
+
+class PhaseTimer:
+    """
+    This class accumulates the wall time and the number of calls per entity type and phase.
+
+    Attributes
+    ----------
+    records : dict[tuple[str, str], list]
+        the [number of calls, total seconds] of each (entity type, phase)
+    """
+    def __init__(self):
+        self.records = {}
+
+    def instrument(self, instance, method_name: str, entity: str, phase: str = None):
+        """
+        This method times every call of the method method_name of instance as the given phase.
+
+        Parameters
+        ----------
+        instance : object
+            the instance to instrument, other instances of the same class are not affected
+        method_name : str
+            the name of the method
+        entity : str
+            the entity type shown in the summary
+        phase : str, optional
+            the phase shown in the summary (default is method_name)
+        """
+        setattr(instance, method_name, TimedMethod(self, instance, method_name, entity,
+                                                   method_name if phase is None else phase))
+
+    def add(self, entity: str, phase: str, elapsed: float):
+        record = self.records.get((entity, phase))
+        if record is None:
+            self.records[(entity, phase)] = [1, elapsed]
+        else:
+            record[0] += 1
+            record[1] += elapsed
+
+    def reset(self):
+        self.records = {}
+
+    def get_summary(self) -> list[dict]:
+        """
+        This method returns one row for each (entity type, phase), the most expensive first.
+
+        Returns
+        -------
+        list[dict]
+            the rows, with the keys "entity", "phase", "calls", "total [s]" and "per call [us]"
+        """
+        rows = []
+        for (entity, phase), (calls, elapsed) in self.records.items():
+            rows.append({"entity": entity, "phase": phase, "calls": calls, "total [s]": elapsed,
+                         "per call [us]": elapsed / calls * 1e6})
+        rows.sort(key=lambda row: row["total [s]"], reverse=True)
+        return rows
+
+    def format_summary(self) -> str:
+        """
+        This method formats the summary as a text table.
+        """
+        lines = [f"{'entity':<16}{'phase':<24}{'calls':>10}{'total [s]':>12}{'per call [us]':>16}"]
+        for row in self.get_summary():
+            lines.append(f"{row['entity']:<16}{row['phase']:<24}{row['calls']:>10}{row['total [s]']:>12.4f}"
+                         f"{row['per call [us]']:>16.2f}")
+        return "\n".join(lines)
@@ -4,14 +4,38 @@ random_generator.py
 ===================
 
 This is the file for all the random generator.
+
+All the generators draw from an explicit numpy Generator, which is owned by the controller of the simulation. The
+independent streams of parallel or batched samples are spawned from one SeedSequence.
 """
 
 
-from numpy import random as rand
+from numpy.random import Generator, SeedSequence
 import math
 
 
-def exponential_generator(rate):
+def spawn_seed_sequences(seed, amount: int) -> list[SeedSequence]:
+    """
+    This method spawns independent child seed sequences, one for each sample.
+
+    Parameters
+    ----------
+    seed : int, SeedSequence or None
+        the root seed, None means a fresh seed from the operating system
+    amount : int
+        the number of child seed sequences
+
+    Returns
+    -------
+    list[SeedSequence]
+        the i-th element only depends on the root seed and i.
+    """
+    if not isinstance(seed, SeedSequence):
+        seed = SeedSequence(seed)
+    return seed.spawn(amount)
+
+
+def exponential_generator(rate, rng: Generator):
     """
     This method generate a float value based on a exponential distribution.
 
@@ -19,15 +43,38 @@ def exponential_generator(rate):
     ----------
     rate : float
         this is the rate of the exponential distribution or 1/mean of the pdf.
+    rng : Generator
+        the random generator to draw from
 
     Returns
     -------
     float
     """
-    return rand.exponential(scale=1/rate)
+    return rng.exponential(scale=1/rate)
+
+
+def exponential_array_generator(rate, size, rng: Generator):
+    """
+    This method generate an array of values based on a exponential distribution.
+
+    Parameters
+    ----------
+    rate : float or numpy array
+        this is the rate of the exponential distribution or 1/mean of the pdf, an array gives the rate of each value.
+    size : int
+        the number of values
+    rng : Generator
+        the random generator to draw from
+
+    Returns
+    -------
+    numpy array of float
+    """
+    # REASON: the standard exponential is drawn once and scaled, which works for both a float and an array rate.
+    return rng.standard_exponential(size) / rate
 
 
-def stepwise_exponential_generator(m1, m2, t_crit):
+def stepwise_exponential_generator(m1, m2, t_crit, rng: Generator):
     """
     This method generate a float value based on a step-wise random distribution.
 
@@ -41,6 +88,8 @@ def stepwise_exponential_generator(m1, m2, t_crit):
         this represents the mean of the back exponential distribution
     t_crit : float
         this is the cutoff value between the two exponential distribution
+    rng : Generator
+        the random generator to draw from
 
     Returns
     ------
@@ -48,35 +97,36 @@ def stepwise_exponential_generator(m1, m2, t_crit):
         the end result
     """
     portion1 = 1-math.exp(-1*t_crit/m1)
-    portion2 = 1-portion1
-    choice = rand.choice([1,2], p = [portion1, portion2])
-    if choice == 1:
+    if rng.random() < portion1:
         passed = False
         while not passed:
-            result =rand.exponential(scale = m1)
+            result = rng.exponential(scale=m1)
             if result <= t_crit:
                 passed = True
     else:
         passed = False
         while not passed:
-            result =rand.exponential(scale = m2)
+            result = rng.exponential(scale=m2)
             if result >= t_crit:
                 passed = True
     return result
 
 
-def binary_generator(probability):
+def binary_generator(probability, rng: Generator):
     """
     This method generate a true or false value randomly based on the provided probability
 
     Parameters
     ----------
     probability : float
-        the probability for the result to be true
+        the probability for the result to be False
+    rng : Generator
+        the random generator to draw from
 
     Returns
     -------
     bool
         True of False
     """
-    return rand.choice(a=[True, False], p=[1 - probability, probability])
\ No newline at end of file
+    # REASON: one uniform draw is much cheaper than choice() over a python list, with the same distribution.
+    return bool(rng.random() >= probability)
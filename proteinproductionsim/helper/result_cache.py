@@ -0,0 +1,136 @@
+"""
+===============
+result_cache.py
+===============
+
+This helper file contains the content-addressed cache of simulation results.
+
+A result is a dict of numpy arrays. It is stored under the SHA-256 hash of its identity, which is the run configuration,
+the seed and the code version, so a result is only reused if all three are the same. The code version is the hash of
+the source files of this package, which means that any change to the simulation invalidates the old results.
+"""
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from ..controller.dna_sim_controller import RecordConfig
+from ..datacontainer.setting import Setting
+
+# REASON: these attributes of a RecordConfig say how and where the recorders store their data, not which data they
+#         record, so they do not change the result.
+_RECORD_STORAGE_ATTRIBUTES = ("parent", "show_progress_bar", "storage_path", "chunk_size")
+
+
+def get_code_version() -> str:
+    """
+    This method returns the hash of all the source files of this package.
+
+    Returns
+    -------
+    str
+        the hexadecimal SHA-256 digest
+    """
+    package_directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    digest = hashlib.sha256()
+    for directory, sub_directories, files in os.walk(package_directory):
+        # REASON: the walk order depends on the file system, so it is sorted to keep the hash stable.
+        sub_directories.sort()
+        for name in sorted(files):
+            if name.endswith(".py"):
+                path = os.path.join(directory, name)
+                digest.update(os.path.relpath(path, package_directory).encode())
+                with open(path, "rb") as file:
+                    digest.update(file.read())
+    return digest.hexdigest()
+
+
+def _canonicalize(value, name: str):
+    # REASON: the keyword arguments of a run may be Settings, RecordConfigs or numpy values, e.g. from a numpy grid,
+    #         which are hashed by the JSON of their content.
+    match value:
+        case Setting():
+            return {"Setting": _canonicalize(value.get(), name)}
+        case RecordConfig():
+            return {"RecordConfig": {attribute: _canonicalize(flag, name) for attribute, flag in vars(value).items()
+                                     if attribute not in _RECORD_STORAGE_ATTRIBUTES}}
+        case np.generic():
+            return value.item()
+        case np.ndarray():
+            return _canonicalize(value.tolist(), name)
+        case dict():
+            return {str(key): _canonicalize(item, f"{name}.{key}") for key, item in value.items()}
+        case list() | tuple():
+            return [_canonicalize(item, name) for item in value]
+        case None | bool() | int() | float() | str():
+            return value
+        case _:
+            raise TypeError(f"the value of {name} of type {type(value).__name__} cannot be part of a cache key, use "
+                            f"JSON values, numpy values, a Setting or a RecordConfig.")
+
+
+def get_default_cache_directory() -> str:
+    return os.path.join(os.path.expanduser("~"), ".cache", "proteinproductionsim")
+
+
+class ResultCache:
+    """
+    This class stores and loads results in a directory, under the hash of their identity.
+
+    Parameters
+    ----------
+    directory : str, optional
+        the cache directory (default is ~/.cache/proteinproductionsim)
+    """
+    def __init__(self, directory: str = None):
+        self.directory = directory if directory is not None else get_default_cache_directory()
+
+    @staticmethod
+    def get_key(**identity) -> str:
+        """
+        This method hashes the identity of a result.
+
+        Parameters
+        ----------
+        identity
+            the quantities that determine the result, e.g. the configuration, the seed and the code version. They are
+            JSON values, numpy values, Settings, hashed by their parameters, or RecordConfigs, hashed by their flags.
+
+        Returns
+        -------
+        str
+            the hexadecimal SHA-256 digest of the canonical JSON of the identity
+        """
+        identity = {name: _canonicalize(value, name) for name, value in identity.items()}
+        text = json.dumps(identity, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(text.encode()).hexdigest()
+
+    def _get_path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".npz")
+
+    def contains(self, key) -> bool:
+        return os.path.exists(self._get_path(key))
+
+    def load(self, key) -> dict[str, np.ndarray]:
+        """
+        This method loads the result stored under key, None if there is none.
+        """
+        path = self._get_path(key)
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as file:
+            return {name: file[name] for name in file.files}
+
+    def save(self, key, result: dict[str, np.ndarray]):
+        """
+        This method stores the result under key.
+        """
+        path = self._get_path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # REASON: the file is written aside and then renamed, so a crash or a parallel writer never leaves a partial
+        #         result under the key.
+        temporary_path = f"{path}.{os.getpid()}.tmp"
+        with open(temporary_path, "wb") as file:
+            np.savez(file, **result)
+        os.replace(temporary_path, path)
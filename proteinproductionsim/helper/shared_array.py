@@ -0,0 +1,90 @@
+"""
+===============
+shared_array.py
+===============
+
+This helper file contains the numpy arrays backed by multiprocessing shared memory, through which the workers of a pool
+hand their results to the parent process without pickling them.
+
+The parent creates one SharedArray for each result, of shape (sample amount, ...), and sends its description to the
+workers. A worker attaches to the block once and writes each of its samples into its row. The array of the parent keeps
+the block mapped for as long as the array, or any view of it, is alive, so the name of the block can be unlinked as soon
+as the workers are done, and the memory is released with the last view.
+"""
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+class _SharedMemoryOwner:
+    # REASON: numpy keeps this object as the base of the arrays built from it, which keeps the block mapped. An array
+    #         built on the buffer of the block directly would not, and would point to unmapped memory once the block is
+    #         closed.
+    def __init__(self, block: shared_memory.SharedMemory, shape: tuple, dtype):
+        self.block = block
+        view = np.frombuffer(block.buf, dtype=np.uint8)
+        address = view.ctypes.data
+        del view
+        self.__array_interface__ = {"shape": tuple(shape), "typestr": np.dtype(dtype).str, "data": (address, False),
+                                    "version": 3}
+
+
+class SharedArray:
+    """
+    This class is a numpy array in a shared memory block.
+
+    Parameters
+    ----------
+    shape : tuple
+        the shape of the array
+    dtype : numpy dtype
+        the type of the array
+    name : str, optional
+        the name of an existing block to attach to, None creates a new block
+
+    Attributes
+    ----------
+    array : numpy array
+        the array on the block
+    """
+    def __init__(self, shape: tuple, dtype, name: str = None):
+        self.shape = tuple(shape)
+        self.dtype = np.dtype(dtype)
+        # REASON: a block cannot be empty.
+        size = max(int(np.prod(self.shape)) * self.dtype.itemsize, 1)
+        if name is None:
+            self.block = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.block = shared_memory.SharedMemory(name=name)
+        self.name = self.block.name
+        self.array = np.asarray(_SharedMemoryOwner(self.block, self.shape, self.dtype))
+
+    def get_spec(self) -> tuple[str, tuple, str]:
+        """
+        This method returns the picklable description of the array, with which a worker attaches to it.
+        """
+        return self.name, self.shape, self.dtype.str
+
+    @classmethod
+    def attach(cls, spec: tuple[str, tuple, str]) -> "SharedArray":
+        name, shape, dtype = spec
+        return cls(shape, dtype, name)
+
+    def unlink(self):
+        """
+        This method removes the name of the block, the memory stays valid until the last view of the array is gone.
+        """
+        self.block.unlink()
+
+
+# REASON: the blocks a worker process attached to, so each block is attached once and not once per sample.
+_attached: dict[str, SharedArray] = {}
+
+
+def get_attached_array(spec: tuple[str, tuple, str]) -> np.ndarray:
+    """
+    This method returns the array of the given description in a worker process.
+    """
+    if spec[0] not in _attached:
+        _attached[spec[0]] = SharedArray.attach(spec)
+    return _attached[spec[0]].array
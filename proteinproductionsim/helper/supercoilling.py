@@ -1,10 +1,67 @@
-from ..variables import gamma
+from ..variables import gamma, tau_0, tau_c, v_0
+import numpy as np
 
 
-def s(r):
+def s(r, gamma=gamma):
     return gamma * r
 
 
 def n_dependence_cubic_3(x):
     # return 1+0.778753*(x-1)+3.3249*(x-1)**2+0.379478*(x-3)**3
     return 1+0.778753*(x-1)+3.3249*(x-1)**2+0.379478*(x-1)**3
+
+
+def phi_array(positions, r_ref, promoter_state, gamma=gamma):
+    """
+    This method generates the supercoiling phi at both sides of every attached RNAP.
+
+    Parameters
+    ----------
+    positions : numpy array of float
+        the positions of the attached RNAPs, front-most first.
+    r_ref : numpy array of float
+        the reference position of each attached RNAP.
+    promoter_state : bool
+        if the promoter is open, the supercoiling behind the last RNAP is diffused.
+    gamma : float, optional
+        the supercoiling constant (default is the one of variables.py)
+
+    Returns
+    -------
+    numpy array of float
+        the phi array of size len(positions)+1, the front-most element is always 0.
+    """
+    size = positions.shape[0]
+    phi = np.zeros(size + 1)
+    if size == 0:
+        return phi
+    # REASON: middle elements, the twist between RNAP i-1 and RNAP i.
+    phi[1:size] = s(positions[:-1] - r_ref[:-1] - positions[1:], gamma)
+    # REASON: the back-most element depends on the promoter state.
+    if not promoter_state:
+        phi[size] = s(positions[-1] - r_ref[-1], gamma)
+    return phi
+
+
+def torque_array(phi, n, tau_0=tau_0):
+    """
+    This method generates the torque experienced by each attached RNAP from the phi array.
+    """
+    return -tau_0 * n * (phi[:-1] - phi[1:])
+
+
+def velocity_array(torq, tau_c=tau_c, v_0=v_0):
+    """
+    This method generates the velocity of each attached RNAP from its torque.
+
+    The torque is clipped at +-1.5*tau_c, above which the RNAP is fully stalled and below which the RNAP moves at twice
+    the basic velocity. The exponential is only evaluated inside the interval to avoid overflow.
+    """
+    bound = 1.5 * tau_c
+    stalled = torq > bound
+    boosted = torq < -bound
+    inside = np.where(stalled | boosted, 0.0, torq)
+    velo = 2 * v_0 / (1 + np.exp(2 * (inside / tau_c) ** 3))
+    velo[stalled] = 0
+    velo[boosted] = 2 * v_0
+    return velo
@@ -0,0 +1,129 @@
+"""
+===========
+plotting.py
+===========
+
+This file contains the plotting layer of the package.
+
+The recorders and the statistics only keep numpy data, which they expose through their get methods. The plots are drawn
+here from these accessors, on the matplotlib axes given by the caller. matplotlib is only imported by the functions
+which create a figure, when they are called, so the simulation, the workers of the pools and the command line runs
+never import matplotlib.
+"""
+import numpy as np
+
+
+def format_n_th_rnap(number):
+    if number % 10 == 0:
+        label = f"{number + 1}st RNAP"
+    elif number % 10 == 1:
+        label = f"{number + 1}nd RNAP"
+    elif number % 10 == 2:
+        label = f"{number + 1}rd RNAP"
+    else:
+        label = f"{number + 1}th RNAP"
+    return label
+
+
+def plot_rnap_position(axe, recorder):
+    """
+    This method plots the position trajectory of each RNAP of a RNAPPositionRecorder.
+    """
+    serial_numbers, offsets, time, position = recorder.get_trajectories()
+    axe.set_xlabel('Time [s]')
+    axe.set_ylabel('Position [bps]')
+    axe.set_title('RNAP Position Plot')
+    axe.grid(True)
+    for i in range(len(serial_numbers)):
+        label = format_n_th_rnap(serial_numbers[i])
+        axe.plot(time[offsets[i]:offsets[i + 1]], position[offsets[i]:offsets[i + 1]], label=label)
+
+
+def plot_single_value(axe, recorder):
+    """
+    This method plots the series of a SingleValueRecorder versus time.
+    """
+    x_label, y_label = recorder.get_labels()
+    name_x, name_y = recorder.get_names()
+    axe.set_xlabel(x_label)
+    axe.set_ylabel(y_label)
+    axe.set_title(f'{name_x} versus {name_y} Plot')
+    axe.grid(True)
+    axe.plot(recorder.get_time(), recorder.get())
+
+
+def plot_five_three(axe, recorder):
+    """
+    This method plots the 5' and 3' mRNA amounts of a FiveThreeRecorder versus time.
+    """
+    five, three = recorder.get_five_six()
+    time_list = recorder.get_time()
+    axe.set_xlabel('Time [s]')
+    axe.set_ylabel('Amount')
+    axe.set_title('5 and 3 mRNA amount versus time Plot')
+    axe.grid(True)
+    axe.plot(time_list, five, label='Five End')
+    axe.plot(time_list, three, label='Three End')
+
+
+def plot_supercoiling(axe, recorder):
+    """
+    This method plots the supercoiling trajectory of the last rnap_record_amount RNAPs of a SupercoilingRecorder.
+    """
+    serial_numbers, offsets, time, supercoiling = recorder.get_trajectories()
+    axe.set_xlabel('Time [s]')
+    axe.set_ylabel('Supercoiling')
+    axe.set_title('RNAP Supercoiling Plot')
+    axe.grid(True)
+    for i in range(max(len(serial_numbers)-recorder.rnap_record_amount, 0), len(serial_numbers)):
+        label = format_n_th_rnap(serial_numbers[i])
+        axe.plot(time[offsets[i]:offsets[i + 1]], supercoiling[offsets[i]:offsets[i + 1]], label=label)
+
+
+def plot_ensemble_statistics(axe, statistics, name, quantiles=(0.05, 0.95), dt: float = None):
+    """
+    This method plots the mean of the series name of an EnsembleStatistics, with the band between the two given
+    quantiles.
+    """
+    time_list = statistics.get_time(name, dt)
+    axe.set_xlabel(f"Time [{'time step' if dt is None else 's'}]")
+    axe.set_ylabel(name)
+    axe.set_title(f"Ensemble of {statistics.sample_amount} samples")
+    axe.grid(True)
+    axe.fill_between(time_list, statistics.get_quantile(name, quantiles[0]),
+                     statistics.get_quantile(name, quantiles[1]), alpha=0.3,
+                     label=f"{quantiles[0]}-{quantiles[1]} quantiles")
+    axe.plot(time_list, statistics.get_mean(name), label="mean")
+    axe.legend()
+
+
+def plot_controller(controller, path: str = None, show: bool = False):
+    """
+    This method plots every recorder of a finished DNASimController on its own axes of one figure.
+
+    Parameters
+    ----------
+    controller : DNASimController
+        the finished controller
+    path : str, optional
+        the file the figure is saved to
+    show : bool, optional
+        if the figure is shown (default is False)
+
+    Returns
+    -------
+    matplotlib Figure
+    """
+    # REASON: matplotlib is only imported when a figure is made, see the description of this file.
+    import matplotlib.pyplot as plt
+
+    names = list(controller.data_recorder)
+    fig, axes = plt.subplots(len(names), 1, figsize=(8, 3 * len(names)), squeeze=False)
+    for name, axe in zip(names, np.ravel(axes)):
+        controller.data_recorder[name].plot(axe)
+    fig.tight_layout()
+    if path is not None:
+        fig.savefig(path)
+    if show:
+        plt.show()
+    return fig
@@ -0,0 +1,357 @@
+"""
+==========
+service.py
+==========
+
+This file contains the simulation service, a local asyncio server which runs the simulations submitted by its clients
+on one shared pool of worker processes, and streams their progress back.
+
+The clients connect to a Unix socket, or to a TCP port of localhost, and exchange newline-delimited JSON. Every request
+is one line, and every event sent back is one line tagged with the "request" id of the client, so one connection can
+have several requests in flight. The requests are:
+
+    {"request": id, "type": "run", "rnap_loading_rate": 0.5, "seed": 1, "kwargs": {...}, "setting": {...},
+     "record_five_three": false}
+        one DNASimController run. kwargs are the DNAStrand keyword arguments, setting the parameters of the Setting
+        in which the run differs from the default one.
+    {"request": id, "type": "sweep", "grid": {...}, "sample_amount": 4, "seed": 1, "fixed_kwargs": {...},
+     "setting": {...}}
+        a sweep, see SweepController. the i-th sample of every configuration is seeded as in the SweepController.
+    {"request": id, "type": "status"}
+        the number of workers and of the runs in flight.
+
+The events of a run are:
+    {"event": "accepted"}
+    {"event": "progress", "time_index": i, "total_time": n, "protein amount": [...]}
+        sent every progress_interval steps, with the values recorded since the previous progress event.
+    {"event": "result", "data": {...}}
+        the recorder outputs, as in collect_recorder_data().
+    {"event": "error", "message": "..."}
+
+The events of a sweep are "accepted", then one "sample" event with the "config_index", the "sample_index" and the
+"data" of each finished sample, and "done" at the end.
+
+Usage:
+    python -m proteinproductionsim.service --socket /tmp/proteinproductionsim.sock [--workers 4]
+    python -m proteinproductionsim.service --port 8765
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from .controller.dna_sim_controller import DNASimController, RecordConfig
+from .controller.multi_sample_controller import collect_recorder_data
+from .controller.sweep_controller import expand_grid
+from .datacontainer.setting import Setting
+from .helper.random_generator import spawn_seed_sequences
+
+# REASON: the time steps between two progress events of a run, 10 simulated seconds with the default Setting.
+PROGRESS_INTERVAL = 300
+
+
+def _to_json(data: dict[str, np.ndarray]) -> dict[str, list]:
+    return {name: np.asarray(value).tolist() for name, value in data.items()}
+
+
+def run_task(task_id: int, spec: dict, seed, events, progress_interval: int = PROGRESS_INTERVAL) -> dict:
+    """
+    This method runs one simulation in a worker process, and puts its progress events to events.
+
+    Parameters
+    ----------
+    task_id : int
+        the id of the task, which tags its events
+    spec : dict
+        the "rnap_loading_rate", the "kwargs" of the DNAStrand, the "setting" changes and "record_five_three"
+    seed : int, SeedSequence or None
+        the seed of the run
+    events : Queue
+        the queue shared with the service, None if the progress is not reported
+    progress_interval : int, optional
+        the time steps between two progress events
+
+    Returns
+    -------
+    dict[str, list]
+        the recorder outputs
+    """
+    sent = {"protein amount": 0}
+
+    def report(controller):
+        data = controller.get_data("protein amount").get()
+        event = {"event": "progress", "time_index": controller.time_index, "total_time": controller.total_time,
+                 "protein amount": np.asarray(data[sent["protein amount"]:]).tolist()}
+        sent["protein amount"] = len(data)
+        events.put((task_id, event))
+
+    try:
+        setting = Setting(**spec.get("setting", {}))
+        record_config = RecordConfig(record_five_three=spec.get("record_five_three", True), show_progress_bar=False)
+        controller = DNASimController(spec["rnap_loading_rate"], record_config, seed=seed, setting=setting,
+                                      progress_function=report if events is not None else None,
+                                      progress_interval=progress_interval, **spec.get("kwargs", {}))
+        controller.start()
+        return _to_json(collect_recorder_data(controller))
+    finally:
+        # REASON: the last event of a task, after which the service only waits for its result.
+        if events is not None:
+            events.put((task_id, None))
+
+
+class SimulationService:
+    """
+    This class is the simulation service.
+
+    Parameters
+    ----------
+    n_workers : int, optional
+        the number of worker processes, None means all the cores
+    progress_interval : int, optional
+        the time steps between two progress events of a run
+
+    Attributes
+    ----------
+    running : int
+        the number of runs in flight
+    """
+    def __init__(self, n_workers: int = None, progress_interval: int = PROGRESS_INTERVAL):
+        self.n_workers = n_workers if n_workers is not None else os.cpu_count()
+        self.progress_interval = progress_interval
+        self.running = 0
+        self._task_id = itertools.count()
+        self._streams: dict[int, asyncio.Queue] = {}
+        self._pool = None
+        self._manager = None
+        self._events = None
+        self._server = None
+        self._loop = None
+
+    async def start(self, path: str = None, host: str = "127.0.0.1", port: int = 0):
+        """
+        This method starts the worker pool and listens on the Unix socket path, or on host and port if path is None.
+        """
+        self._loop = asyncio.get_running_loop()
+        self._pool = ProcessPoolExecutor(max_workers=self.n_workers)
+        self._manager = multiprocessing.Manager()
+        self._events = self._manager.Queue()
+        threading.Thread(target=self._forward_events, daemon=True).start()
+        if path is not None:
+            self._server = await asyncio.start_unix_server(self._handle_client, path=path, limit=2 ** 24)
+        else:
+            self._server = await asyncio.start_server(self._handle_client, host=host, port=port, limit=2 ** 24)
+        return self._server
+
+    def get_address(self):
+        return self._server.sockets[0].getsockname()
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        self._server.close()
+        await self._server.wait_closed()
+        self._events.put(None)
+        self._pool.shutdown(cancel_futures=True)
+        self._manager.shutdown()
+
+    def _forward_events(self):
+        # REASON: the queue of the manager is blocking, it is read in a thread which hands the events to the loop.
+        while True:
+            item = self._events.get()
+            if item is None:
+                return
+            task_id, event = item
+            self._loop.call_soon_threadsafe(self._dispatch, task_id, event)
+
+    def _dispatch(self, task_id, event):
+        if task_id in self._streams:
+            self._streams[task_id].put_nowait(event)
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        requests = set()
+
+        async def send(request_id, event):
+            event["request"] = request_id
+            writer.write((json.dumps(event) + "\n").encode())
+            await writer.drain()
+
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError as error:
+                    await send(None, {"event": "error", "message": f"invalid request: {error}"})
+                    continue
+                task = asyncio.create_task(self._serve_request(request, send))
+                requests.add(task)
+                task.add_done_callback(requests.discard)
+            if requests:
+                await asyncio.gather(*requests)
+        except (ConnectionError, asyncio.CancelledError):
+            # REASON: the client left or the service is closing, the requests in flight are dropped.
+            for task in requests:
+                task.cancel()
+        finally:
+            writer.close()
+
+    async def _serve_request(self, request: dict, send):
+        request_id = request.get("request")
+        try:
+            match request.get("type"):
+                case "run":
+                    await send(request_id, {"event": "accepted"})
+                    data = await self._run(request, request.get("seed"),
+                                           lambda event: send(request_id, event))
+                    await send(request_id, {"event": "result", "data": data})
+                case "sweep":
+                    await send(request_id, {"event": "accepted"})
+                    await self._sweep(request, lambda event: send(request_id, event))
+                    await send(request_id, {"event": "done"})
+                case "status":
+                    await send(request_id, {"event": "status", "workers": self.n_workers, "running": self.running})
+                case other:
+                    await send(request_id, {"event": "error", "message": f"unknown request type {other}."})
+        except ConnectionError:
+            raise
+        except Exception as error:
+            await send(request_id, {"event": "error", "message": f"{type(error).__name__}: {error}"})
+
+    async def _run(self, spec: dict, seed, send=None) -> dict:
+        """
+        This method runs one simulation on the pool, and sends its progress events if send is given.
+        """
+        task_id = next(self._task_id)
+        stream = asyncio.Queue()
+        self._streams[task_id] = stream
+        self.running += 1
+        try:
+            pool = self._pool
+            future = self._loop.run_in_executor(pool, run_task, task_id, spec, seed,
+                                                self._events if send is not None else None, self.progress_interval)
+            # REASON: a worker which dies, e.g. killed for its memory, never sends the end of the stream, so the
+            #         stream is also ended when the run fails and the error of the future reaches the client.
+            def end_stream(done):
+                if done.cancelled() or done.exception() is not None:
+                    stream.put_nowait(None)
+
+            future.add_done_callback(end_stream)
+            if send is not None:
+                while (event := await stream.get()) is not None:
+                    await send(event)
+            try:
+                return await future
+            except BrokenProcessPool:
+                # REASON: the pool cannot run anything once a worker died, the next runs get a new one.
+                if self._pool is pool:
+                    self._pool = ProcessPoolExecutor(max_workers=self.n_workers)
+                    pool.shutdown(wait=False, cancel_futures=True)
+                raise
+        finally:
+            self.running -= 1
+            del self._streams[task_id]
+
+    async def _sweep(self, spec: dict, send):
+        configs = expand_grid(spec.get("grid", {}), **spec.get("fixed_kwargs", {}))
+        seeds = spawn_seed_sequences(spec.get("seed"), spec.get("sample_amount", 1))
+
+        async def run_sample(config_index, sample_index):
+            config = dict(configs[config_index])
+            run_spec = {"rnap_loading_rate": config.pop("rnap_loading_rate"), "kwargs": config,
+                        "setting": spec.get("setting", {}), "record_five_three": spec.get("record_five_three", True)}
+            data = await self._run(run_spec, seeds[sample_index])
+            await send({"event": "sample", "config_index": config_index, "sample_index": sample_index,
+                        "data": data})
+
+        await asyncio.gather(*(run_sample(config_index, sample_index) for config_index in range(len(configs))
+                               for sample_index in range(len(seeds))))
+
+
+async def stream_request(request: dict, path: str = None, host: str = "127.0.0.1", port: int = None):
+    """
+    This method sends one request to a running service and yields its events until the last one.
+
+    Parameters
+    ----------
+    request : dict
+        the request, see the description of this file
+    path : str, optional
+        the Unix socket of the service
+    host, port : optional
+        the address of the service if path is not given
+
+    Yields
+    ------
+    dict
+        the events of the request
+    """
+    if path is not None:
+        reader, writer = await asyncio.open_unix_connection(path, limit=2 ** 24)
+    else:
+        reader, writer = await asyncio.open_connection(host, port, limit=2 ** 24)
+    try:
+        writer.write((json.dumps(request) + "\n").encode())
+        await writer.drain()
+        while line := await reader.readline():
+            event = json.loads(line)
+            yield event
+            if event["event"] in ("result", "done", "status", "error"):
+                break
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+def submit(request: dict, path: str = None, host: str = "127.0.0.1", port: int = None,
+           progress_function=None) -> dict:
+    """
+    This method sends one request to a running service and blocks until its last event, which is returned. The other
+    events are passed to progress_function, if given.
+    """
+    async def run():
+        last = None
+        async for event in stream_request(request, path, host, port):
+            if last is not None and progress_function is not None:
+                progress_function(last)
+            last = event
+        return last
+    return asyncio.run(run())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the proteinproductionsim simulation service.")
+    parser.add_argument("--socket", default=None, help="the Unix socket to listen on")
+    parser.add_argument("--host", default="127.0.0.1", help="the host to listen on if no socket is given")
+    parser.add_argument("--port", type=int, default=8765, help="the port to listen on if no socket is given")
+    parser.add_argument("--workers", type=int, default=None, help="the number of worker processes")
+    parser.add_argument("--progress-interval", type=int, default=PROGRESS_INTERVAL,
+                        help="the time steps between two progress events of a run")
+    args = parser.parse_args(argv)
+
+    async def serve():
+        service = SimulationService(args.workers, args.progress_interval)
+        await service.start(args.socket, args.host, args.port)
+        print(f"serving on {service.get_address()}", flush=True)
+        try:
+            await service.serve_forever()
+        finally:
+            await service.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
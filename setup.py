@@ -14,5 +14,6 @@ setup(name='proteinproductionsim',
                 'proteinproductionsim.environment',
                 'proteinproductionsim.helper'
                 ],
+      entry_points={'console_scripts': ['proteinproductionsim = proteinproductionsim.cli:main']},
       zip_safe=False
       )
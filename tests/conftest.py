@@ -0,0 +1,106 @@
+"""
+The shared helpers of the tests.
+
+The tests compare seeded runs of the engines and modes of the simulation against the reference one, the object engine
+of the DNASimController, on a short gene so that every RNAP, mRNA and ribosome goes through its whole life in a short
+run.
+"""
+import math
+
+import numpy as np
+import pytest
+
+from proteinproductionsim.controller.dna_sim_controller import DNASimController, RecordConfig
+from proteinproductionsim.datacontainer.setting import Setting
+
+# REASON: a short gene, with two pausing sites on it, on which a RNAP is transcribed in about 40 s and a mRNA lives 90 s
+#         on average.
+SHORT_SETTING = Setting(total_time=100, length=1200, pause_site=(400, 800), pause_duration=(5, 8))
+# REASON: the supercoiling of the RNAPs stays close to 0, every RNAP with a positive one may fall off with this setting.
+FALL_OFF_SETTING = SHORT_SETTING.replace(stalling_supercoiling=0.0)
+
+# the DNAStrand keyword arguments of the scenarios, with the loading rate
+SCENARIOS = {
+    "supercoiling": dict(rnap_loading_rate=0.5),
+    "dense": dict(rnap_loading_rate=3.0),
+    "no supercoiling, two pauses": dict(rnap_loading_rate=0.5, include_supercoiling=False, pause_profile="TwopauseAbs"),
+    "one pause": dict(rnap_loading_rate=0.3, pause_profile="OnepauseAbs"),
+    "fall off": dict(rnap_loading_rate=1.0, if_rnap_fall_off_from_supercoiling=True, rnap_fall_off_amount=20,
+                     setting=FALL_OFF_SETTING),
+    "bursty": dict(rnap_loading_rate=0.5, include_busty_promoter=True),
+    "shut off": dict(rnap_loading_rate=0.5, promoter_shut_off_time=60),
+    "uniform": dict(rnap_loading_rate=0.3, rnap_loading_pattern="uniform", ribo_loading_profile="uniform",
+                    degradation_profile="stepwise exponential"),
+}
+
+
+def make_controller(rnap_loading_rate, seed=7, setting=SHORT_SETTING, record_config=None, **kwargs):
+    """
+    This method returns a DNASimController recording all the series, with the short setting by default.
+    """
+    if record_config is None:
+        record_config = RecordConfig(record_rnap_position=True, record_five_three=True,
+                                     record_supercoiling=kwargs.get("include_supercoiling", True),
+                                     show_progress_bar=False)
+    return DNASimController(rnap_loading_rate, record_config, seed=seed, setting=setting, **kwargs)
+
+
+def run_controller(rnap_loading_rate, seed=7, setting=SHORT_SETTING, record_config=None, **kwargs):
+    controller = make_controller(rnap_loading_rate, seed, setting, record_config, **kwargs)
+    controller.start()
+    return controller
+
+
+def get_outputs(controller) -> dict:
+    """
+    This method returns all the recorded series and the RNAP summary of a finished DNASimController.
+    """
+    outputs = {"summary": controller.get_rnap_summary()}
+    for name, recorder in controller.data_recorder.items():
+        if name == "five and three":
+            outputs["five"], outputs["three"] = (np.asarray(value) for value in recorder.get_five_six())
+        elif name in ("position", "supercoiling"):
+            for i, column in enumerate(recorder.get()):
+                outputs[f"{name} {i}"] = np.asarray(column)
+        else:
+            outputs[name] = np.asarray(recorder.get())
+    return outputs
+
+
+def _assert_summary_equal(summary, expected):
+    assert summary.keys() == expected.keys()
+    for name, value in expected.items():
+        if isinstance(value, dict):
+            _assert_summary_equal(summary[name], value)
+        elif isinstance(value, float) and math.isnan(value):
+            assert math.isnan(summary[name]), name
+        else:
+            assert summary[name] == value, name
+
+
+def assert_outputs_equal(outputs, expected):
+    """
+    This method checks that two results of get_outputs() are bit-identical.
+    """
+    assert outputs.keys() == expected.keys()
+    for name, value in expected.items():
+        if name == "summary":
+            _assert_summary_equal(outputs[name], value)
+        else:
+            np.testing.assert_array_equal(outputs[name], value, err_msg=name)
+
+
+def assert_replicate_equal(batch, replicate, controller):
+    """
+    This method checks that a replicate of a finished BatchSimController is bit-identical to a DNASimController run.
+    """
+    np.testing.assert_array_equal(batch.get_data("protein amount")[replicate],
+                                  controller.get_data("protein amount").get())
+    five, three = controller.get_five_three()
+    np.testing.assert_array_equal(batch.get_data("five")[replicate], five)
+    np.testing.assert_array_equal(batch.get_data("three")[replicate], three)
+
+
+@pytest.fixture(params=list(SCENARIOS), ids=list(SCENARIOS))
+def scenario(request) -> dict:
+    return dict(SCENARIOS[request.param])
@@ -0,0 +1,65 @@
+"""
+The lockstep batch engine against one DNASimController for each replicate.
+"""
+import pytest
+
+from proteinproductionsim.controller import batch_sim_controller
+from proteinproductionsim.controller.batch_sim_controller import BatchSimController
+from proteinproductionsim.controller.dna_sim_controller import RecordConfig
+from proteinproductionsim.helper.random_generator import spawn_seed_sequences
+
+from conftest import SCENARIOS, SHORT_SETTING, assert_replicate_equal, run_controller
+
+RECORD_CONFIG = RecordConfig(record_five_three=True, show_progress_bar=False)
+BATCH_SIZE = 3
+
+
+@pytest.mark.parametrize("name", [name for name, scenario in SCENARIOS.items()
+                                  if not scenario.get("if_rnap_fall_off_from_supercoiling")])
+def test_batch_matches_single_runs(name):
+    scenario = dict(SCENARIOS[name])
+    rnap_loading_rate = scenario.pop("rnap_loading_rate")
+    # REASON: a small window, so the columns of the replicates grow and are compacted during the run.
+    batch = BatchSimController(rnap_loading_rate, BATCH_SIZE, seed=7, setting=SHORT_SETTING, window=4, **scenario)
+    batch.start()
+    for replicate, seed in enumerate(spawn_seed_sequences(7, BATCH_SIZE)):
+        controller = run_controller(rnap_loading_rate, seed=seed, record_config=RECORD_CONFIG, **scenario)
+        assert_replicate_equal(batch, replicate, controller)
+
+
+def test_batch_of_different_genes_matches_single_runs():
+    rnap_loading_rate = [0.3, 1.0, 2.0]
+    pause_profile = ["flat", "OnepauseAbs", "TwopauseAbs"]
+    gene_setting = [SHORT_SETTING, SHORT_SETTING.replace(length=900, pause_site=(300, 500)),
+                    SHORT_SETTING.replace(length=1500, k_ribo_loading=0.5)]
+    batch = BatchSimController(rnap_loading_rate, BATCH_SIZE, seed=3, setting=SHORT_SETTING,
+                               pause_profile=pause_profile, gene_setting=gene_setting)
+    batch.start()
+    for replicate, seed in enumerate(spawn_seed_sequences(3, BATCH_SIZE)):
+        controller = run_controller(rnap_loading_rate[replicate], seed=seed, setting=gene_setting[replicate],
+                                    record_config=RECORD_CONFIG, pause_profile=pause_profile[replicate])
+        assert_replicate_equal(batch, replicate, controller)
+
+
+def test_batch_rejects_fall_off():
+    with pytest.raises(ValueError):
+        BatchSimController(1.0, BATCH_SIZE, seed=7, setting=SHORT_SETTING, if_rnap_fall_off_from_supercoiling=True)
+
+
+@pytest.mark.parametrize("record", [dict(record_rnap_position=True), dict(record_supercoiling=True),
+                                    dict(storage_path="storage")])
+def test_batch_rejects_unsupported_records(record):
+    with pytest.raises(ValueError):
+        BatchSimController(1.0, BATCH_SIZE, RecordConfig(**record), seed=7, setting=SHORT_SETTING)
+
+
+def test_batch_reports_progress_sparsely(monkeypatch):
+    printed = []
+    monkeypatch.setattr(batch_sim_controller, "print_progress_bar", lambda iteration, total: printed.append(iteration))
+    reported = []
+    batch = BatchSimController(1.0, BATCH_SIZE, RecordConfig(show_progress_bar=True), seed=7, setting=SHORT_SETTING,
+                               progress_function=lambda controller: reported.append(controller.time_index),
+                               progress_interval=1000)
+    batch.start()
+    assert len(printed) == 100 and printed[-1] == batch.total_time
+    assert reported == [1000, 2000, 3000, 3000]
@@ -0,0 +1,55 @@
+"""
+The benchmark suite: its seeded runs, its kernels and the comparison against a baseline.
+"""
+import json
+
+import numpy as np
+
+from proteinproductionsim import benchmark
+
+
+def make_results(**seconds) -> dict:
+    return {"metadata": {}, "results": {name: {"seconds": value} for name, value in seconds.items()}}
+
+
+def test_runs_are_seeded():
+    # REASON: the same work must be timed every time.
+    first = benchmark._run_controller(0.5, include_supercoiling=False)
+    second = benchmark._run_controller(0.5, include_supercoiling=False)
+    np.testing.assert_array_equal(first.get_data("protein amount").get(), second.get_data("protein amount").get())
+
+
+def test_time_function():
+    calls = []
+    result = benchmark.time_function(lambda: calls.append(1), repeat=4)
+    assert len(calls) == 4 and result["repeat"] == 4
+    assert 0 <= result["seconds"] <= result["mean"]
+
+
+def test_kernels_are_timed():
+    results = benchmark.benchmark_kernels([0.5], repeat=1, calls=2)
+    assert set(results) == {"supercoiling/rate=0.5", "recorders/rate=0.5", "ribosome step/ribosomes=1",
+                            "ribosome step/ribosomes=10", "ribosome step/ribosomes=100", "loading list/ribosome",
+                            "loading list/rnap"}
+    assert all(result["seconds"] > 0 for result in results.values())
+
+
+def test_compare_to_baseline():
+    current = make_results(a=1.3, b=1.1, c=2.0)
+    baseline = make_results(a=1.0, b=1.0)
+    rows = benchmark.compare_to_baseline(current, baseline, tolerance=0.2)
+    assert [(row["name"], row["regression"]) for row in rows] == [("a", True), ("b", False)]
+    assert rows[0]["ratio"] == 1.3
+    lines = benchmark.format_comparison(rows).splitlines()
+    assert len(lines) == 3 and lines[1].endswith("REGRESSION") and not lines[2].endswith("REGRESSION")
+
+
+def test_main_fails_on_regression(tmp_path, monkeypatch):
+    monkeypatch.setattr(benchmark, "run_benchmarks", lambda quick: make_results(a=1.5))
+    baseline = tmp_path / "baseline.json"
+    baseline.write_text(json.dumps(make_results(a=1.0)))
+    output = tmp_path / "results.json"
+    assert benchmark.main(["--output", str(output), "--baseline", str(baseline)]) == 1
+    assert json.loads(output.read_text()) == make_results(a=1.5)
+    assert benchmark.main(["--output", str(output), "--baseline", str(baseline), "--tolerance", "0.6"]) == 0
+    assert benchmark.main(["--output", str(output)]) == 0
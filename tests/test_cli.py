@@ -0,0 +1,77 @@
+"""
+The command line runs of spec files, against the same samples run in this process.
+"""
+import json
+import tomllib
+
+import numpy as np
+import pytest
+
+from proteinproductionsim.cli import build_controller, load_result, main
+from proteinproductionsim.controller.multi_sample_controller import run_single_sample
+from proteinproductionsim.helper.random_generator import spawn_seed_sequences
+
+from conftest import SHORT_SETTING
+
+TOML_SPEC = """
+sample_amount = 2
+seed = 3
+workers = 1
+
+[record]
+record_five_three = true
+
+[setting]
+total_time = 100
+length = 1200
+pause_site = [400, 800]
+pause_duration = [5, 8]
+
+[grid]
+rnap_loading_rate = [0.2, 0.5]
+"""
+
+
+@pytest.mark.parametrize("suffix", [".toml", ".json"])
+def test_run_writes_a_readable_result(tmp_path, capsys, suffix):
+    path = tmp_path / f"spec{suffix}"
+    if suffix == ".toml":
+        # REASON: the top-level keys come before the first table.
+        path.write_text(f'cache_directory = "{tmp_path / "cache"}"\n' + TOML_SPEC)
+    else:
+        spec = tomllib.loads(TOML_SPEC)
+        spec["cache_directory"] = str(tmp_path / "cache")
+        path.write_text(json.dumps(spec))
+    assert main(["run", str(path), "--quiet"]) == 0
+    assert "2 configurations, 4 samples computed" in capsys.readouterr().out
+
+    spec, configs, data = load_result(str(tmp_path / "spec.npz"))
+    assert spec["seed"] == 3
+    assert [config["rnap_loading_rate"] for config in configs] == [0.2, 0.5]
+    for config, ensemble in zip(configs, data):
+        assert set(ensemble) == {"protein amount", "five", "three"}
+        for index, seed in enumerate(spawn_seed_sequences(3, 2)):
+            sample = run_single_sample(seed, config["rnap_loading_rate"], setting=SHORT_SETTING)
+            for name in sample:
+                np.testing.assert_array_equal(ensemble[name][index], sample[name])
+        # REASON: the counts are stored as the smallest integer type which holds them.
+        assert ensemble["five"].dtype.itemsize < 8
+
+    # STEP: a second run of the same spec is served from the cache
+    output = tmp_path / "again.npz"
+    assert main(["run", str(path), "--quiet", "--output", str(output)]) == 0
+    assert "0 samples computed" in capsys.readouterr().out
+    for ensemble, expected in zip(load_result(str(output))[2], data):
+        for name in expected:
+            np.testing.assert_array_equal(ensemble[name], expected[name])
+
+
+def test_invalid_specs_are_rejected():
+    with pytest.raises(ValueError, match="unknown spec keys"):
+        build_controller({"rnap_loading_rate": 0.5, "samples": 2})
+    with pytest.raises(ValueError, match="no rnap_loading_rate"):
+        build_controller({"setting": {"length": 1200}})
+    with pytest.raises(ValueError, match="unknown parameter"):
+        build_controller({"rnap_loading_rate": 0.5, "kwargs": {"unknown": 1}})
+    with pytest.raises(ValueError, match="needs a storage_path"):
+        build_controller({"rnap_loading_rate": 0.5, "grid": {"record_rnap_position": [False, True]}})
@@ -0,0 +1,90 @@
+"""
+The idle time skipping and the checkpoints of the DNASimController against an uninterrupted run of every step.
+"""
+import pytest
+
+from proteinproductionsim.controller.dna_sim_controller import RecordConfig
+
+from conftest import SCENARIOS, assert_outputs_equal, get_outputs, make_controller, run_controller
+
+
+# the scenarios in which the strand is empty for a part of the run
+IDLE_SCENARIOS = {
+    "bursty": SCENARIOS["bursty"],
+    "sparse": dict(rnap_loading_rate=0.005),
+    "shut off": dict(rnap_loading_rate=0.1, promoter_shut_off_time=20),
+}
+
+
+class Crash(Exception):
+    pass
+
+
+@pytest.mark.parametrize("name", list(IDLE_SCENARIOS))
+@pytest.mark.parametrize("rnap_engine", ["object", "array"])
+def test_idle_skipping_matches_full_run(name, rnap_engine):
+    scenario = IDLE_SCENARIOS[name]
+    expected = get_outputs(run_controller(rnap_engine=rnap_engine, **scenario))
+    controller = make_controller(rnap_engine=rnap_engine, if_skipping_idle_time=True, **scenario)
+    steps = []
+    step = controller.env.step
+    controller.env.step = lambda time_index: steps.append(time_index) or step(time_index)
+    controller.start()
+    assert_outputs_equal(get_outputs(controller), expected)
+    assert len(steps) < controller.total_time
+
+
+@pytest.mark.parametrize("seed", [0, 1])
+@pytest.mark.parametrize("rnap_engine", ["object", "array"])
+def test_idle_skipping_records_no_stale_supercoiling(seed, rnap_engine):
+    # REASON: without protein production, the last RNAP detaches and degrades in the same step, after the supercoiling
+    #         of that step was computed.
+    scenario = dict(rnap_loading_rate=0.01, protein_production_off=True, seed=seed, rnap_engine=rnap_engine)
+    expected = get_outputs(run_controller(**scenario))
+    assert_outputs_equal(get_outputs(run_controller(if_skipping_idle_time=True, **scenario)), expected)
+
+
+@pytest.mark.parametrize("rnap_engine", ["object", "array"])
+@pytest.mark.parametrize("if_storing", [False, True], ids=["memory", "storage"])
+def test_resume_matches_uninterrupted_run(tmp_path, rnap_engine, if_storing):
+    scenario = dict(SCENARIOS["no supercoiling, two pauses"], rnap_engine=rnap_engine)
+    expected = get_outputs(run_controller(**scenario))
+
+    def make():
+        record_config = RecordConfig(record_rnap_position=True, record_five_three=True, show_progress_bar=False,
+                                     storage_path=str(tmp_path / "storage") if if_storing else None, chunk_size=100)
+        return make_controller(record_config=record_config, checkpoint_path=str(tmp_path / "checkpoint.pkl"),
+                               checkpoint_interval=500, **scenario)
+
+    # STEP: stop a run between two checkpoints, after it has written some of its recorder chunks
+    controller = make()
+    log = controller._log
+
+    def crash():
+        if controller.time_index == 1234:
+            raise Crash
+        log()
+
+    controller._log = crash
+    with pytest.raises(Crash):
+        controller.start()
+
+    # STEP: resume it in a new controller from the last checkpoint
+    resumed = make()
+    resumed.start(resume=True)
+    assert_outputs_equal(get_outputs(resumed), expected)
+
+
+def test_loading_a_checkpoint_keeps_the_stored_data(tmp_path):
+    record_config = RecordConfig(record_rnap_position=True, record_five_three=True, show_progress_bar=False,
+                                 storage_path=str(tmp_path / "storage"), chunk_size=100)
+    scenario = dict(SCENARIOS["no supercoiling, two pauses"], record_config=record_config,
+                    checkpoint_path=str(tmp_path / "checkpoint.pkl"), checkpoint_interval=700)
+    make_controller(**scenario).start()
+    stored = {path: path.read_bytes() for path in (tmp_path / "storage").rglob("*") if path.is_file()}
+
+    # STEP: loading the last checkpoint, which is older than the end of the run, must not touch the files
+    controller = make_controller(**scenario)
+    controller.load_checkpoint(str(tmp_path / "checkpoint.pkl"))
+    assert controller.time_index < controller.total_time
+    assert {path: path.read_bytes() for path in stored} == stored
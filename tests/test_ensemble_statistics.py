@@ -0,0 +1,82 @@
+"""
+The EnsembleStatistics, merged from chunks of samples, against the statistics of all the samples stacked at once.
+"""
+import numpy as np
+import pytest
+
+from proteinproductionsim.datacontainer.ensemble_statistics import EnsembleStatistics
+
+from test_multi_sample_controller import SAMPLE_AMOUNT, run_samples
+
+RELATIVE_ACCURACY = 0.02
+QUANTILES = (0.05, 0.5, 0.95)
+# REASON: the error bound is reached by the values on the edge of a bucket, e.g. 1.0, up to the rounding.
+QUANTILE_RTOL = RELATIVE_ACCURACY * (1 + 1e-9)
+
+
+def make_samples(sample_amount=40, length=25):
+    rng = np.random.default_rng(3)
+    # REASON: a wide range of values with zeros among them, like the protein amount at the start of a run.
+    samples = rng.lognormal(3, 2, size=(sample_amount, length))
+    samples[rng.random(samples.shape) < 0.1] = 0
+    return samples
+
+
+def aggregate(samples, chunk_size, bin_size=1):
+    statistics = EnsembleStatistics(None, bin_size, RELATIVE_ACCURACY)
+    for start in range(0, len(samples), chunk_size):
+        chunk = EnsembleStatistics(None, bin_size, RELATIVE_ACCURACY)
+        for sample in samples[start:start + chunk_size]:
+            chunk.log({"value": sample})
+        statistics.merge(chunk)
+    return statistics
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 40])
+def test_merged_chunks_match_one_pass(chunk_size):
+    samples = make_samples()
+    statistics = aggregate(samples, chunk_size)
+    one_pass = aggregate(samples, len(samples))
+    assert statistics.sample_amount == len(samples)
+    np.testing.assert_allclose(statistics.get_mean("value"), samples.mean(axis=0), rtol=1e-12)
+    np.testing.assert_allclose(statistics.get_variance("value"), samples.var(axis=0, ddof=1), rtol=1e-10)
+    for q in QUANTILES:
+        # REASON: the sketch returns a value of the bucket of the value at rank floor(q * (count - 1)).
+        expected = np.quantile(samples, q, axis=0, method="lower")
+        np.testing.assert_allclose(statistics.get_quantile("value", q), expected, rtol=QUANTILE_RTOL)
+        # REASON: merging the sketches is exact, so the quantiles do not depend on the chunks at all.
+        np.testing.assert_array_equal(statistics.get_quantile("value", q), one_pass.get_quantile("value", q))
+
+
+def test_time_bins_pool_their_time_steps():
+    samples = make_samples(length=23)
+    statistics = aggregate(samples, 9, bin_size=5)
+    pooled = [samples[:, start:start + 5].reshape(-1) for start in range(0, 23, 5)]
+    np.testing.assert_array_equal(statistics.get()["value"]["count"], [len(values) for values in pooled])
+    np.testing.assert_allclose(statistics.get_mean("value"), [values.mean() for values in pooled], rtol=1e-12)
+    np.testing.assert_allclose(statistics.get_variance("value"), [values.var(ddof=1) for values in pooled], rtol=1e-10)
+    np.testing.assert_array_equal(statistics.get_time("value"), [0, 5, 10, 15, 20])
+
+
+def test_mismatches_are_rejected():
+    statistics = EnsembleStatistics()
+    statistics.log({"value": np.ones(3)})
+    with pytest.raises(ValueError):
+        statistics.log({"value": np.ones(4)})
+    with pytest.raises(ValueError):
+        statistics.log({"other": -np.ones(3)})
+    with pytest.raises(ValueError):
+        statistics.merge(EnsembleStatistics(bin_size=2))
+
+
+@pytest.mark.parametrize("n_workers, chunk_size", [(1, 1), (2, 3)])
+def test_aggregating_samples_matches_stacked_samples(n_workers, chunk_size):
+    data = run_samples(n_workers=1)
+    statistics = run_samples(n_workers=n_workers, chunk_size=chunk_size, if_aggregating=True)
+    assert statistics.sample_amount == SAMPLE_AMOUNT
+    assert set(statistics.names) == set(data)
+    for name, samples in data.items():
+        np.testing.assert_allclose(statistics.get_mean(name), samples.mean(axis=0), rtol=1e-12, atol=1e-12)
+        np.testing.assert_allclose(statistics.get_variance(name), samples.var(axis=0, ddof=1), rtol=1e-10, atol=1e-10)
+        expected = np.quantile(samples, 0.5, axis=0, method="lower")
+        np.testing.assert_allclose(statistics.get_quantile(name, 0.5), expected, rtol=QUANTILE_RTOL)
@@ -0,0 +1,122 @@
+"""
+The job queue directory and the sweeps sharded through it, against the same samples run in one process.
+"""
+import os
+import time
+
+import numpy as np
+import pytest
+
+from proteinproductionsim.controller.job_queue_controller import JobQueueController, run_worker
+from proteinproductionsim.controller.multi_sample_controller import run_single_sample
+from proteinproductionsim.helper.job_queue import JobQueue
+from proteinproductionsim.helper.random_generator import spawn_seed_sequences
+
+from conftest import SHORT_SETTING
+
+GRID = {"rnap_loading_rate": [0.2, 0.5]}
+SAMPLE_AMOUNT = 3
+
+
+def run_short_sample(seed, rnap_loading_rate):
+    # REASON: the configurations of a queue are JSON, so the Setting is fixed by the run function.
+    return run_single_sample(seed, rnap_loading_rate, setting=SHORT_SETTING)
+
+
+def make_queue(tmp_path, lease_timeout=600) -> JobQueue:
+    queue = JobQueue(str(tmp_path / "queue"), lease_timeout)
+    queue.create({"name": "test"}, {f"job{i}": {"index": i} for i in range(3)})
+    return queue
+
+
+def expire(queue, job_id, worker_id):
+    path = os.path.join(queue.directory, "claimed", f"{job_id}@{worker_id}.json")
+    old = time.time() - 2 * queue.lease_timeout
+    os.utime(path, (old, old))
+
+
+def test_create_is_idempotent(tmp_path):
+    queue = make_queue(tmp_path)
+    assert not queue.create({"name": "test"}, {})
+    assert queue.get_status() == {"pending": 3, "claimed": 0, "done": 0}
+    with pytest.raises(ValueError):
+        queue.create({"name": "other"}, {})
+
+
+def test_claim(tmp_path):
+    queue = make_queue(tmp_path)
+    assert queue.claim("a") == ("job0", {"index": 0})
+    assert queue.claim("b") == ("job1", {"index": 1})
+    # REASON: a worker restarted with the same id first gets back the job it claimed before.
+    assert queue.claim("a") == ("job0", {"index": 0})
+    assert queue.get_status() == {"pending": 1, "claimed": 2, "done": 0}
+    queue.complete("job0", "a", {"value": np.arange(3)})
+    assert queue.get_done() == ["job0"]
+    np.testing.assert_array_equal(queue.load_shard("job0")["value"], np.arange(3))
+    assert queue.claim("a") == ("job2", {"index": 2})
+    assert queue.claim("c") is None
+    assert not queue.if_finished()
+
+
+def test_abandoned_claims_are_requeued(tmp_path):
+    queue = make_queue(tmp_path, lease_timeout=60)
+    queue.claim("a")
+    queue.claim("b")
+    expire(queue, "job0", "a")
+    expire(queue, "job1", "b")
+    # REASON: the heartbeat renews the lease of b, only the claim of a has run out.
+    queue.heartbeat("job1", "b")
+    assert queue.claim("c") == ("job0", {"index": 0})
+    assert queue.get_status() == {"pending": 1, "claimed": 2, "done": 0}
+    assert queue.requeue_abandoned() == 0
+    # STEP: the late worker completes its job after all, and the result is kept once
+    queue.complete("job0", "a", {"value": np.zeros(1)})
+    queue.complete("job0", "c", {"value": np.zeros(1)})
+    assert queue.get_done() == ["job0"]
+
+
+def make_controller(tmp_path, name, **kwargs) -> JobQueueController:
+    return JobQueueController(str(tmp_path / name), GRID, SAMPLE_AMOUNT, seed=11, shard_size=2,
+                              run_function=run_short_sample, show_progress_bar=False, **kwargs)
+
+
+def test_merge_does_not_depend_on_the_workers(tmp_path):
+    # STEP: one worker runs the whole queue
+    controller = make_controller(tmp_path, "one")
+    controller.init()
+    assert run_worker(controller.directory, "a") == 4
+    expected = controller.merge()
+
+    # STEP: a worker crashes with a job claimed, and the jobs are finished by two others in another order
+    controller = make_controller(tmp_path, "many", lease_timeout=60)
+    controller.init()
+    crashed = controller.queue.claim("crashed")[0]
+    expire(controller.queue, crashed, "crashed")
+    assert run_worker(controller.directory, "b", max_jobs=1, lease_timeout=60) == 1
+    assert run_worker(controller.directory, "c", lease_timeout=60) == 3
+    data = controller.merge()
+
+    assert len(data) == len(expected) == 2
+    for ensemble, expected_ensemble in zip(data, expected):
+        assert set(ensemble) == set(expected_ensemble) == {"protein amount", "five", "three"}
+        for name in ensemble:
+            np.testing.assert_array_equal(ensemble[name], expected_ensemble[name])
+
+    # STEP: the i-th sample of every configuration is the i-th spawned seed
+    for config, ensemble in zip(controller.configs, data):
+        for index, seed in enumerate(spawn_seed_sequences(11, SAMPLE_AMOUNT)):
+            sample = run_short_sample(seed, **config)
+            for name in sample:
+                np.testing.assert_array_equal(ensemble[name][index], sample[name])
+
+    statistics = controller.merge(if_aggregating=True)
+    assert [ensemble.sample_amount for ensemble in statistics] == [SAMPLE_AMOUNT, SAMPLE_AMOUNT]
+    np.testing.assert_allclose(statistics[1].get_mean("protein amount"), data[1]["protein amount"].mean(axis=0))
+
+
+def test_unfinished_queue_is_not_merged(tmp_path):
+    controller = make_controller(tmp_path, "queue")
+    controller.init()
+    run_worker(controller.directory, "a", max_jobs=1)
+    with pytest.raises(RuntimeError):
+        controller.merge()
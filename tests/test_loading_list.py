@@ -0,0 +1,72 @@
+"""
+The vectorized loading lists against the per-draw loops they replace, drawing from the same seeded stream.
+"""
+import numpy as np
+import pytest
+
+from proteinproductionsim.helper.loading_list import LoadingList, _promoter_array_generator
+
+
+def reference_cumulative(duration, interval_generator):
+    """
+    This method accumulates the intervals one draw at a time until the first one that does not fit in the duration.
+    """
+    t = 0.0
+    t_slots = [0]
+    while t <= duration:
+        add_time = interval_generator()
+        if add_time < float(duration) - t:
+            t += add_time
+            t_slots.append(t)
+        else:
+            break
+    return t_slots
+
+
+def reference_arr(t_slots):
+    """
+    This method converts the time points to indices and keeps the first occurrence of each of them by a prefix scan.
+    """
+    arr = [int(t) for t in t_slots]
+    return [i for n, i in enumerate(arr) if i not in arr[:n]]
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("duration, rate", [(9000, 0.5 / 30), (3000, 2.0), (30, 1e-4)])
+def test_stochastic_list_matches_per_draw_loop(seed, duration, rate):
+    reference_rng = np.random.default_rng(seed)
+    expected = reference_arr(reference_cumulative(duration, lambda: reference_rng.standard_exponential() / rate))
+    loading_list = LoadingList(None, duration, rate, if_stochastic=True, rng=np.random.default_rng(seed))
+    assert loading_list.get() == expected
+    assert loading_list.get_length() == len(expected)
+    # REASON: with a rate of 2 per step, many time points fall on the same index and are de-duplicated.
+    if rate > 1:
+        assert len(expected) < int(duration * rate) // 2
+
+
+@pytest.mark.parametrize("duration, rate", [(9000, 0.5 / 30), (100, 0.3), (10, 0.5)])
+def test_uniform_list_matches_loop(duration, rate):
+    expected = reference_arr(reference_cumulative(duration, lambda: 1 / rate))
+    assert LoadingList(None, duration, rate, if_stochastic=False).get() == expected
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_promoter_list_matches_per_draw_loop(seed):
+    duration, tau_on, tau_off = 9000.0, 50.0, 143.0
+    reference_rng = np.random.default_rng(seed)
+    expected = []
+    t = 0.0
+    state = True
+    while True:
+        add_time = reference_rng.standard_exponential() / (1 / tau_on if state else 1 / tau_off)
+        if add_time >= duration - t:
+            expected.append([state, duration - t])
+            break
+        expected.append([state, add_time])
+        t += add_time
+        state = not state
+    assert _promoter_array_generator(duration, tau_on, tau_off, np.random.default_rng(seed)) == expected
+
+
+def test_zero_rate_loads_once():
+    assert LoadingList(None, 9000, 0.0, if_stochastic=True, rng=np.random.default_rng(0)).get() == [0]
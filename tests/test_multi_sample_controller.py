@@ -0,0 +1,70 @@
+"""
+The MultiSampleController on a process pool against one DNASimController run for each sample.
+"""
+import numpy as np
+import pytest
+
+from proteinproductionsim.controller.dna_sim_controller import RecordConfig
+from proteinproductionsim.controller.multi_sample_controller import MultiSampleController, get_sample_layout, \
+    run_single_sample
+from proteinproductionsim.helper.random_generator import spawn_seed_sequences
+
+from conftest import SHORT_SETTING, run_controller
+
+SAMPLE_AMOUNT = 4
+RUN_KWARGS = dict(rnap_loading_rate=0.5, setting=SHORT_SETTING)
+
+
+def run_samples(**kwargs) -> dict:
+    controller = MultiSampleController(sample_amount=SAMPLE_AMOUNT, seed=5, show_progress_bar=False,
+                                       **kwargs, **RUN_KWARGS)
+    return controller.start()
+
+
+@pytest.mark.parametrize("n_workers, chunk_size", [(1, 1), (2, 1), (2, 3)])
+def test_samples_match_single_runs(n_workers, chunk_size):
+    data = run_samples(n_workers=n_workers, chunk_size=chunk_size)
+    assert set(data) == {"protein amount", "five", "three"}
+    record_config = RecordConfig(record_five_three=True, show_progress_bar=False)
+    for index, seed in enumerate(spawn_seed_sequences(5, SAMPLE_AMOUNT)):
+        controller = run_controller(seed=seed, record_config=record_config, **RUN_KWARGS)
+        np.testing.assert_array_equal(data["protein amount"][index], controller.get_data("protein amount").get())
+        five, three = controller.get_five_three()
+        np.testing.assert_array_equal(data["five"][index], five)
+        np.testing.assert_array_equal(data["three"][index], three)
+
+
+def test_samples_are_independent():
+    data = run_samples(n_workers=1)
+    protein_amount = data["protein amount"]
+    assert len({protein_amount[i].tobytes() for i in range(SAMPLE_AMOUNT)}) == SAMPLE_AMOUNT
+
+
+def run_counting_sample(seed, rnap_loading_rate, setting):
+    # REASON: a custom run_function, whose layout is found by running the first sample.
+    data = run_single_sample(seed, rnap_loading_rate, setting=setting)
+    return {"protein amount": data["protein amount"], "total": np.array([data["five"][-1], data["three"][-1]])}
+
+
+@pytest.mark.parametrize("run_function", [run_single_sample, run_counting_sample])
+@pytest.mark.parametrize("chunk_size", [1, 3])
+def test_shared_memory_matches_pickled_results(run_function, chunk_size):
+    expected = run_samples(n_workers=2, run_function=run_function)
+    data = run_samples(n_workers=2, chunk_size=chunk_size, run_function=run_function, if_sharing_memory=True)
+    assert set(data) == set(expected)
+    for name in expected:
+        assert data[name].dtype == expected[name].dtype
+        np.testing.assert_array_equal(data[name], expected[name])
+
+
+def test_shared_memory_without_samples():
+    controller = MultiSampleController(sample_amount=0, n_workers=2, seed=5, show_progress_bar=False,
+                                       if_sharing_memory=True, **RUN_KWARGS)
+    assert controller.start() == {}
+
+
+def test_shared_memory_rejects_results_off_the_layout():
+    # REASON: the layout of run_single_sample is given, and a run_function returning other series cannot fit in it.
+    with pytest.raises(ValueError, match="the layout expects"):
+        run_samples(n_workers=2, run_function=run_counting_sample, layout_function=get_sample_layout,
+                    if_sharing_memory=True)
@@ -0,0 +1,55 @@
+"""
+The tables of pausing sites, against the named pause profiles and across the engines.
+"""
+import numpy as np
+import pytest
+
+from proteinproductionsim.controller.batch_sim_controller import BatchSimController
+from proteinproductionsim.controller.dna_sim_controller import RecordConfig
+from proteinproductionsim.datacontainer.setting import Setting
+from proteinproductionsim.helper.random_generator import spawn_seed_sequences
+
+from conftest import SHORT_SETTING, assert_outputs_equal, assert_replicate_equal, get_outputs, run_controller
+
+# REASON: more sites than the named profiles use, given out of order and with a probability for each.
+TABLE_SETTING = SHORT_SETTING.replace(pause_site=(900, 200, 650, 400, 1000), pause_duration=(4, 6, 3, 5, 8),
+                                      pause_prob=(0.5, 0.9, 1.0, 0.8, 0.3))
+
+
+@pytest.mark.parametrize("rnap_engine", ["object", "array"])
+def test_table_of_the_first_sites_matches_named_profiles(rnap_engine):
+    expected = get_outputs(run_controller(0.5, rnap_engine=rnap_engine, pause_profile="TwopauseAbs"))
+    assert_outputs_equal(get_outputs(run_controller(0.5, rnap_engine=rnap_engine, pause_profile="table")), expected)
+
+    expected = get_outputs(run_controller(0.5, rnap_engine=rnap_engine, pause_profile="OnepauseAbs"))
+    one_site = SHORT_SETTING.replace(pause_site=(400,), pause_duration=(5,))
+    outputs = get_outputs(run_controller(0.5, rnap_engine=rnap_engine, setting=one_site, pause_profile="table"))
+    assert_outputs_equal(outputs, expected)
+
+
+def test_sites_are_sorted():
+    unsorted = SHORT_SETTING.replace(pause_site=(800, 400), pause_duration=(8, 5))
+    np.testing.assert_array_equal(unsorted.pause_site, SHORT_SETTING.pause_site)
+    np.testing.assert_array_equal(unsorted.pause_duration, SHORT_SETTING.pause_duration)
+    expected = get_outputs(run_controller(0.5, pause_profile="table"))
+    assert_outputs_equal(get_outputs(run_controller(0.5, setting=unsorted, pause_profile="table")), expected)
+
+
+@pytest.mark.parametrize("include_supercoiling", [True, False])
+def test_table_profile_matches_across_engines(include_supercoiling):
+    kwargs = dict(setting=TABLE_SETTING, pause_profile="table", include_supercoiling=include_supercoiling)
+    expected = get_outputs(run_controller(1.0, **kwargs))
+    assert_outputs_equal(get_outputs(run_controller(1.0, rnap_engine="array", **kwargs)), expected)
+
+    batch = BatchSimController(1.0, 2, seed=7, **kwargs)
+    batch.start()
+    record_config = RecordConfig(record_five_three=True, show_progress_bar=False)
+    for replicate, seed in enumerate(spawn_seed_sequences(7, 2)):
+        assert_replicate_equal(batch, replicate, run_controller(1.0, seed=seed, record_config=record_config, **kwargs))
+
+
+def test_invalid_tables_are_rejected():
+    with pytest.raises(ValueError):
+        Setting(pause_site=(400, 800), pause_duration=(5,))
+    with pytest.raises(ValueError):
+        SHORT_SETTING.get_pause_table("ThreepauseAbs")
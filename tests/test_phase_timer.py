@@ -0,0 +1,54 @@
+"""
+The opt-in phase timers of the DNAStrand step.
+"""
+import pickle
+
+import pytest
+
+from proteinproductionsim.helper.phase_timer import PhaseTimer
+
+from conftest import SCENARIOS, assert_outputs_equal, get_outputs, run_controller
+
+
+@pytest.mark.parametrize("rnap_engine", ["object", "array"])
+def test_timed_run_matches_untimed_run(rnap_engine):
+    scenario = dict(SCENARIOS["supercoiling"], rnap_engine=rnap_engine)
+    expected = get_outputs(run_controller(**scenario))
+    controller = run_controller(if_timing_phases=True, **scenario)
+    assert_outputs_equal(get_outputs(controller), expected)
+
+    calls = {(row["entity"], row["phase"]): row["calls"] for row in controller.timer.get_summary()}
+    entity = "RNAPList" if rnap_engine == "object" else "RNAPArray"
+    # REASON: these phases run once in every step.
+    for phase in [("DNAStrand", "step"), ("DNAStrand", "loading"), ("DNAStrand", "promoter switching"),
+                  ("DNAStrand", "supercoiling"), (entity, "hindrance"), (entity, "step")]:
+        assert calls[phase] == controller.total_time, phase
+    assert calls[("RIBOContainer", "step")] > 0
+    if rnap_engine == "object":
+        assert calls[("RNAP", "step")] > controller.total_time
+    summary = controller.get_timing_summary()
+    assert summary.splitlines()[0].split() == ["entity", "phase", "calls", "total", "[s]", "per", "call", "[us]"]
+    assert len(summary.splitlines()) == len(calls) + 1
+
+
+def test_untimed_run_has_no_summary():
+    controller = run_controller(**SCENARIOS["supercoiling"])
+    assert controller.timer is None and controller.get_timing_summary() is None
+
+
+def test_timed_strand_can_be_pickled():
+    controller = run_controller(if_timing_phases=True, **SCENARIOS["dense"])
+    env = pickle.loads(pickle.dumps(controller.env))
+    assert env.dna.timer.records.keys() == controller.timer.records.keys()
+
+
+def test_summary_is_sorted_by_total_time():
+    timer = PhaseTimer()
+    timer.add("A", "fast", 0.5)
+    timer.add("B", "slow", 1.0)
+    timer.add("A", "fast", 1.0)
+    rows = timer.get_summary()
+    assert [(row["entity"], row["phase"], row["calls"]) for row in rows] == [("A", "fast", 2), ("B", "slow", 1)]
+    assert rows[0]["per call [us]"] == pytest.approx(0.75e6)
+    timer.reset()
+    assert timer.get_summary() == []
@@ -0,0 +1,74 @@
+"""
+The headless modules and the recording without matplotlib, against the plotting layer drawing the recorded data.
+"""
+import os
+import subprocess
+import sys
+
+import pytest
+
+from proteinproductionsim.benchmark import HEADLESS_MODULES, benchmark_imports, find_headless_violations, time_import
+from proteinproductionsim.controller.dna_sim_controller import RecordConfig
+from proteinproductionsim.controller.multi_sample_controller import collect_recorder_data
+from proteinproductionsim.datacontainer.ensemble_statistics import EnsembleStatistics
+
+from conftest import run_controller
+
+# REASON: a run which uses every recorder and the statistics, in a fresh interpreter so nothing else loads matplotlib.
+_RECORDING_SCRIPT = """
+import sys
+sys.path.insert(0, {tests!r})
+from conftest import run_controller
+from proteinproductionsim.controller.dna_sim_controller import RecordConfig
+from proteinproductionsim.controller.multi_sample_controller import collect_recorder_data
+from proteinproductionsim.datacontainer.ensemble_statistics import EnsembleStatistics
+
+record_config = RecordConfig(record_rnap_position=True, record_five_three=True, record_supercoiling=True,
+                             show_progress_bar=False)
+controller = run_controller(0.5, record_config=record_config)
+for recorder in controller.data_recorder.values():
+    recorder.get()
+EnsembleStatistics().log(collect_recorder_data(controller))
+print("matplotlib" in sys.modules)
+"""
+
+
+def test_headless_modules_do_not_import_matplotlib():
+    results = benchmark_imports(repeat=1)
+    assert set(results) == {f"import/{module}" for module in HEADLESS_MODULES}
+    assert all(result["loaded"] == [] for result in results.values())
+    assert find_headless_violations(results) == []
+
+
+def test_violations_are_found():
+    pytest.importorskip("matplotlib")
+    results = {"import/matplotlib": {"loaded": time_import("matplotlib")["loaded"]}}
+    assert find_headless_violations(results) == ["import/matplotlib loads ['matplotlib']"]
+
+
+def test_recording_does_not_import_matplotlib():
+    script = _RECORDING_SCRIPT.format(tests=os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "False"
+
+
+def test_recorded_data_is_plotted(tmp_path):
+    matplotlib = pytest.importorskip("matplotlib")
+    matplotlib.use("Agg")
+    from proteinproductionsim.plotting import plot_controller
+
+    record_config = RecordConfig(record_rnap_position=True, record_five_three=True, record_supercoiling=True,
+                                 show_progress_bar=False)
+    controller = run_controller(0.5, record_config=record_config)
+    fig = plot_controller(controller, str(tmp_path / "run.png"))
+    assert len(fig.axes) == len(controller.data_recorder)
+    assert all(axe.lines for axe in fig.axes)
+    assert (tmp_path / "run.png").stat().st_size > 0
+
+    statistics = EnsembleStatistics()
+    statistics.log(collect_recorder_data(controller))
+    statistics.log(collect_recorder_data(controller))
+    axe = fig.axes[0]
+    axe.clear()
+    statistics.plot(axe, "protein amount")
+    assert axe.lines and axe.get_title() == "Ensemble of 2 samples"
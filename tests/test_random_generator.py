@@ -0,0 +1,46 @@
+"""
+The explicit random streams: a run only draws from the generator of its controller.
+"""
+import numpy as np
+import pytest
+from numpy.random import SeedSequence
+
+from proteinproductionsim.helper.random_generator import spawn_seed_sequences
+
+from conftest import SCENARIOS, assert_outputs_equal, get_outputs, run_controller
+
+
+def test_same_seed_gives_the_same_run(scenario):
+    expected = get_outputs(run_controller(seed=3, **scenario))
+    assert_outputs_equal(get_outputs(run_controller(seed=3, **scenario)), expected)
+
+
+@pytest.mark.parametrize("seed", [SeedSequence(3), lambda: np.random.default_rng(3)], ids=["SeedSequence", "Generator"])
+def test_seed_types_give_the_same_run(seed):
+    expected = get_outputs(run_controller(seed=3, **SCENARIOS["supercoiling"]))
+    seed = seed() if callable(seed) else seed
+    assert_outputs_equal(get_outputs(run_controller(seed=seed, **SCENARIOS["supercoiling"])), expected)
+
+
+def test_different_seeds_give_different_runs():
+    first = run_controller(seed=3, **SCENARIOS["dense"]).get_data("protein amount").get()
+    second = run_controller(seed=4, **SCENARIOS["dense"]).get_data("protein amount").get()
+    assert not np.array_equal(first, second)
+
+
+def test_run_does_not_touch_the_global_state():
+    np.random.seed(0)
+    state = np.random.get_state()
+    run_controller(seed=3, **SCENARIOS["bursty"])
+    after = np.random.get_state()
+    assert state[0] == after[0] and np.array_equal(state[1], after[1]) and state[2:] == after[2:]
+
+
+def test_spawned_seeds_only_depend_on_the_root_and_the_index():
+    seeds = spawn_seed_sequences(11, 4)
+    fewer = spawn_seed_sequences(11, 2)
+    for seed, other in zip(seeds, fewer):
+        assert seed.spawn_key == other.spawn_key
+        np.testing.assert_array_equal(seed.generate_state(4), other.generate_state(4))
+    assert [seed.spawn_key for seed in seeds] == [(i,) for i in range(4)]
+    assert len({tuple(seed.generate_state(4)) for seed in seeds}) == 4
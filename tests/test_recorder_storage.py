@@ -0,0 +1,145 @@
+"""
+The chunked and the columnar stores of the recorders, in the memory and streamed to the disk.
+"""
+import os
+
+import numpy as np
+import pytest
+
+from proteinproductionsim.controller.dna_sim_controller import RecordConfig
+from proteinproductionsim.controller.multi_sample_controller import MultiSampleController
+from proteinproductionsim.datacontainer.recorder_storage import ChunkedArray, TrajectoryStore, group_trajectories, \
+    open_chunked_array, open_trajectory_store
+from proteinproductionsim.helper.random_generator import spawn_seed_sequences
+
+from conftest import SCENARIOS, SHORT_SETTING, assert_outputs_equal, get_outputs, run_controller
+
+
+@pytest.mark.parametrize("on_disk", [False, True], ids=["memory", "disk"])
+@pytest.mark.parametrize("row_shape", [(), (4,)])
+def test_chunked_array_round_trip(tmp_path, on_disk, row_shape):
+    path = str(tmp_path / "store" / "array") if on_disk else None
+    rng = np.random.default_rng(0)
+    array = ChunkedArray(row_shape, float, chunk_size=7, path=path)
+    expected = []
+    # STEP: append rows one by one, in blocks spanning several chunks, and as repeats of one row
+    for i in range(5):
+        row = rng.random(row_shape)
+        array.append(row)
+        expected.append(row)
+    rows = rng.random((23,) + row_shape)
+    array.extend(rows)
+    expected.extend(rows)
+    row = rng.random(row_shape)
+    array.fill(row, 9)
+    expected.extend([row] * 9)
+
+    assert len(array) == 37
+    np.testing.assert_array_equal(array.get(), np.array(expected))
+    if on_disk:
+        # REASON: the rows on the disk can be re-opened at any time, the index only counts the flushed ones.
+        np.testing.assert_array_equal(open_chunked_array(path), np.array(expected))
+        array.append(row)
+        assert len(open_chunked_array(path)) == 37
+        array.flush()
+        assert len(open_chunked_array(path)) == 38
+
+
+def test_empty_store_on_disk(tmp_path):
+    array = ChunkedArray((3,), int, chunk_size=4, path=str(tmp_path / "empty"))
+    assert open_chunked_array(str(tmp_path / "empty")).shape == (0, 3)
+    assert array.get().shape == (0, 3)
+
+
+def test_new_store_replaces_an_old_one(tmp_path):
+    path = str(tmp_path / "array")
+    ChunkedArray((), float, chunk_size=2, path=path).extend(np.arange(10))
+    assert len(open_chunked_array(path)) == 10
+    ChunkedArray((), float, chunk_size=2, path=path)
+    assert len(open_chunked_array(path)) == 0
+
+
+@pytest.mark.parametrize("name", ["supercoiling", "dense"])
+def test_streamed_run_matches_memory_run(tmp_path, name):
+    scenario = SCENARIOS[name]
+    expected = get_outputs(run_controller(**scenario))
+    record_config = RecordConfig(record_rnap_position=True, record_five_three=True, record_supercoiling=True,
+                                 show_progress_bar=False, storage_path=str(tmp_path), chunk_size=64)
+    controller = run_controller(record_config=record_config, **scenario)
+    assert_outputs_equal(get_outputs(controller), expected)
+    # STEP: the data on the disk is complete once the run is over
+    np.testing.assert_array_equal(open_chunked_array(str(tmp_path / "protein_amount" / "value")),
+                                  expected["protein amount"])
+    counters = open_chunked_array(str(tmp_path / "five_three" / "counters"))
+    np.testing.assert_array_equal(counters[:, 0] - counters[:, 2], expected["five"])
+
+
+def test_samples_stream_to_their_own_directories(tmp_path):
+    record_config = RecordConfig(record_five_three=True, show_progress_bar=False, storage_path=str(tmp_path),
+                                 chunk_size=64)
+    data = MultiSampleController(sample_amount=3, n_workers=2, seed=5, show_progress_bar=False,
+                                 record_config=record_config, rnap_loading_rate=0.5, setting=SHORT_SETTING).start()
+    assert sorted(os.listdir(tmp_path)) == [f"sample_{i:06d}" for i in range(3)]
+    for index, seed in enumerate(spawn_seed_sequences(5, 3)):
+        stored = open_chunked_array(str(tmp_path / f"sample_{index:06d}" / "protein_amount" / "value"))
+        np.testing.assert_array_equal(stored, data["protein amount"][index])
+        expected = run_controller(seed=seed, rnap_loading_rate=0.5).get_data("protein amount").get()
+        np.testing.assert_array_equal(stored, expected)
+
+
+def reference_trajectories(snapshots):
+    """
+    This method groups the entries of the snapshots by serial number one entry at a time.
+    """
+    trajectories = {}
+    for time, serial_number, value in snapshots:
+        for n, v in zip(serial_number, value):
+            trajectories.setdefault(n, []).append((time, v))
+    return trajectories
+
+
+def make_snapshots(rng, amount):
+    # REASON: the RNAPs enter and leave the snapshots as they are loaded and detached, some snapshots are empty.
+    snapshots = []
+    for i in range(amount):
+        first = rng.integers(0, 30)
+        serial_number = np.arange(first, first + rng.integers(0, 6))
+        snapshots.append((i * 0.5, serial_number, rng.random(serial_number.size)))
+    return snapshots
+
+
+@pytest.mark.parametrize("on_disk", [False, True], ids=["memory", "disk"])
+def test_trajectory_store_round_trip(tmp_path, on_disk):
+    path = str(tmp_path / "trajectory") if on_disk else None
+    snapshots = make_snapshots(np.random.default_rng(1), 200)
+    store = TrajectoryStore(chunk_size=16, path=path)
+    for snapshot in snapshots:
+        store.append(*snapshot)
+    store.flush()
+
+    columns = [store.get()] + ([open_trajectory_store(path)] if on_disk else [])
+    for time, offsets, serial_number, value in columns:
+        assert len(time) == len(snapshots)
+        for i, (expected_time, expected_serial_number, expected_value) in enumerate(snapshots):
+            assert time[i] == expected_time
+            np.testing.assert_array_equal(serial_number[offsets[i]:offsets[i + 1]], expected_serial_number)
+            np.testing.assert_array_equal(value[offsets[i]:offsets[i + 1]], expected_value)
+
+        serial_numbers, trajectory_offsets, entry_time, entry_value = group_trajectories(time, offsets,
+                                                                                         serial_number, value)
+        expected = reference_trajectories(snapshots)
+        assert serial_numbers.tolist() == sorted(expected)
+        for k, n in enumerate(serial_numbers):
+            start, stop = trajectory_offsets[k], trajectory_offsets[k + 1]
+            assert list(zip(entry_time[start:stop], entry_value[start:stop])) == expected[n]
+
+
+def test_position_recorder_trajectories_follow_the_rnaps():
+    controller = run_controller(**SCENARIOS["dense"])
+    serial_numbers, offsets, time, position = controller.get_data("position").get_trajectories()
+    assert serial_numbers.size == controller.env.dna.RNAP_LIST.loaded
+    for k in range(serial_numbers.size):
+        trajectory_time, trajectory = time[offsets[k]:offsets[k + 1]], position[offsets[k]:offsets[k + 1]]
+        # REASON: each RNAP is recorded from its loading to its detachment, moving forward only.
+        assert np.all(np.diff(trajectory_time) > 0)
+        assert np.all(np.diff(trajectory) >= 0)
@@ -0,0 +1,60 @@
+"""
+The vectorized ribosome stepping of the RIBOContainer against the sequential rule it replaces.
+"""
+import numpy as np
+import pytest
+
+from proteinproductionsim.datacontainer.ribo_container import RIBOContainer
+from proteinproductionsim.datacontainer.setting import Setting
+
+SETTING = Setting(length=600)
+
+
+def reference_step(positions, rnap_position, rnap_attached, setting):
+    """
+    This method steps the ribosomes one by one from the front-most, as RIBOContainer.step() did before it was
+    vectorized, and returns the attached positions and the number of detached ribosomes.
+    """
+    new = []
+    for i, position in enumerate(positions):
+        candidate = position + setting.ribo_step
+        if i == 0 and rnap_attached and candidate > rnap_position:
+            candidate = rnap_position
+        if i != 0 and candidate > new[i - 1] - setting.ribo_size:
+            candidate = new[i - 1] - setting.ribo_size
+        new.append(candidate)
+    detached = sum(1 for position in new if position > setting.length)
+    return new[detached:], detached
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_step_matches_sequential_rule(seed):
+    rng = np.random.default_rng(seed)
+    # REASON: a small capacity, so the ring buffer wraps around and grows during the run.
+    container = RIBOContainer(None, capacity=2, setting=SETTING)
+    reference = []
+    reference_loaded = reference_detached = 0
+    rnap_position = 0.0
+    for time_index in range(3000):
+        # REASON: the RNAP is slower than the ribosomes on average, so the front-most ribosome is held back by it.
+        rnap_attached = rnap_position < SETTING.length
+        rnap_position = min(rnap_position + rng.uniform(0, 1.2), SETTING.length + 1.0)
+        # STEP: load a ribosome often enough that the ribosomes queue up behind each other and behind the RNAP
+        if rng.random() < 0.3:
+            clear = not reference or reference[-1] - SETTING.ribo_size >= 0
+            assert container.if_clear_at_start() == clear
+            if clear:
+                container.load_one()
+                reference.append(0.0)
+                reference_loaded += 1
+
+        detached = container.step(time_index, rnap_position, rnap_attached)
+        reference, expected_detached = reference_step(reference, rnap_position, rnap_attached, SETTING)
+        reference_detached += expected_detached
+
+        assert detached == expected_detached
+        assert container.ribo_attached == len(reference)
+        slots = (container._head + np.arange(container.ribo_attached)) % container.ribo_list.shape[0]
+        np.testing.assert_allclose(container.ribo_list[slots], reference, rtol=0, atol=1e-9)
+    assert (container.ribo_loaded, container.ribo_detached) == (reference_loaded, reference_detached)
+    assert reference_detached > 0
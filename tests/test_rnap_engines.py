@@ -0,0 +1,87 @@
+"""
+The array engine, the serial number registry of the RNAPList and the compaction of the finished RNAPs against the object
+engine.
+"""
+import numpy as np
+import pytest
+
+from proteinproductionsim.entity.rnap_array import resolve_hindrance
+
+from conftest import SCENARIOS, assert_outputs_equal, get_outputs, make_controller, run_controller
+
+
+def test_array_engine_matches_object_engine(scenario):
+    expected = get_outputs(run_controller(**scenario))
+    assert_outputs_equal(get_outputs(run_controller(rnap_engine="array", **scenario)), expected)
+
+
+@pytest.mark.parametrize("rnap_engine", ["object", "array"])
+def test_compaction_matches_full_run(scenario, rnap_engine):
+    expected = get_outputs(run_controller(rnap_engine=rnap_engine, **scenario))
+    outputs = get_outputs(run_controller(rnap_engine=rnap_engine, compact_finished_rnap=True, **scenario))
+    assert_outputs_equal(outputs, expected)
+
+
+def test_compaction_drops_finished_rnaps():
+    controller = run_controller(rnap_engine="object", compact_finished_rnap=True, **SCENARIOS["dense"])
+    rnap_list = controller.env.dna.RNAP_LIST
+    summary = controller.get_rnap_summary()
+    assert summary["degraded"] > 0
+    assert len(rnap_list.inert_rnap) == 0
+    assert rnap_list.loaded == len(rnap_list.attached_rnap) + len(rnap_list.detached_rnap) + summary["degraded"] + \
+        summary["interrupted"]
+
+
+@pytest.mark.parametrize("name", ["dense", "fall off", "shut off"])
+def test_registry_matches_array_engine_at_every_step(name):
+    # REASON: the registry of the RNAPList, keyed by serial number, must hold the same RNAPs in the same order as the
+    #         rows of the RNAPArray, after every step.
+    scenario = SCENARIOS[name]
+    object_controller = make_controller(**scenario)
+    array_controller = make_controller(rnap_engine="array", **scenario)
+    object_controller.init()
+    array_controller.init()
+    rnap_list = object_controller.env.dna.RNAP_LIST
+    rnap_array = array_controller.env.dna.RNAP_LIST
+    for time_index in range(object_controller.total_time):
+        object_controller.env.step(time_index)
+        array_controller.env.step(time_index)
+        assert list(rnap_list.get_attached_serial_number()) == rnap_array.get_attached_serial_number().tolist()
+        assert list(rnap_list.get_detached_serial_number()) == rnap_array.get_detached_serial_number().tolist()
+        position, serial_number = rnap_list.get_position_for_all_attached_rnap()
+        expected_position, expected_serial_number = rnap_array.get_position_for_all_attached_rnap()
+        np.testing.assert_array_equal(position, expected_position)
+        np.testing.assert_array_equal(serial_number, expected_serial_number)
+        for name in ("loaded", "attached", "detached", "degrading", "degraded", "interrupted"):
+            assert getattr(rnap_list, name) == getattr(rnap_array, name), name
+    assert object_controller.env.total_prot == array_controller.env.total_prot
+
+
+def reference_resolve_hindrance(position, stepping, rnap_size, same_strand):
+    """
+    This method applies the hindrance rule of RNAPList.resolve_hindrance() to the RNAPs one by one from the front-most.
+    """
+    for i in range(1, len(position)):
+        previous_rnap_end_position = position[i - 1] + stepping[i - 1] - rnap_size
+        if same_strand[i - 1] and position[i] + stepping[i] > previous_rnap_end_position:
+            stepping[i] = previous_rnap_end_position - position[i]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_resolve_hindrance_matches_sequential_rule(seed):
+    # REASON: a dense queue of RNAPs, some of them stalled, so that the corrections chain through the queue.
+    rng = np.random.default_rng(seed)
+    size = 200
+    position = np.cumsum(rng.uniform(35, 40, size))[::-1].copy()
+    stepping = np.where(rng.random(size) < 0.2, 0.0, rng.uniform(0, 8, size))
+    same_strand = rng.random(size - 1) < 0.95
+    expected = stepping.copy()
+    reference_resolve_hindrance(position, expected, 35, same_strand)
+    resolved = stepping.copy()
+    resolve_hindrance(position, resolved, 35, same_strand)
+    np.testing.assert_array_equal(resolved, expected)
+    assert (resolved != stepping).sum() > 10
+    expected = stepping.copy()
+    reference_resolve_hindrance(position, expected, 35, np.ones(size - 1, dtype=bool))
+    resolve_hindrance(position, stepping, 35)
+    np.testing.assert_array_equal(stepping, expected)
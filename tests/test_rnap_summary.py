@@ -0,0 +1,38 @@
+"""
+The summary statistics of the finished RNAPs against numpy.
+"""
+import numpy as np
+import pytest
+
+from proteinproductionsim.datacontainer.rnap_summary import RNAPSummary
+from proteinproductionsim.datacontainer.setting import Setting
+
+
+@pytest.mark.parametrize("offset", [0, 10 ** 9])
+def test_summary_matches_numpy(offset):
+    # REASON: an offset much larger than the spread of the lifetimes, which a sum of squares cannot resolve.
+    rng = np.random.default_rng(0)
+    setting = Setting()
+    lifetime = offset + rng.integers(0, 50, 200)
+    ribosomes_loaded = rng.integers(0, 30, 200)
+    summary = RNAPSummary(None, setting)
+    for i in range(200):
+        summary.log(lifetime[i], ribosomes_loaded[i], ribosomes_loaded[i] // 2, interrupted=i % 10 == 0)
+
+    result = summary.get()
+    assert (result["degraded"], result["interrupted"]) == (180, 20)
+    for name, values in (("lifetime", lifetime * setting.dt), ("ribosomes loaded", ribosomes_loaded),
+                         ("proteins produced", ribosomes_loaded // 2)):
+        statistic = result[name]
+        assert statistic["count"] == len(values)
+        assert statistic["total"] == pytest.approx(values.sum(), rel=1e-12)
+        assert statistic["mean"] == pytest.approx(values.mean(), rel=1e-12)
+        assert statistic["std"] == pytest.approx(values.std(), rel=1e-6)
+        assert (statistic["min"], statistic["max"]) == (values.min(), values.max())
+
+
+def test_empty_summary_is_nan():
+    result = RNAPSummary(None, Setting()).get()
+    assert (result["degraded"], result["interrupted"]) == (0, 0)
+    assert result["lifetime"]["count"] == 0
+    assert np.isnan(result["lifetime"]["mean"]) and np.isnan(result["lifetime"]["std"])
@@ -0,0 +1,76 @@
+"""
+The events of the simulation service, against the same runs in this process.
+"""
+import asyncio
+
+import numpy as np
+
+from proteinproductionsim.controller.multi_sample_controller import run_single_sample
+from proteinproductionsim.helper.random_generator import spawn_seed_sequences
+from proteinproductionsim.service import SimulationService, stream_request
+
+from conftest import SHORT_SETTING
+
+# REASON: the parameters of SHORT_SETTING, as a client sends them.
+SETTING = {"total_time": 100, "length": 1200, "pause_site": [400, 800], "pause_duration": [5, 8]}
+
+
+def serve(tmp_path, *requests) -> list[list[dict]]:
+    """
+    This method starts a service, sends it the requests one after the other and returns the events of each.
+    """
+    path = str(tmp_path / "service.sock")
+
+    async def run():
+        service = SimulationService(n_workers=1, progress_interval=1000)
+        await service.start(path)
+        try:
+            return [[event async for event in stream_request(request, path)] for request in requests]
+        finally:
+            await service.close()
+
+    return asyncio.run(run())
+
+
+def assert_data_equal(data, expected):
+    assert set(data) == set(expected)
+    for name in expected:
+        np.testing.assert_array_equal(data[name], expected[name])
+
+
+def test_run_events(tmp_path):
+    request = {"request": 1, "type": "run", "rnap_loading_rate": 0.5, "seed": 4, "setting": SETTING}
+    events, = serve(tmp_path, request)
+    assert [event["event"] for event in events] == ["accepted"] + ["progress"] * 4 + ["result"]
+    assert all(event["request"] == 1 for event in events)
+    progress = events[1:-1]
+    assert [event["time_index"] for event in progress] == [1000, 2000, 3000, 3000]
+    expected = run_single_sample(4, 0.5, setting=SHORT_SETTING)
+    assert_data_equal(events[-1]["data"], expected)
+    # REASON: each progress event carries the values recorded since the previous one.
+    streamed = np.concatenate([event["protein amount"] for event in progress])
+    np.testing.assert_array_equal(streamed, expected["protein amount"])
+
+
+def test_sweep_events(tmp_path):
+    request = {"request": "s", "type": "sweep", "grid": {"rnap_loading_rate": [0.2, 0.5]}, "sample_amount": 2,
+               "seed": 3, "setting": SETTING}
+    events, = serve(tmp_path, request)
+    assert [event["event"] for event in events] == ["accepted"] + ["sample"] * 4 + ["done"]
+    samples = {(event["config_index"], event["sample_index"]): event["data"] for event in events[1:-1]}
+    assert set(samples) == {(c, s) for c in range(2) for s in range(2)}
+    for sample_index, seed in enumerate(spawn_seed_sequences(3, 2)):
+        for config_index, rate in enumerate([0.2, 0.5]):
+            assert_data_equal(samples[config_index, sample_index], run_single_sample(seed, rate, setting=SHORT_SETTING))
+
+
+def test_error_events(tmp_path):
+    events = serve(tmp_path,
+                   {"request": 1, "type": "run", "rnap_loading_rate": 0.5, "setting": {"unknown": 1}},
+                   {"request": 2, "type": "unknown"},
+                   {"request": 3, "type": "status"})
+    assert [event["event"] for event in events[0]] == ["accepted", "error"]
+    assert "TypeError" in events[0][1]["message"]
+    assert events[1] == [{"event": "error", "message": "unknown request type unknown.", "request": 2}]
+    # REASON: the failed run is not counted as running anymore, and the service keeps serving.
+    assert events[2] == [{"event": "status", "workers": 1, "running": 0, "request": 3}]
@@ -0,0 +1,58 @@
+"""
+The run-scoped, immutable Setting.
+"""
+import numpy as np
+import pytest
+
+from proteinproductionsim import variables
+from proteinproductionsim.datacontainer.setting import Setting
+
+from conftest import SCENARIOS, SHORT_SETTING, assert_outputs_equal, get_outputs, run_controller
+
+
+def test_defaults_are_the_module_constants():
+    setting = Setting()
+    assert (setting.total_time, setting.dt, setting.length, setting.rnap_size, setting.ribo_size) == \
+        (variables.total_time, variables.dt, variables.length, variables.RNAP_size, variables.RIBO_size)
+    np.testing.assert_array_equal(setting.pause_site, variables.pauseSite)
+    np.testing.assert_array_equal(setting.pause_duration, variables.pauseDuration)
+    # REASON: the derived quantities are computed the same way as the module-level expressions they replace.
+    assert setting.multiplier == variables.multiplier
+    assert setting.stage_per_collection == variables.stage_per_collection
+    assert setting.total_time_index == variables.scaling(variables.total_time)
+    assert setting.t_on_index == variables.scaling(variables.t_on)
+    np.testing.assert_array_equal(setting.pause_duration_index,
+                                  [variables.scaling(d) for d in variables.pauseDuration])
+    np.testing.assert_array_equal(setting.pause_pace, 1 / setting.pause_duration_index)
+    assert setting.rnap_step == variables.v_0 * variables.dt
+    assert setting.ribo_step == variables.k_elong * variables.dt
+    assert setting.ribo_loading_probability == variables.kRiboLoading * variables.dt
+
+
+def test_setting_is_immutable():
+    setting = Setting()
+    with pytest.raises(AttributeError):
+        setting.length = 100
+    with pytest.raises(AttributeError):
+        del setting.dt
+    with pytest.raises(ValueError):
+        setting.pause_site[0] = 0
+    with pytest.raises(ValueError):
+        setting.pause_pace[0] = 0
+
+
+def test_replace_derives_a_new_setting():
+    setting = Setting()
+    changed = setting.replace(total_time=10, dt=0.1)
+    assert (changed.total_time, changed.dt, changed.total_time_index, changed.multiplier) == (10, 0.1, 100, 10)
+    assert (setting.total_time, setting.dt) == (variables.total_time, variables.dt)
+    assert Setting(**setting.get()).get() == setting.get()
+    assert changed.replace(total_time=variables.total_time, dt=variables.dt).get() == setting.get()
+
+
+def test_runs_with_different_settings_do_not_interfere():
+    # REASON: a run with another setting in the same process must not change the next run with the first setting.
+    expected = get_outputs(run_controller(**SCENARIOS["supercoiling"]))
+    other = run_controller(setting=SHORT_SETTING.replace(length=900, dt=1/20), **SCENARIOS["supercoiling"])
+    assert other.total_time == 2000
+    assert_outputs_equal(get_outputs(run_controller(**SCENARIOS["supercoiling"])), expected)
@@ -0,0 +1,60 @@
+"""
+The vectorized supercoiling kernel against the scalar loops of DNAStrand.supercoiling() it replaces.
+"""
+import numpy as np
+import pytest
+
+from proteinproductionsim.helper.supercoilling import n_dependence_cubic_3, phi_array, torque_array, velocity_array
+from proteinproductionsim.variables import gamma, tau_0, tau_c, v_0
+
+
+def reference_supercoiling(positions, r_ref, promoter_state):
+    """
+    This method computes phi, the torque and the velocity of the attached RNAPs one element at a time.
+    """
+    size = len(positions)
+    phi = np.zeros(size + 1)
+    for i in range(1, size + 1):
+        if i == size:
+            phi[i] = 0.0 if promoter_state else gamma * (positions[i - 1] - r_ref[i - 1])
+        else:
+            phi[i] = gamma * (positions[i - 1] - r_ref[i - 1] - positions[i])
+    n = n_dependence_cubic_3(size)
+    torq = np.zeros(size)
+    velo = np.zeros(size)
+    for i in range(size):
+        torq[i] = -tau_0 * n * (phi[i] - phi[i + 1])
+        if torq[i] > 1.5 * tau_c:
+            velo[i] = 0
+        elif torq[i] < -1.5 * tau_c:
+            velo[i] = 2 * v_0
+        else:
+            velo[i] = 2 * v_0 / (1 + np.exp(2 * (torq[i] / tau_c) ** 3))
+    return phi, torq, velo
+
+
+@pytest.mark.parametrize("size", [0, 1, 2, 5, 40])
+@pytest.mark.parametrize("promoter_state", [True, False])
+def test_kernel_matches_scalar_loops(size, promoter_state):
+    rng = np.random.default_rng(size)
+    # REASON: the twists between the RNAPs span several orders of magnitude, so that some RNAPs are stalled, some are
+    #         boosted and the velocity of the others is on the curve.
+    positions = np.cumsum(rng.uniform(35, 3000, size))[::-1].copy()
+    twist = rng.choice([-1, 1], size) * 10 ** rng.uniform(-5, 3, size)
+    r_ref = positions - np.append(positions[1:], 0) + twist
+    expected_phi, expected_torq, expected_velo = reference_supercoiling(positions, r_ref, promoter_state)
+
+    phi = phi_array(positions, r_ref, promoter_state, gamma)
+    torq = torque_array(phi, n_dependence_cubic_3(size), tau_0)
+    velo = velocity_array(torq, tau_c, v_0)
+    np.testing.assert_array_equal(phi, expected_phi)
+    np.testing.assert_array_equal(torq, expected_torq)
+    np.testing.assert_allclose(velo, expected_velo, rtol=1e-14, atol=0)
+
+
+def test_velocity_is_clipped_outside_the_interval():
+    torq = np.array([-1e6, -1.5 * tau_c - 1e-9, 0.0, 1.5 * tau_c + 1e-9, 1e6])
+    velo = velocity_array(torq, tau_c, v_0)
+    np.testing.assert_array_equal(velo[[0, 1]], 2 * v_0)
+    np.testing.assert_array_equal(velo[[3, 4]], 0)
+    assert velo[2] == v_0
@@ -0,0 +1,93 @@
+"""
+The content-addressed result cache and the parameter sweeps stored in it.
+"""
+import hashlib
+
+import numpy as np
+import pytest
+
+from proteinproductionsim.controller.dna_sim_controller import RecordConfig
+from proteinproductionsim.controller.multi_sample_controller import run_single_sample
+from proteinproductionsim.controller.sweep_controller import SweepController, expand_grid
+from proteinproductionsim.helper.random_generator import spawn_seed_sequences
+from proteinproductionsim.helper.result_cache import ResultCache
+
+from conftest import SHORT_SETTING
+
+get_key = ResultCache.get_key
+
+
+def test_key_is_the_hash_of_the_canonical_json():
+    expected = hashlib.sha256(b'{"config":{"a":1,"b":[0.5,"x"]},"seed":3}').hexdigest()
+    assert get_key(seed=3, config={"b": [0.5, "x"], "a": 1}) == expected
+    assert get_key(config={"a": 1, "b": (0.5, "x")}, seed=3) == expected
+
+
+def test_key_of_numpy_values_and_objects():
+    assert get_key(config={"rate": np.float64(0.5), "amount": np.int64(3)}) == get_key(config={"rate": 0.5,
+                                                                                              "amount": 3})
+    assert get_key(site=np.array([400, 800])) == get_key(site=[400, 800])
+    assert get_key(setting=SHORT_SETTING) == get_key(setting=SHORT_SETTING.replace())
+    assert get_key(setting=SHORT_SETTING) != get_key(setting=SHORT_SETTING.replace(length=1300))
+    # REASON: where and how the recorders store their data does not change the result, what they record does.
+    record_config = RecordConfig(record_five_three=True)
+    assert get_key(record_config=record_config) == get_key(record_config=RecordConfig(
+        record_five_three=True, storage_path="elsewhere", chunk_size=16, show_progress_bar=False))
+    assert get_key(record_config=record_config) != get_key(record_config=RecordConfig(record_five_three=False))
+
+
+def test_key_rejects_unknown_values():
+    with pytest.raises(TypeError, match="config.f"):
+        get_key(config={"f": object()})
+
+
+def test_cache_round_trip(tmp_path):
+    cache = ResultCache(str(tmp_path))
+    key = get_key(seed=1)
+    assert not cache.contains(key) and cache.load(key) is None
+    result = {"protein amount": np.arange(5.0), "five": np.arange(5)}
+    cache.save(key, result)
+    assert cache.contains(key)
+    loaded = cache.load(key)
+    assert loaded.keys() == result.keys()
+    for name, value in result.items():
+        np.testing.assert_array_equal(loaded[name], value)
+        assert loaded[name].dtype == value.dtype
+
+
+def test_expand_grid():
+    configs = expand_grid({"a": [1, 2], "b": ["x", "y"]}, c=0)
+    assert configs == [dict(c=0, a=1, b="x"), dict(c=0, a=1, b="y"), dict(c=0, a=2, b="x"), dict(c=0, a=2, b="y")]
+
+
+def run_sweep(tmp_path, grid, **kwargs):
+    sweep = SweepController(grid, sample_amount=2, seed=9, cache_directory=str(tmp_path / "cache"), n_workers=1,
+                            show_progress_bar=False, setting=SHORT_SETTING,
+                            record_config=RecordConfig(record_five_three=True, show_progress_bar=False), **kwargs)
+    sweep.start()
+    return sweep
+
+
+def test_sweep_is_served_from_the_cache(tmp_path):
+    # REASON: a numpy grid, with a Setting and a RecordConfig among the fixed keyword arguments.
+    grid = {"rnap_loading_rate": np.array([0.2, 0.6])}
+    sweep = run_sweep(tmp_path, grid)
+    assert sweep.computed == 4
+    record_config = RecordConfig(record_five_three=True, show_progress_bar=False)
+    for config, data in zip(sweep.configs, sweep.data):
+        for index, seed in enumerate(spawn_seed_sequences(9, 2)):
+            expected = run_single_sample(seed, config["rnap_loading_rate"], record_config, setting=SHORT_SETTING)
+            for name, value in expected.items():
+                np.testing.assert_array_equal(data[name][index], value)
+
+    again = run_sweep(tmp_path, grid)
+    assert again.computed == 0
+    for data, expected in zip(again.data, sweep.data):
+        for name, value in expected.items():
+            np.testing.assert_array_equal(data[name], value)
+
+    # STEP: a sweep sharing a point with the first one only computes the new point
+    wider = run_sweep(tmp_path, {"rnap_loading_rate": [0.6, 1.0]})
+    assert wider.computed == 2
+    np.testing.assert_array_equal(wider.get_data(rnap_loading_rate=0.6)[0][1]["protein amount"],
+                                  sweep.data[1]["protein amount"])